@@ -121,6 +121,7 @@ class DAQ_Move(ParameterControlModule):
         self.module_and_data_saver = module_saving.ActuatorSaver(self)
 
         self._move_done_bool = True
+        self._line_mode_available = False
 
         self._current_value = DataActuator(title, units=self.units)
         self._target_value = DataActuator(title, units=self.units)
@@ -398,6 +399,11 @@ class DAQ_Move(ParameterControlModule):
         """bool: status of the actuator's status (done or not)"""
         return self._move_done_bool
 
+    @property
+    def line_mode_available(self) -> bool:
+        """bool: True if the initialized plugin can run whole scan lines, see DAQ_Move_base.move_line"""
+        return self._line_mode_available
+
     def value_changed(self, param: Parameter):
         """ Apply changes of value in the settings"""
         super().value_changed(param=param)
@@ -458,6 +464,7 @@ class DAQ_Move(ParameterControlModule):
                 if self.ui is not None:
                     self.ui.actuator_init = True
                 self._initialized_state = True
+                self._line_mode_available = status.attribute[0].get('line_mode_available', False)
             else:
                 self._initialized_state = False
             if self._initialized_state:
@@ -769,6 +776,7 @@ class DAQ_Move_Hardware(QObject):
                 status.info = infos[0]
                 status.initialized = infos[1]
             status.controller = self.hardware.controller
+            status.line_mode_available = class_.line_mode_available
             self.hardware.move_done_signal.connect(self.move_done)
             if status.initialized:
                 self.status_sig.emit(ThreadCommand('get_actuator_value', [self.get_actuator_value()]))
@@ -792,6 +800,13 @@ class DAQ_Move_Hardware(QObject):
             self.hardware.move_abs(position)
         self.hardware.poll_moving()
 
+    def move_line(self, positions: DataActuator):
+        """Run a whole scan line of positions, see DAQ_Move_base.move_line"""
+        positions = check_units(positions, self.hardware.axis_unit)
+        self.hardware.move_is_done = False
+        positions.units = self.hardware.axis_unit  # convert to plugin controller current axis units
+        self.hardware.move_line(positions)
+
     def move_rel(self, rel_position: DataActuator, polling=True):
         """
 
@@ -841,6 +856,7 @@ class DAQ_Move_Hardware(QObject):
                 * **close** command, unitinalise the stage closing hardware and emitting the corresponding status signal
                 * **move_abs** command, call the move_Abs method with position from command attribute
                 * **move_rel** command, call the move_Rel method with the relative position from the command attribute.
+                * **move_line** command, call the move_line method with the line positions from the command attribute
                 * **move_home** command, call the move_home method
                 * **get_actuator_value** command, get the current position from the check_position method
                 * **Stop_motion** command, stop any motion via the stop_Motion method
@@ -854,6 +870,7 @@ class DAQ_Move_Hardware(QObject):
             * **close** command, unitinalise the stage closing hardware and emitting the corresponding status signal
             * **move_abs** command, call the move_abs method with position from command attribute
             * **move_rel** command, call the move_rel method with the relative position from the command attribute.
+            * **move_line** command, call the move_line method with the line positions from the command attribute
             * **move_home** command, call the move_home method
             * **get_actuator_value** command, get the current position from the check_position method
             * **stop_motion** command, stop any motion via the stop_Motion method
@@ -875,6 +892,9 @@ class DAQ_Move_Hardware(QObject):
             elif command.command == "move_rel":
                 self.move_rel(*command.attribute)
 
+            elif command.command == "move_line":
+                self.move_line(*command.attribute)
+
             elif command.command == "move_home":
                 self.move_home()
 
@@ -18,9 +18,9 @@ import time
 from easydict import EasyDict as edict
 import numpy as np
 from qtpy import QtWidgets
-from qtpy.QtCore import Qt, QObject, Slot, QThread, Signal
+from qtpy.QtCore import Qt, QObject, Slot, QThread, Signal, QTimer
 
-from pymodaq.utils.data import DataFromPlugins, DataToExport, Axis, DataDistribution
+from pymodaq.utils.data import DataFromPlugins, DataToExport, Axis, DataDistribution, DataAverager
 from pymodaq.utils.logger import set_logger, get_module_name
 from pymodaq.control_modules.utils import ParameterControlModule
 from pymodaq.utils.gui_utils.file_io import select_file
@@ -43,6 +43,7 @@ from pymodaq.utils.plotting.data_viewers.viewer import ViewerBase
 from pymodaq.utils.plotting.data_viewers import ViewersEnum
 from pymodaq.utils.enums import enum_checker
 from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base
+from pymodaq.control_modules.frame_pool import FramePool
 
 from pymodaq.utils.leco.pymodaq_listener import ViewerActorListener, LECOClientCommands
 
@@ -70,6 +71,13 @@ class DAQ_Viewer(ParameterControlModule):
     overshoot_signal: Signal[bool]
         This signal is emitted when some 0D data from the plugin is higher than the overshoot threshold set in the
         settings
+    data_latched_signal: Signal[str]
+        Signal emitted with the title of the module when the plugin latched the data of the current grab (the
+        acquisition is over but the data are still to be read out)
+    line_armed_signal: Signal[str]
+        Signal emitted with the title of the module when the plugin is ready to grab a scan line
+    line_done_signal: Signal[DataToExport]
+        Signal emitted with the data of a whole scan line grabbed in line mode, see DAQ_Viewer_base.grab_line
 
     See Also
     --------
@@ -85,6 +93,9 @@ class DAQ_Viewer(ParameterControlModule):
     custom_sig = Signal(ThreadCommand)  # particular case where DAQ_Viewer is used for a custom module
 
     grab_done_signal = Signal(DataToExport)
+    data_latched_signal = Signal(str)
+    line_armed_signal = Signal(str)
+    line_done_signal = Signal(DataToExport)
 
     overshoot_signal = Signal(bool)
     data_saved = Signal()
@@ -139,7 +150,9 @@ class DAQ_Viewer(ParameterControlModule):
                                           module_saving.DetectorEnlargeableSaver,
                                           module_saving.DetectorExtendedSaver] = None
         self._h5saver_continuous: Optional[H5Saver] = None
-        self._ind_continuous_grab = 0
+        self._live_averager = DataAverager(with_errors=config('viewer', 'averaging_errors'))
+        self._frame_pool = FramePool()  # buffers the instrument plugin can fill and emit
+        self._line_mode_available = False
         self.setup_continuous_saving()
 
         self.settings.child('main_settings', 'DAQ_type').setValue(self.daq_type.name)
@@ -158,6 +171,12 @@ class DAQ_Viewer(ParameterControlModule):
         self._start_grab_time: float = 0.  # used for the refreshing rate
         self._received_data: int = 0
 
+        self._latest_frame: Optional[DataToExport] = None  # frame waiting to be displayed
+        self._display_timer = QTimer()
+        self._display_timer.setSingleShot(True)
+        self._display_timer.timeout.connect(self._show_latest_frame)
+        self.reset_display_statistics()
+
         self._lcd: Optional[LCD] = None
 
         self._bkg: Optional[DataToExport] = None  # buffer to store background
@@ -352,6 +371,16 @@ class DAQ_Viewer(ParameterControlModule):
         """:obj:`bool`: Get the current grabbing status"""
         return self._grabing
 
+    @property
+    def line_mode_available(self) -> bool:
+        """bool: True if the initialized plugin can grab whole scan lines, see DAQ_Viewer_base.grab_line"""
+        return self._line_mode_available
+
+    @property
+    def frame_pool(self) -> FramePool:
+        """:obj:`FramePool`: Get the preallocated frame buffers shared with the instrument plugin"""
+        return self._frame_pool
+
     @property
     def do_bkg(self) -> bool:
         """:obj:`bool`: Get/Set if background subtraction should be done"""
@@ -391,6 +420,7 @@ class DAQ_Viewer(ParameterControlModule):
         """ Quit the application, closing the hardware and other modules """
 
         # insert anything that needs to be closed before leaving
+        self._display_timer.stop()
 
         if self._initialized_state:  # means  initialized
             self.init_hardware(False)
@@ -437,7 +467,7 @@ class DAQ_Viewer(ParameterControlModule):
         else:            
             try:
 
-                hardware = DAQ_Detector(self._title, self.settings, self.detector)
+                hardware = DAQ_Detector(self._title, self.settings, self.detector, frame_pool=self._frame_pool)
                 self._hardware_thread = QThread()
                 if self.config('viewer', 'viewer_in_thread'):
                     hardware.moveToThread(self._hardware_thread)
@@ -445,6 +475,7 @@ class DAQ_Viewer(ParameterControlModule):
                 self.command_hardware[ThreadCommand].connect(hardware.queue_command)
                 hardware.data_detector_sig[DataToExport].connect(self.show_data)
                 hardware.data_detector_temp_sig[DataToExport].connect(self.show_temp_data)
+                hardware.data_detector_line_sig[DataToExport].connect(self.line_ready)
                 hardware.status_sig[ThreadCommand].connect(self.thread_status)
                 self._update_settings_signal[edict].connect(hardware.update_settings)
 
@@ -507,6 +538,8 @@ class DAQ_Viewer(ParameterControlModule):
         self._grabing = grab_state
         self._send_to_tcpip = send_to_tcpip
         self._grab_done = False
+        self.reset_display_statistics()
+        self._frame_pool.reset_statistics()
 
         if self.ui is not None:
             self.ui.data_ready = False
@@ -644,7 +677,8 @@ class DAQ_Viewer(ParameterControlModule):
         --------
         DAQ_Scan, DetectorExtendedSaver
         """
-        self._add_data_to_saver(self._data_to_save_export, init_step=np.all(np.array(indexes) == 0), where=where,
+        init_step = all((index.start if isinstance(index, slice) else index) in (0, None) for index in indexes)
+        self._add_data_to_saver(self._data_to_save_export, init_step=init_step, where=where,
                                 indexes=indexes, distribution=distribution)
 
     def _add_data_to_saver(self, dte: DataToExport, init_step=False, where=None, **kwargs):
@@ -748,7 +782,7 @@ class DAQ_Viewer(ParameterControlModule):
             if len(data) != 0:
                 for dat in data:
                     dat.origin = f'{self.title} - {dat.origin}' if dat.origin is not None else f'{self.title}'
-                self._data_to_save_export.append(data)
+                self._data_to_save_export.append(data, copy=False)  # new objects for each frame, see ViewerBase
 
             if self._received_data == len(self.viewers):
                 self._grab_done = True
@@ -759,6 +793,18 @@ class DAQ_Viewer(ParameterControlModule):
         """ Get the current data stored internally"""
         return self._data_to_save_export
 
+    @Slot(DataToExport)
+    def line_ready(self, dte: DataToExport):
+        """Slot receiving the data of a whole scan line from plugins in line mode, see DAQ_Viewer_base.grab_line
+
+        The data are not displayed, they are sent with the line_done_signal and kept to be saved by the DAQScan
+        """
+        dte = dte.view()
+        for dwa in dte:
+            dwa.origin = self._title
+        self._data_to_save_export = DataToExport(self._title, control_module='DAQ_Viewer', data=dte.data)
+        self.line_done_signal.emit(self._data_to_save_export)
+
     @Slot(DataToExport)
     def show_temp_data(self, data: DataToExport):
         """Send data to their dedicated viewers but those will not emit processed data signal
@@ -773,6 +819,50 @@ class DAQ_Viewer(ParameterControlModule):
         if self.ui is not None:
             self.set_data_to_viewers(data, temp=True)
 
+    def reset_display_statistics(self):
+        self._received_frames = 0
+        self._displayed_frames = 0
+        self._coalesced_frames = 0
+
+    def display_statistics(self) -> dict:
+        """Get the number of frames received from the plugin, of frames sent to the viewers and of
+        frames replaced in the display slot by a newer one before being displayed"""
+        return dict(received=self._received_frames, displayed=self._displayed_frames,
+                    coalesced=self._coalesced_frames)
+
+    def _get_data_to_plot(self, dte: DataToExport) -> DataToExport:
+        """Select the data to be displayed and subtract the background if needed, without copying the arrays
+
+        The viewers get views of the data to be saved: their processing cannot modify them
+        """
+        data_to_plot = DataToExport(dte.name,
+                                    data=[dwa.view() for dwa in dte.get_data_from_attribute('do_plot', True).data +
+                                          dte.get_data_from_missing_attribute('do_plot').data])
+        if self.do_bkg and self._bkg is not None:
+            data_to_plot -= self._bkg
+        return data_to_plot
+
+    def _display_frame(self, dte: DataToExport, temp=False):
+        self._latest_frame = None
+        self._display_timer.stop()
+        self._start_grab_time = time.perf_counter()
+        self._displayed_frames += 1
+        data_to_plot = self._get_data_to_plot(dte)
+        self._init_show_data(data_to_plot)
+        self.set_data_to_viewers(data_to_plot, temp=temp)
+
+    @Slot()
+    def _show_latest_frame(self):
+        """Display the last frame skipped because received too soon after the previous displayed one
+
+        It has already been emitted with grab_done_signal, so the viewers will not export their processed data
+        """
+        if self._latest_frame is not None and self.ui is not None:
+            try:
+                self._display_frame(self._latest_frame, temp=True)
+            except Exception as e:
+                self.logger.exception(str(e))
+
     @Slot(DataToExport)
     def show_data(self, dte: DataToExport):
         """Send data to their dedicated viewers
@@ -787,6 +877,11 @@ class DAQ_Viewer(ParameterControlModule):
             * either send to the data viewers (if refresh time is ok and/or show data option in settings is set)
             * either
                 * send grab_done_signal (to the slot _save_export_data ) to save the data
+                * keep the frame in a display slot (replacing any frame not yet displayed), shown by a timer once
+                  the refresh time is elapsed
+
+        The arrays emitted by the plugin are not copied: the saved, exported and displayed data are read-only views
+        of them.
 
         Parameters
         ----------
@@ -797,7 +892,8 @@ class DAQ_Viewer(ParameterControlModule):
         _init_show_data, _process_data
         """
         try:
-            dte = dte.deepcopy()
+            self._received_frames += 1
+            dte = dte.view()
             if self.settings['main_settings', 'tcpip', 'tcp_connected'] and self._send_to_tcpip:
                 self._command_tcpip.emit(ThreadCommand('data_ready', dte))
             if self.settings['main_settings', 'leco', 'leco_connected'] and self._send_to_tcpip:
@@ -806,39 +902,33 @@ class DAQ_Viewer(ParameterControlModule):
                 self.ui.data_ready = True
 
             if self.settings['main_settings', 'live_averaging']:
-                self.settings.child('main_settings', 'N_live_averaging').setValue(self._ind_continuous_grab)
-                _current_data = dte.deepcopy()
-
-                self._ind_continuous_grab += 1
-                if self._ind_continuous_grab > 1:
-                    self._data_to_save_export = \
-                        _current_data.average(self._data_to_save_export, self._ind_continuous_grab)
-            else:
-                for dwa in dte:
-                    dwa.origin = self._title
-                self._data_to_save_export = DataToExport(self._title, control_module='DAQ_Viewer', data=dte.data)
+                self._live_averager.add(dte)
+                self.settings.child('main_settings', 'N_live_averaging').setValue(self._live_averager.count)
+                dte = self._live_averager.average()
+            for dwa in dte:
+                dwa.origin = self._title
+            self._data_to_save_export = DataToExport(self._title, control_module='DAQ_Viewer', data=dte.data)
 
             if self._take_bkg:
                 self._bkg = self._data_to_save_export.deepcopy()
                 self._take_bkg = False
 
-            if self._grabing:  # if live
-                refresh_time = self.settings['main_settings', 'refresh_time']
-                refresh = time.perf_counter() - self._start_grab_time > refresh_time / 1000
-                if refresh:
-                    self._start_grab_time = time.perf_counter()
-            else:
-                refresh = True  # if single
-            if self.ui is not None and self.settings.child('main_settings', 'show_data').value() and refresh:
+            show = self.ui is not None and self.settings['main_settings', 'show_data']
+            refresh = True  # if single
+            if show and self._grabing:  # if live
+                remaining_time = (self.settings['main_settings', 'refresh_time'] / 1000 -
+                                  (time.perf_counter() - self._start_grab_time))
+                refresh = remaining_time <= 0
+                if not refresh:
+                    if self._latest_frame is not None:
+                        self._coalesced_frames += 1
+                    self._latest_frame = self._data_to_save_export
+                    if not self._display_timer.isActive():
+                        self._display_timer.start(int(np.ceil(remaining_time * 1000)))
+
+            if show and refresh:
                 self._received_data = 0  # so that data send back from viewers can be properly counted
-                data_to_plot = self._data_to_save_export.get_data_from_attribute('do_plot', True, deepcopy=True)
-                data_to_plot.append(self._data_to_save_export.get_data_from_missing_attribute('do_plot', deepcopy=True))
-                # process bkg if needed
-                if self.do_bkg and self._bkg is not None:
-                    data_to_plot -= self._bkg
-
-                self._init_show_data(data_to_plot)
-                self.set_data_to_viewers(data_to_plot)
+                self._display_frame(self._data_to_save_export)
             else:
                 self._grab_done = True
                 self.grab_done_signal.emit(self._data_to_save_export)
@@ -916,7 +1006,7 @@ class DAQ_Viewer(ParameterControlModule):
             self.settings.child('main_settings', 'show_averaging').setValue(False)
             if param.value():
                 self.settings.child('main_settings', 'N_live_averaging').show()
-                self._ind_continuous_grab = 0
+                self._live_averager.reset()
                 self.settings.child('main_settings', 'N_live_averaging').setValue(0)
             else:
                 self.settings.child('main_settings', 'N_live_averaging').hide()
@@ -1034,6 +1124,8 @@ class DAQ_Viewer(ParameterControlModule):
                 * init_lcd: display a LCD panel
                 * lcd: display on the LCD panel, the content of the attribute
                 * stop: stop the grab
+                * data_latched: emit data_latched_signal
+                * line_armed: emit line_armed_signal
         """
         super().thread_status(status, 'detector')
 
@@ -1044,6 +1136,7 @@ class DAQ_Viewer(ParameterControlModule):
             if status.attribute[0]['initialized']:
                 self.controller = status.attribute[0]['controller']
                 self._initialized_state = True
+                self._line_mode_available = status.attribute[0].get('line_mode_available', False)
             else:
                 self._initialized_state = False
 
@@ -1074,6 +1167,12 @@ class DAQ_Viewer(ParameterControlModule):
         elif status.command == 'stop':
             self.stop_grab()
 
+        elif status.command == 'data_latched':
+            self.data_latched_signal.emit(self.title)
+
+        elif status.command == 'line_armed':
+            self.line_armed_signal.emit(self.title)
+
     def connect_tcp_ip(self):
         super().connect_tcp_ip(params_state=self.settings.child('detector_settings'),
                                client_type="GRABBER")
@@ -1132,14 +1231,18 @@ class DAQ_Detector(QObject):
         wrapper object used to control a given instrument in the instrument plugin
     controller_adress: int
         unique integer used to identify a controller shared among multiple instrument plugins
+    frame_pool: FramePool
+        preallocated buffers, owned by the DAQ_Viewer, the instrument plugin can fill and emit
 
     """
     status_sig = Signal(ThreadCommand)
     data_detector_sig = Signal(DataToExport)
     data_detector_temp_sig = Signal(DataToExport)
+    data_detector_line_sig = Signal(DataToExport)
 
-    def __init__(self, title, settings_parameter, detector_name):
+    def __init__(self, title, settings_parameter, detector_name, frame_pool: FramePool = None):
         super().__init__()
+        self.frame_pool = frame_pool
         self.waiting_for_data = False
         self.controller = None
         self.logger = set_logger(f'{logger.name}.{title}.detector')
@@ -1151,6 +1254,7 @@ class DAQ_Detector(QObject):
         self.single_grab = False
         self.datas: DataToExport = None
         self.ind_average = 0
+        self._averager = DataAverager(with_errors=config('viewer', 'averaging_errors'))
         self.Naverage = 1
         self.average_done = False
         self.hardware_averaging = False
@@ -1196,6 +1300,7 @@ class DAQ_Detector(QObject):
             * close
             * grab
             * single
+            * grab_line
             * stop_grab
             * stop_all
             * update_scanner
@@ -1222,6 +1327,10 @@ class DAQ_Detector(QObject):
             self.grab_state = True
             self.single(**command.attribute)
 
+        elif command.command == "grab_line":
+            self.detector.grab_line(**command.attribute)
+            self.status_sig.emit(ThreadCommand('line_armed'))
+
         elif command.command == "stop_grab":
             self.grab_state = False
             self.status_sig.emit(ThreadCommand("Update_Status", ['Stoping grab']))
@@ -1269,11 +1378,14 @@ class DAQ_Detector(QObject):
             # status="Not initialized"
             status = edict(initialized=False, info="", x_axis=None, y_axis=None)
             det_params, class_ = get_viewer_plugins(self.daq_type.name, self.detector_name)
+            if self.frame_pool is not None:
+                self.frame_pool.clear()
             self.detector: DAQ_Viewer_base = class_(self, params_state)
 
             try:
                 self.detector.dte_signal.connect(self.data_ready)
                 self.detector.dte_signal_temp.connect(self.emit_temp_data)
+                self.detector.dte_line_signal.connect(self.data_detector_line_sig)
                 infos = self.detector.ini_detector(controller)
                 status.controller = self.detector.controller
 
@@ -1290,6 +1402,7 @@ class DAQ_Detector(QObject):
 
             self.hardware_averaging = class_.hardware_averaging  # to check if averaging can be done directly by
             # the hardware or done here software wise
+            status.line_mode_available = class_.line_mode_available
 
             return status
         except Exception as e:
@@ -1319,9 +1432,11 @@ class DAQ_Detector(QObject):
         if do_averaging:  # to execute if the averaging has to be done software wise
             self.ind_average += 1
             if self.ind_average == 1:
-                self.datas = data.deepcopy()
-            else:
-                self.datas = data.average(self.datas, self.ind_average)
+                self._averager.reset()
+            self._averager.add(data)  # accumulated in place, the average is only computed when needed
+
+            if self.show_averaging or self.ind_average == self.Naverage:
+                self.datas = self._averager.average()
 
             if self.show_averaging:
                 self.emit_temp_data(self.datas)
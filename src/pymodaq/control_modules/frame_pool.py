@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Pool of preallocated frame buffers that detector plugins can fill and emit without allocating new arrays
+"""
+import sys
+from threading import Lock
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from pymodaq.utils.config import Config
+from pymodaq.utils.logger import set_logger, get_module_name
+
+config = Config()
+logger = set_logger(get_module_name(__file__))
+
+
+class FrameSlot:
+    """A preallocated buffer of a FramePool
+
+    The slot is in use as long as the buffer, or any numpy view of it, is referenced outside of the pool
+
+    Parameters
+    ----------
+    shape: tuple of int
+    dtype: np.dtype
+    """
+
+    def __init__(self, shape: Tuple[int], dtype):
+        self.buffer = np.empty(shape, dtype=dtype)
+        self.frame_index = -1  # index of the frame for which the buffer was last served
+        self._free_refcount = self.refcount()
+
+    def refcount(self) -> int:
+        """The number of references to the buffer, views of it referencing the buffer as their base"""
+        return sys.getrefcount(self.buffer)
+
+    @property
+    def in_use(self) -> bool:
+        return self.refcount() > self._free_refcount
+
+
+class FramePool:
+    """Rings of preallocated numpy buffers shared by a producer (the instrument plugin) and the frame consumers
+
+    Each shape and dtype of requested buffers gets its own ring of slots. A buffer served by get_buffer is
+    reference counted through the python references to it and to its views, so that the consumers (viewers,
+    savers, TCP or LECO forwarders) do not have to release it explicitly: the slot is served again once
+    nobody holds the data anymore. When all slots of a ring are in use, get_buffer returns a newly
+    allocated array, not part of the pool, and the pool exhaustion is counted.
+
+    Parameters
+    ----------
+    n_slots: int
+        the number of slots per ring, default from the config
+
+    See Also
+    --------
+    statistics
+    """
+
+    def __init__(self, n_slots: int = None):
+        if n_slots is None:
+            n_slots = config('viewer', 'frame_pool_slots')
+        self.n_slots = n_slots
+        self._rings: Dict[Tuple[Tuple[int], np.dtype], List[FrameSlot]] = dict()
+        self._lock = Lock()
+        self.reset_statistics()
+
+    def get_buffer(self, shape: Tuple[int], dtype=np.float64) -> np.ndarray:
+        """Get a buffer no longer referenced by any consumer, its content is undefined
+
+        Parameters
+        ----------
+        shape: tuple of int
+        dtype: np.dtype
+
+        Returns
+        -------
+        np.ndarray
+        """
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            self._served += 1
+            ring = self._rings.setdefault(key, [])
+            free_slot = None
+            in_use = 0
+            for slot in ring:
+                if slot.in_use:
+                    in_use += 1
+                    self._max_lag = max(self._max_lag, self._served - slot.frame_index)
+                elif free_slot is None:
+                    free_slot = slot
+            if free_slot is None and len(ring) < self.n_slots:
+                free_slot = FrameSlot(*key)
+                ring.append(free_slot)
+                self._allocated += 1
+            if free_slot is None:
+                self._exhausted += 1
+                return np.empty(*key)
+            free_slot.frame_index = self._served
+            self._max_in_use = max(self._max_in_use, in_use + 1)
+            return free_slot.buffer
+
+    def clear(self):
+        """Forget all slots, the buffers still in use being released by their last consumer"""
+        with self._lock:
+            self._rings = dict()
+
+    @property
+    def slots(self) -> List[FrameSlot]:
+        with self._lock:
+            return [slot for ring in self._rings.values() for slot in ring]
+
+    def reset_statistics(self):
+        self._served = 0
+        self._allocated = 0
+        self._exhausted = 0
+        self._max_in_use = 0
+        self._max_lag = 0
+
+    def statistics(self) -> dict:
+        """Get the pool metrics as a dictionary
+
+        * slots: the number of allocated slots
+        * in_use: the number of slots currently held by consumers
+        * max_in_use: the maximum number of slots of a ring held at once
+        * served: the number of buffers served
+        * allocated: the number of buffers allocated for the slots
+        * exhausted: the number of buffers allocated outside of the pool as all slots were in use
+        * lag: the number of buffers served since the oldest slot still in use was served
+        * max_lag: the maximum lag seen when serving buffers
+        """
+        slots = self.slots
+        busy = [slot for slot in slots if slot.in_use]
+        lag = max([self._served - slot.frame_index for slot in busy], default=0)
+        return dict(slots=len(slots), in_use=len(busy), max_in_use=self._max_in_use, served=self._served,
+                    allocated=self._allocated, exhausted=self._exhausted, lag=lag,
+                    max_lag=max(self._max_lag, lag))
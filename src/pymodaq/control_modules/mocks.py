@@ -4,6 +4,13 @@ Created the 16/03/2023
 
 @author: Sebastien Weber
 """
+import threading
+
+import numpy as np
+from qtpy.QtCore import QObject, Signal
+
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.data import DataToExport, DataFromPlugins, DataActuator
 from pymodaq.utils.parameter import Parameter
 from pymodaq.utils.h5modules import saving
 from pymodaq.utils.h5modules.module_saving import DetectorSaver, ActuatorSaver, ScanSaver
@@ -48,4 +55,87 @@ class MockScan:
         detectors = [MockDAQViewer(self.h5saver, 'Det0D'), MockDAQViewer(self.h5saver, 'Det1D')]
         self.modules_manager = ModulesManagerMock(actuators, detectors)
         self.module_and_data_saver = ScanSaver(self)
-        self.ui = None
\ No newline at end of file
+        self.ui = None
+
+
+class MockLineDetector(QObject):
+    """Stand-in for a DAQ_Viewer driven by a ModulesManager, grabbing single frames or whole scan lines
+
+    Replies from another thread, after a delay in s, to the single (eventually latching its data before) and
+    grab_line commands, see ModulesManager.grab_datas and ModulesManager.grab_line
+
+    Parameters
+    ----------
+    title: str
+    delay: float
+        the duration of a single grab and of the read out of a line
+    latch_delay: float
+        if not None, the data are latched this delay after a single command
+    point_delay: float
+        the acquisition duration of each point of a line
+    """
+    line_mode_available = True
+    grab_done_signal = Signal(DataToExport)
+    data_latched_signal = Signal(str)
+    line_armed_signal = Signal(str)
+    line_done_signal = Signal(DataToExport)
+    command_hardware = Signal(ThreadCommand)
+
+    def __init__(self, title: str, delay: float, latch_delay: float = None, point_delay: float = 0.):
+        super().__init__()
+        self.title = title
+        self.delay = delay
+        self.latch_delay = latch_delay
+        self.point_delay = point_delay
+        self.Naverage = 1
+        self.command_hardware.connect(self.process_command)
+
+    def process_command(self, command: ThreadCommand):
+        if command.command == 'single':
+            if self.latch_delay is not None:
+                threading.Timer(self.latch_delay, self.data_latched_signal.emit, (self.title,)).start()
+            threading.Timer(self.delay, self.grab_done_signal.emit,
+                            (DataToExport(self.title, data=[DataFromPlugins(self.title, data=[np.array([0.])])]),)
+                            ).start()
+        elif command.command == 'grab_line':
+            n_points = command.attribute['n_points']
+            threading.Timer(0.01, self.line_armed_signal.emit, (self.title,)).start()
+            threading.Timer(self.delay + n_points * self.point_delay, self.line_done_signal.emit,
+                            (DataToExport(self.title, data=[DataFromPlugins(
+                                self.title, data=[np.zeros((n_points, 3))], nav_indexes=(0,))]),)
+                            ).start()
+
+
+class MockLineActuator(QObject):
+    """Stand-in for a DAQ_Move driven by a ModulesManager, moving to a position or running a whole scan line
+
+    Replies from another thread, after a delay in s, to the move_abs and move_line commands, see
+    ModulesManager.move_actuators and ModulesManager.grab_line
+
+    Parameters
+    ----------
+    title: str
+    delay: float
+        the duration of a move (including its settling) and of the end of a line
+    point_delay: float
+        the duration of the travel between two points of a line
+    """
+    line_mode_available = True
+    move_done_signal = Signal(DataActuator)
+    command_hardware = Signal(ThreadCommand)
+
+    def __init__(self, title: str, delay: float, point_delay: float = 0.):
+        super().__init__()
+        self.title = title
+        self.delay = delay
+        self.point_delay = point_delay
+        self.command_hardware.connect(self.process_command)
+
+    def process_command(self, command: ThreadCommand):
+        if command.command == 'move_abs':
+            threading.Timer(self.delay, self.move_done_signal.emit,
+                            (DataActuator(self.title, data=command.attribute[0].value()),)).start()
+        elif command.command == 'move_line':
+            line = command.attribute[0].data[0]
+            threading.Timer(self.delay + line.size * self.point_delay, self.move_done_signal.emit,
+                            (DataActuator(self.title, data=float(line[-1])),)).start()
@@ -257,6 +257,7 @@ class DAQ_Move_base(QObject):
 
     move_done_signal = Signal(DataActuator)
     is_multiaxes = False
+    line_mode_available = False  # True if the plugin implements move_line
     stage_names = []  # deprecated
 
     _axis_names: Union[list, Dict[str, int]] = None
@@ -631,6 +632,19 @@ class DAQ_Move_base(QObject):
         else:
             raise NotImplementedError
 
+    def move_line(self, positions: DataActuator):
+        """Run all the positions of a scan line, triggering the detectors acquisitions at each of them
+
+        Optional, to be reimplemented in plugins able to run a line on their controller (set line_mode_available to
+        True). The actuator is already at the first position of the line. Call move_done once the line is done.
+
+        Parameters
+        ----------
+        positions: DataActuator
+            holding the array of positions of the line in the plugin axis units
+        """
+        raise NotImplementedError
+
     def move_home(self, value: Union[float, DataActuator]):
         if hasattr(self, 'move_Home'):
             deprecation_msg('move_Home method in plugins is deprecated, use move_home', 3)
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Tuple, Union
 from qtpy import QtWidgets
 from qtpy.QtCore import QObject, Slot, Signal
 
@@ -147,10 +147,12 @@ class DAQ_Viewer_base(QObject):
     """
     hardware_averaging = False
     live_mode_available = False
+    line_mode_available = False  # True if the plugin implements grab_line
     data_grabed_signal = Signal(list)  # will be deprecated use dte_signal
     data_grabed_signal_temp = Signal(list)  # will be deprecated use dte_signal_temp
     dte_signal = Signal(DataToExport)
     dte_signal_temp = Signal(DataToExport)
+    dte_line_signal = Signal(DataToExport)  # to emit the data of a whole scan line, see grab_line
 
     params = []
 
@@ -205,6 +207,36 @@ class DAQ_Viewer_base(QObject):
         """
         return self.settings['controller_status'] == 'Master'
 
+    def get_frame_buffer(self, shape: Tuple[int], dtype=np.float64) -> np.ndarray:
+        """Get a preallocated buffer to be filled with the next frame and emitted
+
+        The buffer comes from the FramePool of the DAQ_Viewer and is served again only once the viewers,
+        savers and forwarders no longer hold the emitted data, so the plugin should not keep a reference to it.
+        Its content is undefined: write into it (for instance with np.copyto or as the output buffer of
+        the instrument library) before emitting it within a DataToExport.
+
+        Parameters
+        ----------
+        shape: tuple of int
+        dtype: np.dtype
+
+        Returns
+        -------
+        np.ndarray
+        """
+        frame_pool = getattr(self.parent, 'frame_pool', None)
+        if frame_pool is None:
+            return np.empty(shape, dtype=dtype)
+        return frame_pool.get_buffer(shape, dtype)
+
+    def emit_data_latched(self):
+        """Let the DAQ_Viewer know that the data of the current grab are acquired but still to be read out
+
+        Optional, to be called by plugins whose hardware latches the data (end of the exposure, trigger received)
+        before transferring it, so that a pipelined DAQScan can move the actuators to the next step meanwhile.
+        """
+        self.emit_status(ThreadCommand('data_latched'))
+
     def _emit_dte(self, dte: Union[DataToExport, list]):
         if isinstance(dte, list):
             deprecation_msg('Data emitted from the instrument plugins should be a DataToExport instance'
@@ -279,6 +311,25 @@ class DAQ_Viewer_base(QObject):
         """
         raise NotImplementedError
 
+    def grab_line(self, n_points: int, Naverage=1, **kwargs):
+        """Acquire the data of a whole scan line and emit them at once with the dte_line_signal
+
+        Optional, to be reimplemented in plugins buffering their data (set line_mode_available to True), the
+        acquisitions being triggered by the actuator running the line or the line being run by the detector
+        controller itself. The method should return once the detector is ready, the actuator being sent the
+        line afterwards. Each emitted DataWithAxes has the steps of the line as its first dimension, declared
+        as its navigation index: nav_indexes=(0,)
+
+        Parameters
+        ----------
+        n_points: int
+            the number of steps of the line
+        Naverage: int
+        kwargs: optional named arguments
+            positions: the DataToExport of the DataActuators holding the n_points positions of each actuator
+        """
+        raise NotImplementedError
+
     def stop(self):
         """
         Mandatory
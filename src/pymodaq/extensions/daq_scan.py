@@ -12,6 +12,7 @@ import os
 from pathlib import Path
 import sys
 import tempfile
+import time
 from typing import List, Tuple, TYPE_CHECKING
 
 import numpy as np
@@ -62,6 +63,38 @@ class ScanDataTemp:
         self.data = data
 
 
+class StepTimings:
+    """Accumulate the durations of the scan steps, split into move latency, grab latency and overhead
+
+    The overhead is the part of the step spent neither in moving the actuators, nor in grabbing the
+    detectors, nor in the user defined waiting times: ordering positions, emitting and saving data...
+    """
+    names = ('move_latency', 'grab_latency', 'step_overhead')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n_steps = 0
+        self._sums = dict.fromkeys(self.names, 0.)
+        self._maxs = dict.fromkeys(self.names, 0.)
+
+    def add(self, move_latency: float, grab_latency: float, step_overhead: float, n_steps: int = 1):
+        """Add the durations in s of a scan step, or of n_steps steps run at once"""
+        self.n_steps += n_steps
+        for name, duration in zip(self.names, (move_latency, grab_latency, step_overhead)):
+            self._sums[name] += duration
+            self._maxs[name] = max(self._maxs[name], duration / n_steps)
+
+    def to_attributes(self) -> dict:
+        """Get the mean and max durations in ms, as scalars to be saved as scan metadata"""
+        attributes = dict(timed_steps=self.n_steps)
+        for name in self.names:
+            attributes[f'{name}_ms'] = 1000 * self._sums[name] / max(self.n_steps, 1)
+            attributes[f'{name}_max_ms'] = 1000 * self._maxs[name]
+        return attributes
+
+
 class DAQScan(QObject, ParameterManager):
     """
     Main class initializing a DAQScan module with its dashboard and scanning control panel
@@ -83,6 +116,12 @@ class DAQScan(QObject, ParameterManager):
         ]},
         {'title': 'Scan options', 'name': 'scan_options', 'type': 'group', 'children': [
             {'title': 'Naverage:', 'name': 'scan_average', 'type': 'int', 'value': 1, 'min': 1},
+            {'title': 'Pipelined:', 'name': 'pipelined', 'type': 'bool', 'value': False,
+             'tip': 'Move to the next step as soon as the detectors latched their data, while it is read out '
+                    'and saved'},
+            {'title': 'Buffered lines:', 'name': 'buffered', 'type': 'bool', 'value': False,
+             'tip': 'Run the scan line by line, the detectors returning the data of a whole line, if supported by '
+                    'the selected modules'},
         ]},
 
         {'title': 'Plotting options', 'name': 'plot_options', 'type': 'group', 'children': [
@@ -460,43 +499,44 @@ class DAQScan(QObject, ParameterManager):
             custom_tree.parameter_to_xml_string
         """
 
-        attr = node.attrs
-        if type_info == 'dataset_info':
-            attr['type'] = 'dataset'
-            params = self.dataset_attributes
-        else:
-            attr['type'] = 'scan'
-            params = self.scan_attributes
-        for child in params.child(type_info).children():
-            if type(child.value()) is QDateTime:
-                attr[child.name()] = child.value().toString('dd/mm/yyyy HH:MM:ss')
+        with self.h5saver.lock:  # data could be written from a BackgroundSaver thread
+            attr = node.attrs
+            if type_info == 'dataset_info':
+                attr['type'] = 'dataset'
+                params = self.dataset_attributes
             else:
-                attr[child.name()] = child.value()
-        if type_info == 'dataset_info':
-            # save contents of given parameter object into an xml string under the attribute settings
-            settings_str = b'<All_settings title="All Settings" type="group">' + \
-                           ioxml.parameter_to_xml_string(params) + \
-                           ioxml.parameter_to_xml_string(self.settings)
-                           # ioxml.parameter_to_xml_string(
-                           #     self.dashboard.preset_manager.preset_params) +\
-            settings_str += b'</All_settings>'
-            attr['settings'] = settings_str
-
-        elif type_info == 'scan_info':
-            settings_all = [ioxml.parameter_to_xml_string(params),
-                           ioxml.parameter_to_xml_string(self.settings),
-                           ioxml.parameter_to_xml_string(self.h5saver.settings),
-                           ioxml.parameter_to_xml_string(self.scanner.settings)]
-
-            settings_str = b'<All_settings title="All Settings" type="group">'
-            for set in settings_all:
-                if len(settings_str + set) < 60000:
-                    # size limit for any object header (including all the other attributes) is 64kb
-                    settings_str += set
+                attr['type'] = 'scan'
+                params = self.scan_attributes
+            for child in params.child(type_info).children():
+                if type(child.value()) is QDateTime:
+                    attr[child.name()] = child.value().toString('dd/mm/yyyy HH:MM:ss')
                 else:
-                    break
-            settings_str += b'</All_settings>'
-            attr['settings'] = settings_str
+                    attr[child.name()] = child.value()
+            if type_info == 'dataset_info':
+                # save contents of given parameter object into an xml string under the attribute settings
+                settings_str = b'<All_settings title="All Settings" type="group">' + \
+                               ioxml.parameter_to_xml_string(params) + \
+                               ioxml.parameter_to_xml_string(self.settings)
+                               # ioxml.parameter_to_xml_string(
+                               #     self.dashboard.preset_manager.preset_params) +\
+                settings_str += b'</All_settings>'
+                attr['settings'] = settings_str
+
+            elif type_info == 'scan_info':
+                settings_all = [ioxml.parameter_to_xml_string(params),
+                               ioxml.parameter_to_xml_string(self.settings),
+                               ioxml.parameter_to_xml_string(self.h5saver.settings),
+                               ioxml.parameter_to_xml_string(self.scanner.settings)]
+
+                settings_str = b'<All_settings title="All Settings" type="group">'
+                for set in settings_all:
+                    if len(settings_str + set) < 60000:
+                        # size limit for any object header (including all the other attributes) is 64kb
+                        settings_str += set
+                    else:
+                        break
+                settings_str += b'</All_settings>'
+                attr['settings'] = settings_str
 
     def create_new_file(self, new_file):
         if new_file:
@@ -559,11 +599,12 @@ class DAQScan(QObject, ParameterManager):
             self.scanner.settings.child('scan_type').value())
         self.scan_attributes.child('scan_info', 'scan_sub_type').setValue(
             self.scanner.settings.child('scan_sub_type').value())
-        scan_node = self.module_and_data_saver.get_set_node(new=False)
-        if scan_node.attrs['scan_done']:
-            scan_name = self.module_and_data_saver.get_next_node_name()
-        else:
-            scan_name = scan_node.name
+        with self.module_and_data_saver.h5saver.lock:
+            scan_node = self.module_and_data_saver.get_set_node(new=False)
+            if scan_node.attrs['scan_done']:
+                scan_name = self.module_and_data_saver.get_next_node_name()
+            else:
+                scan_name = scan_node.name
         self.scan_attributes.child('scan_info', 'scan_name').setValue(scan_name)
         self.scan_attributes.child('scan_info', 'description').setValue('')
         self.h5saver.settings.child('current_scan_name').setValue(scan_name)
@@ -671,8 +712,12 @@ class DAQScan(QObject, ParameterManager):
             self.modules_manager.reset_signals()
             self.live_timer.stop()
             self.ui.set_scan_done()
-            scan_node = self.module_and_data_saver.get_last_node()
-            scan_node.attrs['scan_done'] = True
+            with self.module_and_data_saver.h5saver.lock:  # data could be written from a BackgroundSaver thread
+                scan_node = self.module_and_data_saver.get_last_node()
+                scan_node.attrs['scan_done'] = True
+                if status.attribute is not None:  # the step timings
+                    for key, value in status.attribute.items():
+                        scan_node.attrs[key] = value
             self.module_and_data_saver.flush()
             self.close_file()
 
@@ -930,8 +975,9 @@ class DAQScan(QObject, ParameterManager):
         """
         self.ui.set_permanent_status('Stoping acquisition')
         self.command_daq_signal.emit(utils.ThreadCommand("stop_acquisition"))
-        scan_node = self.module_and_data_saver.get_last_node()
-        scan_node.attrs['scan_done'] = True
+        with self.module_and_data_saver.h5saver.lock:
+            scan_node = self.module_and_data_saver.get_last_node()
+            scan_node.attrs['scan_done'] = True
 
         if not self.dashboard.overshoot:
             self.set_ini_positions()  # do not set ini position again in case overshoot fired
@@ -996,6 +1042,7 @@ class DAQScanAcquisition(QObject):
         self.det_done_flag = False
 
         self.det_done_datas = data_mod.DataToExport('ScanData')
+        self.step_timings = StepTimings()
 
         scan_shape = self.scanner.get_scan_shape()
         if self.Naverage > 1:
@@ -1048,11 +1095,19 @@ class DAQScanAcquisition(QObject):
                                                      attribute="Acquisition has started"))
 
             self.timeout_scan_flag = False
+            self.step_timings.reset()
+            pipelined = self.scan_settings['scan_options', 'pipelined'] and not self.isadaptive
+            line_mode = self.line_mode()
             for ind_average in range(self.Naverage):
                 self.ind_average = ind_average
+                if line_mode:
+                    self.run_lines(ind_average)
+                    continue
                 self.ind_scan = -1
+                pending_step = None  # (positions, ind_scan, ind_average) of the step whose data are read out
                 while True:
                     self.ind_scan += 1
+                    step_start = time.perf_counter()
                     if not self.isadaptive:
                         if self.ind_scan >= len(self.scanner.positions):
                             break
@@ -1082,12 +1137,38 @@ class DAQScanAcquisition(QObject):
                         break
 
                     #move motors of modules and wait for move completion
-                    positions = self.modules_manager.order_positions(self.modules_manager.move_actuators(positions))
+                    readout = 0.  # time spent on the data of the previous step while the actuators move
+                    if pipelined:  # the data of the previous step are received and saved during the move
+                        if not self.modules_manager.start_move(positions):
+                            self.status_sig.emit(utils.ThreadCommand(
+                                "Update_Status", attribute="Could not move the actuators, stopping the scan"))
+                            break
+                        if pending_step is not None:
+                            readout_start = time.perf_counter()
+                            self.det_done(self.modules_manager.wait_grab(), *pending_step)
+                            readout = time.perf_counter() - readout_start
+                        positions = self.modules_manager.order_positions(self.modules_manager.wait_move())
+                    else:
+                        positions = self.modules_manager.order_positions(
+                            self.modules_manager.move_actuators(positions))
 
+                    wait_start = time.perf_counter()
                     QThread.msleep(self.scan_settings['time_flow', 'wait_time_between'])
+                    waited = time.perf_counter() - wait_start
+
+                    #grab datas and wait for grab completion, or only for the data to be latched if pipelined
+                    if pipelined:
+                        self.modules_manager.start_grab(positions=positions)
+                        self.modules_manager.wait_latched()
+                        grab_latency = time.perf_counter() - wait_start - waited
+                        pending_step = (positions, self.ind_scan, ind_average)
+                    else:
+                        self.det_done(self.modules_manager.grab_datas(positions=positions), positions)
+                        grab_latency = self.modules_manager.grab_latency
 
-                    #grab datas and wait for grab completion
-                    self.det_done(self.modules_manager.grab_datas(positions=positions), positions)
+                    move_latency = max(0., self.modules_manager.move_latency - readout)
+                    self.step_timings.add(move_latency, grab_latency,
+                                          time.perf_counter() - step_start - waited - move_latency - grab_latency)
 
                     if self.isadaptive:
                         #todo update for v4
@@ -1106,26 +1187,133 @@ class DAQScanAcquisition(QObject):
                     # daq_scan wait time
                     QThread.msleep(self.scan_settings.child('time_flow', 'wait_time').value())
 
+                if pending_step is not None:
+                    self.det_done(self.modules_manager.wait_grab(), *pending_step)
+
             self.modules_manager.connect_actuators(False)
             self.modules_manager.connect_detectors(False)
 
             self.status_sig.emit(utils.ThreadCommand("Update_Status",
                                                      attribute="Acquisition has finished"))
-            self.status_sig.emit(utils.ThreadCommand("Scan_done"))
+            self.status_sig.emit(utils.ThreadCommand("Scan_done", self.step_timings.to_attributes()))
 
         except Exception as e:
             logger.exception(str(e))
 
-    def det_done(self, det_done_datas: data_mod.DataToExport, positions):
+    def line_mode(self) -> bool:
+        """Check if the scan can be run line by line: asked in the settings and supported by the selected
+        detectors and by the actuator running the lines (the last one)"""
+        if not self.scan_settings['scan_options', 'buffered']:
+            return False
+        modules = self.modules_manager.detectors + [
+            self.modules_manager.get_mod_from_name(self.scanner.actuators[-1].title, 'act')]
+        if (self.isadaptive or self.scanner.distribution.name != 'uniform' or
+                not all(mod is not None and mod.line_mode_available for mod in modules)):
+            self.status_sig.emit(utils.ThreadCommand(
+                "Update_Status", attribute="Buffered lines are not supported by this scan or by the selected "
+                                           "modules, scanning step by step"))
+            return False
+        return True
+
+    def get_line_length(self, ind_scan: int) -> int:
+        """Get the number of steps from ind_scan that can be run as a line and saved as a block
+
+        Along a line, only the last actuator moves and the last scan index increases or decreases by one at each step
+
+        Parameters
+        ----------
+        ind_scan: int
+
+        Returns
+        -------
+        int: the number of steps of the line, 1 if the step cannot be part of a line
         """
+        line = np.asarray(self.scanner.positions[ind_scan: ind_scan + config('scan', 'line_max_points')])
+        moving = np.flatnonzero(np.any(line[:, :-1] != line[0, :-1], axis=1))
+        max_points = moving[0] if len(moving) > 0 else len(line)
+
+        first = self.scanner.get_indexes_from_scan_index(ind_scan)
+        direction = 0
+        for n_points in range(1, max_points):
+            indexes = self.scanner.get_indexes_from_scan_index(ind_scan + n_points)
+            if n_points == 1:
+                direction = indexes[-1] - first[-1]
+            if (direction not in (-1, 1) or tuple(indexes[:-1]) != tuple(first[:-1]) or
+                    indexes[-1] - first[-1] != n_points * direction):
+                return n_points
+        return max_points
+
+    def run_lines(self, ind_average: int):
+        """Run the scan line by line, the actuators being moved at the start of each line then the last one
+        running it while the detectors buffer their data, see ModulesManager.grab_line"""
+        actuator = self.scanner.actuators[-1].title
+        ind_scan = 0
+        while ind_scan < len(self.scanner.positions):
+            step_start = time.perf_counter()
+            n_points = self.get_line_length(ind_scan)
+            self.ind_scan = ind_scan + n_points - 1
+            self.status_sig.emit(utils.ThreadCommand("Update_scan_index", attribute=[self.ind_scan, ind_average]))
+
+            if self.stop_scan_flag or self.timeout_scan_flag:
+                break
+
+            positions = self.modules_manager.order_positions(
+                self.modules_manager.move_actuators(self.scanner.positions_at(ind_scan)))
+            move_latency = self.modules_manager.move_latency
+
+            wait_start = time.perf_counter()
+            QThread.msleep(self.scan_settings['time_flow', 'wait_time_between'])
+            waited = time.perf_counter() - wait_start
+
+            if n_points > 1:
+                line = np.asarray(self.scanner.positions[ind_scan: ind_scan + n_points])
+                line_positions = DataToExport('line', data=[DataActuator(act.title, data=[line[:, ind]])
+                                                            for ind, act in enumerate(self.scanner.actuators)])
+                det_done_datas = self.modules_manager.grab_line(line_positions, actuator)
+                move_latency += self.modules_manager.move_latency
+            else:
+                det_done_datas = self.modules_manager.grab_datas(positions=positions)
+            self.det_done(det_done_datas, positions, ind_scan, ind_average, n_points)
+
+            grab_latency = self.modules_manager.grab_latency
+            self.step_timings.add(move_latency, grab_latency,
+                                  time.perf_counter() - step_start - waited - move_latency - grab_latency, n_points)
+
+            QThread.msleep(self.scan_settings['time_flow', 'wait_time'])
+            ind_scan += n_points
+
+    def det_done(self, det_done_datas: data_mod.DataToExport, positions, ind_scan: int = None,
+                 ind_average: int = None, n_points: int = 1):
+        """Send the data of a scan step to be saved and plotted
 
+        Parameters
+        ----------
+        det_done_datas: DataToExport
+        positions: DataToExport
+        ind_scan: int
+            the index of the step, default to the current one. In pipelined mode the data of a step are
+            received while the actuators move to the next one
+        ind_average: int
+            the index of the average, default to the current one
+        n_points: int
+            the number of steps of the data if grabbed as a line from ind_scan, see run_lines
         """
+        if ind_scan is None:
+            ind_scan = self.ind_scan
+        if ind_average is None:
+            ind_average = self.ind_average
         try:
-            indexes = self.scanner.get_indexes_from_scan_index(self.ind_scan)
+            indexes = list(self.scanner.get_indexes_from_scan_index(ind_scan))
+            if n_points > 1:  # the data are blocks spanning the line
+                last = self.scanner.get_indexes_from_scan_index(ind_scan + n_points - 1)[-1]
+                if last > indexes[-1]:
+                    indexes[-1] = slice(indexes[-1], last + 1)
+                else:
+                    indexes[-1] = slice(indexes[-1], last - 1 if last > 0 else None, -1)
             if self.Naverage > 1:
-                indexes = [self.ind_average] + list(indexes)
+                indexes = [ind_average] + list(indexes)
             indexes = tuple(indexes)
-            if self.ind_scan == 0:
+            if ind_scan == 0:
                 nav_axes = self.scanner.get_nav_axes()
                 if self.Naverage > 1:
                     for nav_axis in nav_axes:
@@ -1148,9 +1336,13 @@ class DAQScanAcquisition(QObject):
             full_names: list = self.scan_settings['plot_options', 'plot_0d']['selected'][:]
             full_names.extend(self.scan_settings['plot_options', 'plot_1d']['selected'][:])
             data_temp = det_done_datas.get_data_from_full_names(full_names, deepcopy=False)
-            data_temp = data_temp.get_data_with_naxes_lower_than(2-len(indexes))  # maximum Data2D included nav indexes
+            if n_points > 1:
+                data_temp = data_mod.DataToExport(data_temp.name, data=[
+                    dwa for dwa in data_temp if len(dwa.sig_indexes) <= 2 - len(indexes)])
+            else:
+                data_temp = data_temp.get_data_with_naxes_lower_than(2-len(indexes))  # maximum Data2D included nav indexes
 
-            self.scan_data_tmp.emit(ScanDataTemp(self.ind_scan, indexes, data_temp))
+            self.scan_data_tmp.emit(ScanDataTemp(ind_scan, indexes, data_temp))
 
         except Exception as e:
             logger.exception(str(e))
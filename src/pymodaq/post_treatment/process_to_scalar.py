@@ -6,7 +6,7 @@ Created the 04/11/2022
 """
 import numpy as np
 from numbers import Number
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 from abc import ABCMeta, abstractmethod, abstractproperty
 
 from pymodaq.utils.factory import ObjectFactory
@@ -233,6 +233,164 @@ class ArgStdProcessor(DataProcessorBase):
                               axes=[axis for axis in sub_data.axes if axis.index in sub_data.nav_indexes])
 
 
+class SignalSummedArea:
+    """Summed-area table of the arrays of a DataWithAxes along its signal axes (one or two)
+
+    The cumulative sums are computed once (O(data size)), then the sum or the mean of the signal
+    over any (rectangular) region is obtained for all the navigation points in O(nav size), as the
+    'sum' and 'mean' processors would have computed it.
+
+    The non finite values (NaN, inf) are counted in separate tables instead of being summed, the sum
+    over a region containing some of them being then computed directly from the data.
+
+    Use the compute class method to build it.
+
+    Parameters
+    ----------
+    data: DataWithAxes
+        with one or two signal axes and at least one navigation axis
+    tables: list of ndarray
+        the summed-area table of each array of data, signal axes moved last and padded with a
+        leading zero
+    nonfinite_tables: list of ndarray or None
+        the summed-area table of the non finite values count of each array of data, None if there is none
+    """
+
+    def __init__(self, data: DataWithAxes, tables: List[np.ndarray],
+                 nonfinite_tables: List[Optional[np.ndarray]] = None):
+        self._data = data
+        self._tables = tables
+        self._nonfinite_tables = nonfinite_tables if nonfinite_tables is not None else [None for _ in tables]
+        self._sig_shape = tuple(data.shape[ind] for ind in data.sig_indexes)
+
+    @staticmethod
+    def is_applicable(data: DataWithAxes) -> bool:
+        return len(data.sig_indexes) in (1, 2) and len(data.nav_indexes) != 0
+
+    @staticmethod
+    def table_dtype(dtype) -> np.dtype:
+        """The dtype of the summed-area table of an array: float32 (complex64) for single precision
+        floating point data, float64 (complex128) otherwise"""
+        if np.issubdtype(dtype, np.inexact):
+            return np.result_type(dtype, np.float32)
+        return np.dtype(np.float64)
+
+    @classmethod
+    def nbytes(cls, data: DataWithAxes) -> int:
+        """The memory needed by the summed-area tables of data, not counting the tables of the non finite
+        values of the arrays having some"""
+        size = int(np.prod([size + 1 if ind in data.sig_indexes else size for ind, size in enumerate(data.shape)]))
+        return sum(size * cls.table_dtype(array.dtype).itemsize for array in data)
+
+    @classmethod
+    def compute(cls, data: DataWithAxes, is_cancelled: Callable[[], bool] = None,
+                chunk_nbytes: int = 2**24) -> Optional['SignalSummedArea']:
+        """Compute the summed-area tables, chunk by chunk along the first navigation axis
+
+        Parameters
+        ----------
+        data: DataWithAxes
+        is_cancelled: Callable
+            called between chunks, the computation is stopped if it returns True
+        chunk_nbytes: int
+            approximate size of the chunks
+
+        Returns
+        -------
+        SignalSummedArea: None if cancelled
+        """
+        if not cls.is_applicable(data):
+            raise ValueError(f'Cannot compute the summed area of {data}')
+        n_sig = len(data.sig_indexes)
+        first_nav = min(data.nav_indexes)  # chunks are read along it, so that lazy data are streamed
+        nav_shape = tuple(size for ind, size in enumerate(data.shape) if ind not in data.sig_indexes)
+        sig_shape = tuple(data.shape[ind] for ind in data.sig_indexes)
+        tables = []
+        nonfinite_tables = []
+        for array in data:
+            table = np.zeros(nav_shape + tuple(size + 1 for size in sig_shape), dtype=cls.table_dtype(array.dtype))
+            nonfinite_table = None
+            chunk = max(1, int(chunk_nbytes / max(1, table[0].size * table.itemsize)))
+            for ind in range(0, data.shape[first_nav], chunk):
+                if is_cancelled is not None and is_cancelled():
+                    return None
+                chunk_slices = tuple(slice(ind, ind + chunk) if index == first_nav else slice(None)
+                                     for index in range(len(data.shape)))
+                values = np.moveaxis(array[chunk_slices], data.sig_indexes, range(-n_sig, 0))
+                if np.issubdtype(array.dtype, np.inexact):
+                    nonfinite = ~np.isfinite(values)
+                    if nonfinite.any():
+                        if nonfinite_table is None:
+                            nonfinite_table = np.zeros(table.shape, dtype=np.int32 if np.prod(sig_shape) < 2**31
+                                                       else np.int64)
+                        cls._set_cumsum(nonfinite_table, nonfinite, ind, chunk, n_sig)
+                        values = np.where(nonfinite, 0, values)
+                cls._set_cumsum(table, values, ind, chunk, n_sig)
+            tables.append(table)
+            nonfinite_tables.append(nonfinite_table)
+        return cls(data, tables, nonfinite_tables)
+
+    @staticmethod
+    def _set_cumsum(table: np.ndarray, values: np.ndarray, ind: int, chunk: int, n_sig: int):
+        """Store the cumulative sums of a chunk of values (signal axes last) into the table"""
+        cumsum = np.cumsum(values, axis=-1, dtype=table.dtype)
+        if n_sig == 2:
+            np.cumsum(cumsum, axis=-2, out=cumsum)
+            table[ind:ind + chunk, ..., 1:, 1:] = cumsum
+        else:
+            table[ind:ind + chunk, ..., 1:] = cumsum
+
+    def _get_bounds(self, limits: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Get the (start, stop) of each signal axis as a python slice would have"""
+        bounds = []
+        for (start, stop), size in zip(limits, self._sig_shape):
+            start, stop, _ = slice(start, stop).indices(size)
+            bounds.append((start, max(start, stop)))
+        return bounds
+
+    @staticmethod
+    def _region_sum(table: np.ndarray, bounds: List[Tuple[int, int]]) -> np.ndarray:
+        if len(bounds) == 1:
+            (x0, x1), = bounds
+            return table[..., x1] - table[..., x0]
+        else:
+            (y0, y1), (x0, x1) = bounds
+            return table[..., y1, x1] - table[..., y0, x1] - table[..., y1, x0] + table[..., y0, x0]
+
+    def _sum_arrays(self, bounds: List[Tuple[int, int]]) -> List[np.ndarray]:
+        arrays = []
+        for array, table, nonfinite_table in zip(self._data, self._tables, self._nonfinite_tables):
+            if nonfinite_table is not None and np.any(self._region_sum(nonfinite_table, bounds)):
+                slices = [slice(None) for _ in self._data.shape]
+                for sig_index, (start, stop) in zip(self._data.sig_indexes, bounds):
+                    slices[sig_index] = slice(start, stop)
+                arrays.append(np.sum(np.asarray(array[tuple(slices)]), axis=tuple(self._data.sig_indexes),
+                                     dtype=table.dtype))
+            else:
+                arrays.append(self._region_sum(table, bounds))
+        return arrays
+
+    def sum(self, limits: List[Tuple[int, int]]) -> DataWithAxes:
+        """Sum the signal within the limits for all the navigation points
+
+        Parameters
+        ----------
+        limits: list of tuple of int
+            the start and stop indexes along each signal axis (same meaning as in data.isig[start:stop])
+        """
+        arrays = self._sum_arrays(self._get_bounds(limits))
+        return self._data.deepcopy_with_new_data([np.atleast_1d(array) for array in arrays],
+                                                 self._data.sig_indexes)
+
+    def mean(self, limits: List[Tuple[int, int]]) -> DataWithAxes:
+        """Average the signal within the limits for all the navigation points, see sum"""
+        bounds = self._get_bounds(limits)
+        count = np.prod([stop - start for start, stop in bounds])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            arrays = [np.atleast_1d(array / count) for array in self._sum_arrays(bounds)]
+        return self._data.deepcopy_with_new_data(arrays, self._data.sig_indexes)
+
+
 if __name__ == '__main__':
     import copy
     processors = DataProcessorFactory()
@@ -81,6 +81,149 @@ else:
         warnings.filterwarnings('ignore', category=warning)
 
 
+class LazyArray(np.lib.mixins.NDArrayOperatorsMixin, metaclass=ABCMeta):
+    """Read-only array-like object standing for a numpy array whose values are not in memory
+
+    It can be stored in a DataBase in place of a numpy array: indexing it reads only the requested
+    part of the values, the mean, sum, min and max reductions (np.mean(lazy_array, axis=...)) are
+    streamed by slabs along the first axis and any other numpy function or operator reads the
+    whole array first.
+
+    Subclasses have to implement the shape and dtype properties and the _read method.
+
+    Attributes
+    ----------
+    chunk_nbytes: int
+        the approximate size of the slabs read when streaming a reduction
+    """
+    chunk_nbytes = 2**26
+
+    @property
+    @abstractmethod
+    def shape(self) -> Tuple[int]:
+        ...
+
+    @property
+    @abstractmethod
+    def dtype(self) -> np.dtype:
+        ...
+
+    @abstractmethod
+    def _read(self, item: Tuple[Union[int, slice]]) -> np.ndarray:
+        """Read the values at item: a tuple of ints and slices with positive steps, one per axis"""
+        ...
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.dtype.itemsize
+
+    @property
+    def T(self) -> np.ndarray:
+        return np.asarray(self).T
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(shape={self.shape}, dtype={self.dtype})'
+
+    def __deepcopy__(self, memo):
+        return self  # read-only so that it can be shared
+
+    def copy(self) -> np.ndarray:
+        """Read the values in a new numpy array"""
+        return np.asarray(self)
+
+    def __getitem__(self, item) -> np.ndarray:
+        if not isinstance(item, tuple):
+            item = (item,)
+        if any(not (isinstance(ind, (numbers.Integral, slice)) or ind is Ellipsis) for ind in item):
+            return self._read((slice(None),) * self.ndim)[item]  # fancy indexing
+        if Ellipsis in item:
+            ind_ellipsis = item.index(Ellipsis)
+            item = (item[:ind_ellipsis] + (slice(None),) * (self.ndim - len(item) + 1) +
+                    item[ind_ellipsis + 1:])
+        item = item + (slice(None),) * (self.ndim - len(item))
+        if len(item) > self.ndim:
+            raise IndexError(f'too many indices for a {self.ndim}-dimensional array')
+
+        read_item = []
+        reverse = []
+        for ind, size in zip(item, self.shape):
+            if isinstance(ind, slice):
+                indexes = range(*ind.indices(size))
+                if len(indexes) == 0:
+                    read_item.append(slice(0, 0))
+                elif indexes.step < 0:
+                    read_item.append(slice(indexes[-1], indexes[0] + 1, -indexes.step))
+                else:
+                    read_item.append(slice(indexes.start, indexes.stop, indexes.step))
+                reverse.append(slice(None, None, -1) if indexes.step < 0 else slice(None))
+            else:
+                if not -size <= ind < size:
+                    raise IndexError(f'index {ind} is out of bounds for axis with size {size}')
+                read_item.append(int(ind) % size)
+        array = np.asarray(self._read(tuple(read_item)))
+        return array[tuple(reverse)]
+
+    def __array__(self, dtype=None, copy=None):
+        array = self[...]
+        return array if dtype is None else array.astype(dtype, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = [np.asarray(value) if isinstance(value, LazyArray) else value for value in inputs]
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func in (np.mean, np.sum, np.amin, np.amax, np.min, np.max) and len(args) == 1 and \
+                args[0] is self and set(kwargs.keys()) <= {'axis'} and self.shape[0] != 0:
+            return self._reduce(func, kwargs.get('axis', None))
+
+        def read(value):
+            if isinstance(value, LazyArray):
+                return np.asarray(value)
+            elif isinstance(value, (list, tuple)):
+                return type(value)(read(val) for val in value)
+            return value
+        return func(*read(args), **{key: read(val) for key, val in kwargs.items()})
+
+    def _reduce(self, func: Callable, axis: Union[int, Tuple[int]] = None):
+        """Apply the reduction func slab by slab along the first axis"""
+        if axis is None:
+            axes = tuple(range(self.ndim))
+        else:
+            axes = tuple(ind % self.ndim for ind in np.atleast_1d(axis))
+        step = max(1, int(self.chunk_nbytes / max(1, self.nbytes // self.shape[0])))
+        slabs = (self[ind:ind + step] for ind in range(0, self.shape[0], step))
+
+        if 0 not in axes:
+            return np.concatenate([func(slab, axis=axes) for slab in slabs])
+
+        if func is np.mean:
+            mean_dtype = np.mean(np.zeros((1,), dtype=self.dtype)).dtype
+            sum_dtype = np.result_type(mean_dtype, np.float64)
+            reduce_slab, combine = lambda slab: np.sum(slab, axis=axes, dtype=sum_dtype), np.add
+        elif func is np.sum:
+            reduce_slab, combine = lambda slab: np.sum(slab, axis=axes), np.add
+        else:
+            reduce_slab = lambda slab: func(slab, axis=axes)
+            combine = np.minimum if func in (np.amin, np.min) else np.maximum
+        total = None
+        for slab in slabs:
+            total = reduce_slab(slab) if total is None else combine(total, reduce_slab(slab))
+        if func is np.mean:
+            total = np.asarray(total / np.prod([self.shape[ind] for ind in axes])).astype(mean_dtype)
+        return np.asarray(total)[()]
+
+
 class DataShapeError(Exception):
     pass
 
@@ -682,8 +825,7 @@ class DataBase(DataLowLevel):
             self._units = units
             return self
         else:
-            new_data = copy.deepcopy(self)
-            new_data.data = arrays
+            new_data = self._deepcopy_with_arrays(arrays)
             new_data._units = units
             return new_data
 
@@ -743,17 +885,17 @@ class DataBase(DataLowLevel):
 
     def __add__(self, other: object):
         if isinstance(other, DataBase) and len(other) == len(self):
-            new_data = copy.deepcopy(self)
-            for ind_array in range(len(new_data)):
+            arrays = []
+            for ind_array in range(len(self)):
                 if self[ind_array].shape != other[ind_array].shape:
                     raise ValueError('The shapes of arrays stored into the data are not consistent')
                 try:
-                    new_data[ind_array] = (Q_(self[ind_array], self.units) +
-                                           Q_(other[ind_array], other.units)).m_as(self.units)
+                    arrays.append((Q_(self[ind_array], self.units) +
+                                   Q_(other[ind_array], other.units)).m_as(self.units))
                 except pint.errors.DimensionalityError as e:
                     raise DataUnitError(
                         f'Cannot sum Data objects not having the same dimension: {e}')
-            return new_data
+            return self._deepcopy_with_arrays(arrays)
         elif isinstance(other, numbers.Number) and self.length == 1 and self.size == 1:
             new_data = copy.deepcopy(self)
             new_data = new_data + DataActuator(data=other)
@@ -781,18 +923,13 @@ class DataBase(DataLowLevel):
     def __mul__(self, other):
         if (isinstance(other, numbers.Number) or
                 (isinstance(other, np.ndarray) and other.shape == self._shape)):
-            new_data = copy.deepcopy(self)
-            for ind_array in range(len(new_data)):
-                new_data[ind_array] = self[ind_array] * other
-            return new_data
+            return self._deepcopy_with_arrays([array * other for array in self.data])
         elif isinstance(other, DataBase) and other.shape == self._shape:
-            new_data = copy.deepcopy(self)
             new_unit = str((Q_(self[0], self.units) *
                            Q_(other[0], other.units)).to_base_units().units)
-            for ind_array in range(len(new_data)):
-                new_data[ind_array] = \
-                    ((Q_(self[ind_array], self.units) * Q_(other[ind_array], other.units))
-                     .to_base_units()).magnitude
+            new_data = self._deepcopy_with_arrays(
+                [((Q_(self[ind_array], self.units) * Q_(other[ind_array], other.units))
+                  .to_base_units()).magnitude for ind_array in range(len(self))])
             new_data._units = new_unit
             return new_data
         else:
@@ -806,6 +943,50 @@ class DataBase(DataLowLevel):
             raise TypeError(f'Could not divide a {other.__class__.__name__} and a {self.__class__.__name__} '
                             f'of a different length')
 
+    def __iadd__(self, other):
+        return self._operate_in_place(other, '__iadd__')
+
+    def __isub__(self, other):
+        return self._operate_in_place(other, '__isub__')
+
+    def __imul__(self, other):
+        return self._operate_in_place(other, '__imul__')
+
+    def __itruediv__(self, other):
+        return self._operate_in_place(other, '__itruediv__')
+
+    def _operate_in_place(self, other, operator: str):
+        """Apply an in place ndarray operator (for instance '__iadd__') to the arrays
+
+        The read-only arrays, for instance from a view, are first replaced by writable copies (copy-on-write).
+        Returns NotImplemented, so that the operator falls back to the one creating a new object, if the result
+        would not fit into the arrays (different dtype, shape or units) or if the operand is not supported
+        """
+        if isinstance(other, DataBase) and operator in ('__iadd__', '__isub__'):
+            if len(other) != len(self):
+                return NotImplemented
+            try:
+                operands = [Q_(array, other.units).m_as(self.units) for array in other.data]
+            except pint.errors.DimensionalityError:
+                return NotImplemented
+        elif isinstance(other, numbers.Number) and operator in ('__imul__', '__itruediv__'):
+            operands = [other for _ in range(len(self))]
+        elif (isinstance(other, np.ndarray) and other.shape == self._shape and
+              operator in ('__imul__', '__itruediv__')):
+            operands = [other for _ in range(len(self))]
+        else:
+            return NotImplemented
+        if self.is_lazy or any(np.shape(operand) not in ((), array.shape) or
+                               np.result_type(array, operand) != array.dtype or
+                               (operator == '__isub__' and array.dtype.kind == 'u') or  # would wrap around
+                               (operator == '__itruediv__' and array.dtype.kind not in 'fc')
+                               for array, operand in zip(self.data, operands)):
+            return NotImplemented
+        self.make_writable()
+        for array, operand in zip(self.data, operands):
+            getattr(array, operator)(operand)
+        return self
+
     def _comparison_common(self, other, operator='__eq__'):
         if isinstance(other, DataBase):
             if not (self.name == other.name and
@@ -848,6 +1029,62 @@ class DataBase(DataLowLevel):
     def deepcopy(self):
         return copy.deepcopy(self)
 
+    def _deepcopy_with_arrays(self, arrays: List[np.ndarray]) -> 'DataBase':
+        """Deepcopy everything but the arrays, replaced by the given ones (of the same shape)"""
+        return copy.deepcopy(self, {id(self._data): arrays})
+
+    def view(self) -> 'DataBase':
+        """Get a new data object whose arrays are read-only views of the arrays of this one
+
+        All the other attributes are deep copied. No array is copied until :meth:`make_writable` is
+        called on the view, before modifying its arrays in place (copy-on-write)
+
+        See Also
+        --------
+        make_writable, read_only
+        """
+        arrays = []
+        for array in self.data:
+            if isinstance(array, np.ndarray):  # LazyArray are read-only
+                array = array.view()
+                array.flags.writeable = False
+            arrays.append(array)
+        return self._deepcopy_with_arrays(arrays)
+
+    @property
+    def read_only(self) -> bool:
+        """bool: True if some of the arrays cannot be modified in place, for instance if they come from a view"""
+        return not all(isinstance(array, np.ndarray) and array.flags.writeable for array in self.data)
+
+    @property
+    def is_lazy(self) -> bool:
+        """bool: True if some of the arrays are LazyArray, whose values are read only when needed"""
+        return any(isinstance(array, LazyArray) for array in self.data)
+
+    def to_memory(self) -> 'DataBase':
+        """Get a data object whose LazyArray arrays have been read into numpy arrays
+
+        Returns
+        -------
+        DataBase: self if not lazy else a new object
+        """
+        if not self.is_lazy:
+            return self
+        return self._deepcopy_with_arrays([np.asarray(array) for array in self.data])
+
+    def make_writable(self) -> 'DataBase':
+        """Replace the read-only arrays by writable copies, the other ones being kept as is
+
+        Called by the in place operators (+=, -=, *=, /=) before modifying the arrays
+
+        Returns
+        -------
+        DataBase: self
+        """
+        self._data = [array if isinstance(array, np.ndarray) and array.flags.writeable else np.array(array)
+                      for array in self.data]
+        return self
+
     def average(self, other: 'DataBase', weight: int) -> 'DataBase':
         """ Compute the weighted average between self and other DataBase
 
@@ -913,8 +1150,8 @@ class DataBase(DataLowLevel):
 
     def pop(self, index: int) -> DataBase:
         """ Returns a copy of self but with data taken at the specified index"""
-        dwa = self.deepcopy()
-        dwa.data = [dwa.data[index]]
+        dwa = self._deepcopy_with_arrays(self.data[:])
+        dwa.data = [self.data[index].copy()]
         dwa.labels = [dwa.labels[index]]
         return dwa
 
@@ -1009,7 +1246,7 @@ class DataBase(DataLowLevel):
             is_valid = False
         if not isinstance(data, list):
             # try to transform the data to regular type
-            if isinstance(data, np.ndarray):
+            if isinstance(data, (np.ndarray, LazyArray)):
                 warnings.warn(DataTypeWarning(f'Your data should be a list of numpy arrays not just a single numpy'
                                               f' array, wrapping them with a list'))
                 data = [data]
@@ -1022,7 +1259,7 @@ class DataBase(DataLowLevel):
         if isinstance(data, list):
             if len(data) == 0:
                 is_valid = False
-            elif not isinstance(data[0], np.ndarray):
+            elif not isinstance(data[0], (np.ndarray, LazyArray)):
                 is_valid = False
             elif len(data[0].shape) == 0:
                 is_valid = False
@@ -1110,9 +1347,7 @@ class DataBase(DataLowLevel):
 
         new in 4.3.0
         """
-        new_data = copy.deepcopy(self)
-        for ind_array in range(len(new_data)):
-            new_data[ind_array] = 10 * np.log10(self[ind_array] / self[ind_array].max())
+        new_data = self._deepcopy_with_arrays([10 * np.log10(array / array.max()) for array in self.data])
         new_data._units = 'dB'
         return new_data
 
@@ -1707,13 +1942,20 @@ class DataWithAxes(DataBase):
 
         self.set_axes_manager(self.shape, axes=axes, nav_indexes=nav_indexes, **other_kwargs)
 
-        self.inav: Iterable[DataWithAxes] = SpecialSlicersData(self, True)
-        self.isig: Iterable[DataWithAxes] = SpecialSlicersData(self, False)
-
         self.get_dim_from_data_axes()  # in DataBase, dim is processed from the shape of data, but if axes are provided
         #then use get_dim_from axes
         self._check_errors(errors)
 
+    @property
+    def inav(self) -> Iterable[DataWithAxes]:
+        """Slicer of the navigation axes"""
+        return SpecialSlicersData(self, True)  # not stored to keep the object out of reference cycles
+
+    @property
+    def isig(self) -> Iterable[DataWithAxes]:
+        """Slicer of the signal axes"""
+        return SpecialSlicersData(self, False)
+
     def _check_errors(self, errors: Iterable[np.ndarray]):
         """ Make sure the errors object is adapted to the len/shape of the dwa object
 
@@ -1724,7 +1966,7 @@ class DataWithAxes(DataBase):
             self._errors = None
             return
         if isinstance(errors, (tuple, list)) and len(errors) == len(self):
-            if np.all([isinstance(error, np.ndarray) for error in errors]):
+            if np.all([isinstance(error, (np.ndarray, LazyArray)) for error in errors]):
                 if np.all([error_array.shape == self.shape for error_array in errors]):
                     check = True
                 else:
@@ -1761,6 +2003,12 @@ class DataWithAxes(DataBase):
         else:
             return np.array([0])  # this could be added to any numpy array of any shape
 
+    def to_memory(self) -> DataWithAxes:
+        data = super().to_memory()
+        if data is not self and data.errors is not None:
+            data.errors = [np.asarray(error) for error in data.errors]
+        return data
+
     def errors_as_dwa(self):
         """ Get a dwa from self replacing the data content with the error attribute (if not None)
 
@@ -2213,10 +2461,11 @@ class DataWithAxes(DataBase):
     def check_squeeze(self, total_slices: List[slice], is_navigation: bool):
 
         do_squeeze = True
-        if 1 in self.data[0][total_slices].shape:
-            if not is_navigation and self.data[0][total_slices].shape.index(1) in self.nav_indexes:
+        shape = np.broadcast_to(np.empty((), dtype=bool), self.shape)[total_slices].shape  # without reading data
+        if 1 in shape:
+            if not is_navigation and shape.index(1) in self.nav_indexes:
                 do_squeeze = False
-            elif is_navigation and self.data[0][total_slices].shape.index(1) in self.sig_indexes:
+            elif is_navigation and shape.index(1) in self.sig_indexes:
                 do_squeeze = False
         return do_squeeze
 
@@ -2572,30 +2821,21 @@ class DataToExport(DataLowLevel):
 
     def __sub__(self, other: object):
         if isinstance(other, DataToExport) and len(other) == len(self):
-            new_data = copy.deepcopy(self)
-            for ind_dfp in range(len(self)):
-                new_data[ind_dfp] = self[ind_dfp] - other[ind_dfp]
-            return new_data
+            return self._deepcopy_with_data([self[ind_dfp] - other[ind_dfp] for ind_dfp in range(len(self))])
         else:
             raise TypeError(f'Could not substract a {other.__class__.__name__} or a {self.__class__.__name__} '
                             f'of a different length')
 
     def __add__(self, other: object):
         if isinstance(other, DataToExport) and len(other) == len(self):
-            new_data = copy.deepcopy(self)
-            for ind_dfp in range(len(self)):
-                new_data[ind_dfp] = self[ind_dfp] + other[ind_dfp]
-            return new_data
+            return self._deepcopy_with_data([self[ind_dfp] + other[ind_dfp] for ind_dfp in range(len(self))])
         else:
             raise TypeError(f'Could not add a {other.__class__.__name__} or a {self.__class__.__name__} '
                             f'of a different length')
 
     def __mul__(self, other: object):
         if isinstance(other, numbers.Number):
-            new_data = copy.deepcopy(self)
-            for ind_dfp in range(len(self)):
-                new_data[ind_dfp] = self[ind_dfp] * other
-            return new_data
+            return self._deepcopy_with_data([dwa * other for dwa in self])
         else:
             raise TypeError(f'Could not multiply a {other.__class__.__name__} with a {self.__class__.__name__} '
                             f'of a different length')
@@ -2607,6 +2847,38 @@ class DataToExport(DataLowLevel):
             raise TypeError(f'Could not divide a {other.__class__.__name__} with a {self.__class__.__name__} '
                             f'of a different length')
 
+    def __iadd__(self, other: object):
+        if isinstance(other, DataToExport) and len(other) == len(self):
+            return self._operate_in_place([other[ind_dfp] for ind_dfp in range(len(self))], '__iadd__')
+        return NotImplemented
+
+    def __isub__(self, other: object):
+        if isinstance(other, DataToExport) and len(other) == len(self):
+            return self._operate_in_place([other[ind_dfp] for ind_dfp in range(len(self))], '__isub__')
+        return NotImplemented
+
+    def __imul__(self, other: object):
+        if isinstance(other, numbers.Number):
+            return self._operate_in_place([other for _ in range(len(self))], '__imul__')
+        return NotImplemented
+
+    def __itruediv__(self, other: object):
+        if isinstance(other, numbers.Number):
+            return self._operate_in_place([other for _ in range(len(self))], '__itruediv__')
+        return NotImplemented
+
+    def _operate_in_place(self, operands: list, operator: str) -> DataToExport:
+        """Apply the in place operator of each DataWithAxes with its operand, see DataBase._operate_in_place
+
+        The DataWithAxes that cannot be modified in place are replaced by new ones"""
+        for ind_dfp, operand in enumerate(operands):
+            dwa = self._data[ind_dfp]
+            result = getattr(dwa, operator)(operand)
+            if result is NotImplemented:
+                result = getattr(dwa, operator.replace('__i', '__'))(operand)
+            self._data[ind_dfp] = result
+        return self
+
     def average(self, other: DataToExport, weight: int) -> DataToExport:
         """ Compute the weighted average between self and other DataToExport and attributes it to self
 
@@ -2965,19 +3237,40 @@ class DataToExport(DataLowLevel):
     def deepcopy(self):
         return DataToExport('Copy', data=[data.deepcopy() for data in self])
 
+    def _deepcopy_with_data(self, data: List[DataWithAxes]) -> DataToExport:
+        """Deepcopy everything but the list of DataWithAxes, replaced by the given one"""
+        return copy.deepcopy(self, {id(self._data): data})
+
+    def view(self) -> DataToExport:
+        """Get a new DataToExport holding views of the DataWithAxes of this one
+
+        See Also
+        --------
+        DataBase.view
+        """
+        return self._deepcopy_with_data([dwa.view() for dwa in self])
+
     @dispatch(list)
-    def append(self, data_list: List[DataWithAxes]):
+    def append(self, data_list: List[DataWithAxes], copy=True):
         for dwa in data_list:
-            self.append(dwa)
+            self.append(dwa, copy=copy)
 
     @dispatch(DataWithAxes)
-    def append(self, dwa: DataWithAxes):
+    def append(self, dwa: DataWithAxes, copy=True):
         """Append/replace DataWithAxes object to the data attribute
 
         Make sure only one DataWithAxes object with a given name is in the list except if they don't have the same
         origin identifier
+
+        Parameters
+        ----------
+        dwa: DataWithAxes
+        copy: bool
+            If True (default) a deepcopy of dwa is appended, else dwa itself (its owner should then not modify it
+            anymore)
         """
-        dwa = dwa.deepcopy()
+        if copy:
+            dwa = dwa.deepcopy()
         self._check_data_type(dwa)
         obj = self.get_data_from_name_origin(dwa.name, dwa.origin)
         if obj is not None:
@@ -2985,9 +3278,116 @@ class DataToExport(DataLowLevel):
         self._data.append(dwa)
 
     @dispatch(object)
-    def append(self, dte: DataToExport):
+    def append(self, dte: DataToExport, copy=True):
         if isinstance(dte, DataToExport):
-            self.append(dte.data)
+            self.append(dte.data, copy=copy)
+
+
+class DataAverager:
+    """Running average of successive DataToExport having the same structure
+
+    The arrays are accumulated in place into float64 (complex128 for complex data) buffers allocated once
+    for all, so that adding a frame costs one addition per element (plus a few in place operations per
+    element if the errors are computed) and no allocation (but for the errors of complex data). The
+    buffers are zeroed when restarting the average and reallocated only if the structure or the dtypes
+    of the added data change (the running average being then restarted).
+
+    Parameters
+    ----------
+    with_errors: bool
+        If True the standard deviation of the averaged arrays (Welford's algorithm) is computed and
+        set as the errors of the averaged DataWithAxes
+
+    See Also
+    --------
+    DataToExport.average
+    """
+
+    def __init__(self, with_errors: bool = False):
+        self.with_errors = with_errors
+        self._sums: List[List[np.ndarray]] = []
+        self._m2s: List[List[np.ndarray]] = []
+        self._deltas: List[List[np.ndarray]] = []
+        self.reset()
+
+    def reset(self):
+        """Forget all the accumulated data, the buffers being kept for the next average"""
+        self._count = 0
+        self._last: DataToExport = None
+
+    @property
+    def count(self) -> int:
+        """int: the number of averaged DataToExport"""
+        return self._count
+
+    def _is_compatible(self, dte: DataToExport) -> bool:
+        return (len(dte) == len(self._sums) and (not self.with_errors or len(self._m2s) == len(self._sums)) and
+                all(len(dwa) == len(sums) and dwa.shape == sums[0].shape and
+                    all(buffer.dtype == self._buffer_dtype(array) for array, buffer in zip(dwa, sums))
+                    for dwa, sums in zip(dte, self._sums)))
+
+    @staticmethod
+    def _buffer_dtype(array: np.ndarray) -> np.dtype:
+        """float64, or complex128 for complex data"""
+        return np.result_type(array.dtype, np.float64)
+
+    def _clear(self):
+        self._count = 0
+        for buffers in (self._sums, self._m2s if self.with_errors else []):
+            for arrays in buffers:
+                for array in arrays:
+                    array.fill(0.)
+
+    def _allocate(self, dte: DataToExport):
+        self._count = 0
+        self._sums = [[np.zeros(array.shape, dtype=self._buffer_dtype(array)) for array in dwa] for dwa in dte]
+        if self.with_errors:
+            self._m2s = [[np.zeros(array.shape) for array in dwa] for dwa in dte]
+            self._deltas = [[np.zeros(array.shape, dtype=self._buffer_dtype(array)) for array in dwa]
+                            for dwa in dte]
+
+    def add(self, dte: DataToExport):
+        """Accumulate the arrays of a new DataToExport"""
+        if not self._is_compatible(dte):
+            self._allocate(dte)
+        elif self._count == 0:
+            self._clear()
+        self._count += 1
+        for ind_dwa, dwa in enumerate(dte):
+            for ind_array, array in enumerate(dwa):
+                sums = self._sums[ind_dwa][ind_array]
+                if self.with_errors and self._count > 1:
+                    # Welford: M2 += (x - mean_n-1)**2 * (n-1) / n, mean_n-1 being sum / (n-1)
+                    delta = self._deltas[ind_dwa][ind_array]
+                    np.multiply(sums, 1 / (self._count - 1), out=delta)
+                    np.subtract(array, delta, out=delta)
+                    if np.iscomplexobj(delta):  # |x - mean_n-1|**2, as np.std of complex data
+                        delta = np.abs(delta)
+                    np.square(delta, out=delta)
+                    np.multiply(delta, (self._count - 1) / self._count, out=delta)
+                    np.add(self._m2s[ind_dwa][ind_array], delta, out=self._m2s[ind_dwa][ind_array])
+                np.add(sums, array, out=sums)
+        self._last = dte
+
+    def average(self) -> DataToExport:
+        """Get the averaged data as a new DataToExport
+
+        All but the arrays are copied from the last added DataToExport. If with_errors is True, the
+        errors of the DataWithAxes are the standard deviations of the averaged arrays
+
+        Returns
+        -------
+        DataToExport: None if no data has been added
+        """
+        if self._count == 0:
+            return None
+        data = []
+        for ind_dwa, dwa in enumerate(self._last):
+            dwa = dwa._deepcopy_with_arrays([sums / self._count for sums in self._sums[ind_dwa]])
+            if self.with_errors:
+                dwa.errors = [np.sqrt(m2 / max(self._count - 1, 1)) for m2 in self._m2s[ind_dwa]]
+            data.append(dwa)
+        return self._last._deepcopy_with_data(data)
 
 
 class DataScan(DataToExport):
@@ -7,7 +7,10 @@ Created the 15/11/2022
 import numpy as np
 import importlib
 import pickle
-from typing import Dict
+from threading import RLock, get_ident
+import time
+from typing import Dict, List, Tuple, Union
+import zlib
 
 from pymodaq.utils.logger import set_logger, get_module_name
 from pymodaq.utils.config import Config
@@ -48,6 +51,13 @@ except Exception as e:                              # pragma: no cover
     logger.warning(str(e))
     is_h5pyd = False
 
+is_hdf5plugin = True
+# provides the blosc and blosc2 filters to h5py
+try:
+    import hdf5plugin
+except Exception:                                   # pragma: no cover
+    is_hdf5plugin = False
+
 if not (is_tables or is_h5py or is_h5pyd):
     logger.exception('No valid hdf5 backend has been installed, please install either pytables or h5py')
 
@@ -75,6 +85,78 @@ class GroupType(BaseEnum):
     data_logger = 7
 
 
+class ChunkAccess(BaseEnum):
+    """Expected way the data of an array will be read back, used to choose its chunk shape
+
+    * frame: whole signal data (frames) at given navigation indexes
+    * pixel: given signal elements (pixels) across all the navigation indexes
+    """
+    frame = 0
+    pixel = 1
+
+
+class Shuffle(BaseEnum):
+    """Shuffle filter applied before compression, values are the ones used by blosc"""
+    none = 0
+    byte = 1
+    bit = 2
+
+
+def compression_libraries(backend='tables') -> List[str]:
+    """Get the compression libraries available for a given backend"""
+    complibs = ['zlib', 'gzip']
+    if backend == 'tables' and is_tables:
+        complibs.extend([complib for complib in tables.filters.all_complibs if complib.startswith('blosc') and
+                         tables.which_lib_version(complib.split(':')[0]) is not None])
+    elif backend == 'h5py' and is_hdf5plugin:
+        complibs.extend(['blosc'] + [f'{blosc}:{cname}' for blosc in ('blosc', 'blosc2')
+                                     for cname in ('blosclz', 'lz4', 'lz4hc', 'zlib', 'zstd')])
+    return complibs
+
+
+def compute_chunk_shape(nav_shape: Tuple[int], data_shape: Tuple[int], dtype: np.dtype,
+                        access: Union[ChunkAccess, str] = 'frame', target_size: int = None,
+                        expected_rows: int = None) -> Tuple[int]:
+    """Get the chunk shape of an array of shape nav_shape + data_shape
+
+    The chunk starts as the whole array and its largest dimension is halved until the chunk size
+    is below target_size: first among the navigation dimensions for a frame access (chunks hold
+    whole frames), first among the signal dimensions for a pixel access (chunks hold a few pixels
+    for many navigation indexes)
+
+    Parameters
+    ----------
+    nav_shape: tuple of int
+        the navigation shape, None standing for an enlargeable dimension
+    data_shape: tuple of int
+        the signal shape
+    dtype: np.dtype
+    access: ChunkAccess or str
+    target_size: int
+        maximum number of bytes of a chunk, default from the config
+    expected_rows: int
+        length used for the enlargeable dimensions, default from the config
+
+    Returns
+    -------
+    tuple of int
+    """
+    access = enum_checker(ChunkAccess, access)
+    if target_size is None:
+        target_size = config('data_saving', 'h5file', 'chunk_size_kb') * 1024
+    if expected_rows is None:
+        expected_rows = config('data_saving', 'h5file', 'chunk_expected_rows')
+    itemsize = np.dtype(dtype).itemsize
+
+    nav_chunk = [expected_rows if size is None else max(1, size) for size in nav_shape]
+    data_chunk = [max(1, size) for size in data_shape]
+    for chunk in ((nav_chunk, data_chunk) if access == 'frame' else (data_chunk, nav_chunk)):
+        while int(np.prod(nav_chunk + data_chunk)) * itemsize > target_size and max(chunk, default=1) > 1:
+            ind = int(np.argmax(chunk))
+            chunk[ind] = (chunk[ind] + 1) // 2
+    return tuple(nav_chunk + data_chunk)
+
+
 class InvalidExport(Exception):
     pass
 
@@ -343,6 +425,14 @@ class CARRAY(Node):
     def array(self):
         return self._array
 
+    @property
+    def chunk_shape(self) -> tuple:
+        """The shape of the chunks of the array, None if not chunked"""
+        if self.backend == 'tables':
+            return self._array.chunkshape
+        else:
+            return self._array.chunks
+
     def __repr__(self):
         """This provides more metainfo in addition to standard __str__"""
 
@@ -392,6 +482,19 @@ class EARRAY(CARRAY):
         expand: bool
             If True the data array will have its shape expanded by one dim
 
+        See Also
+        --------
+        EArrayStagingBuffer
+        """
+        self.append_rows(self.as_rows(data, expand))
+
+    def as_rows(self, data: np.ndarray, expand=True) -> np.ndarray:
+        """ Get the data to append as an ensemble of elements whose first index is the
+        enlargeable one
+
+        See Also
+        --------
+        append
         """
         if not isinstance(data, np.ndarray):
             raise TypeError('The appended object should be a ndarray')
@@ -399,23 +502,87 @@ class EARRAY(CARRAY):
             shape = [1]
             shape.extend(data.shape)
             data = data.reshape(shape)
-            extended_first_index = 1
-        else:
-            extended_first_index = data.shape[0]
         if expand and (len(data.shape) == 1 and not data.shape == (1, )):
             data = np.expand_dims(data, 1)
-        self.append_backend(data)
+        return data
+
+    def append_rows(self, rows: np.ndarray):
+        """ Append an ensemble of elements (as returned by as_rows) with a single write and a
+        single update of the shape attribute"""
+        self.append_backend(rows)
 
         sh = list(self.attrs['shape'])
-        sh[0] += extended_first_index
+        sh[0] += rows.shape[0]
         self.attrs['shape'] = tuple(sh)
 
     def append_backend(self, data):
         if self.backend == 'tables':
             self.array.append(data)
         else:
-            self.array.resize(self.array.len() + 1, axis=0)
-            self.array[-1] = data
+            self.array.resize(self.array.len() + data.shape[0], axis=0)
+            self.array[-data.shape[0]:] = data
+
+
+class EArrayStagingBuffer:
+    """In-memory staging of the elements to be appended to an enlargeable array
+
+    Elements are accumulated and written with a single append (and a single update of the shape
+    attribute) once max_frames elements have been staged or once the first staged element is
+    older than max_delay_ms. Call :meth:`flush` to make sure all staged elements are written.
+
+    Parameters
+    ----------
+    array: EARRAY
+        the enlargeable array the elements are appended to
+    max_frames: int
+        the number of staged elements triggering a write, 1 means no staging
+    max_delay_ms: float
+        the maximum time (in ms) an element is staged, checked at each append and by
+        :meth:`H5Backend.flush_due_staging_buffers`
+    update_size: bool
+        if True, the 'size' attribute of the array (for instance for axis arrays) is also increased
+        by the number of written elements
+    """
+
+    def __init__(self, array: EARRAY, max_frames: int = 100, max_delay_ms: float = 1000.,
+                 update_size=False):
+        self.array = array
+        self.max_frames = max_frames
+        self.max_delay_ms = max_delay_ms
+        self.update_size = update_size
+        self._rows = []
+        self._n_rows = 0
+        self._first_time = 0.
+
+    def __len__(self):
+        """The number of staged elements"""
+        return self._n_rows
+
+    def append(self, data: np.ndarray, expand=True):
+        """Stage data as :meth:`EARRAY.append` would append it, writing the staged elements if
+        needed"""
+        rows = np.array(self.array.as_rows(data, expand))  # copy as data could be reused
+        if self._n_rows == 0:
+            self._first_time = time.perf_counter()
+        self._rows.append(rows)
+        self._n_rows += rows.shape[0]
+        if self._n_rows >= self.max_frames or self.is_due():
+            self.flush()
+
+    def is_due(self) -> bool:
+        """Check if the first staged element is older than max_delay_ms"""
+        return self._n_rows > 0 and (time.perf_counter() - self._first_time) * 1000 >= self.max_delay_ms
+
+    def flush(self):
+        """Write all the staged elements into the array"""
+        if self._n_rows == 0:
+            return
+        rows = self._rows[0] if len(self._rows) == 1 else np.concatenate(self._rows)
+        self._rows = []
+        self._n_rows = 0
+        self.array.append_rows(rows)
+        if self.update_size:
+            self.array.attrs['size'] += rows.shape[0]
 
 
 class VLARRAY(EARRAY):
@@ -429,6 +596,13 @@ class VLARRAY(EARRAY):
         sh[0] += 1
         self.attrs['shape'] = tuple(sh)
 
+    def append_backend(self, data):
+        if self.backend == 'tables':
+            self.array.append(data)
+        else:
+            self.array.resize(self.array.len() + 1, axis=0)
+            self.array[-1] = data
+
 
 class StringARRAY(VLARRAY):
     def __init__(self, array, backend):
@@ -529,6 +703,43 @@ class Attributes(object):
             return str(self)
 
 
+class FileLock:
+    """Reentrant lock to be held when accessing an h5file that could be written from another thread
+
+    Same as a threading.RLock but knowing if it is held by the calling thread, so that a thread holding it
+    does not wait for another one needing it
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._owner = None
+        self._count = 0
+
+    def acquire(self, blocking=True, timeout=-1) -> bool:
+        if not self._lock.acquire(blocking, timeout):
+            return False
+        self._owner = get_ident()
+        self._count += 1
+        return True
+
+    def release(self):
+        self._count -= 1
+        if self._count == 0:
+            self._owner = None
+        self._lock.release()
+
+    def is_owned(self) -> bool:
+        """Check if the lock is held by the calling thread"""
+        return self._owner == get_ident()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
 class H5Backend:
     def __init__(self, backend='tables'):
 
@@ -536,6 +747,10 @@ class H5Backend:
         self.backend = backend
         self.file_path = None
         self.compression = None
+        self.chunk_access = enum_checker(ChunkAccess, config('data_saving', 'h5file', 'chunk_access'))
+        self._staging_buffers: Dict[str, EArrayStagingBuffer] = {}
+        self._writers = []
+        self.lock = FileLock()  # to be held when accessing the file from another thread
         if backend == 'tables':
             if is_tables:
                 self.h5_library = tables
@@ -560,6 +775,7 @@ class H5Backend:
     def h5file(self, file):
         self.file_path = file.filename
         self._h5file = file
+        self._staging_buffers = {}
 
     @property
     def filename(self):
@@ -581,13 +797,18 @@ class H5Backend:
         try:
             if self._h5file is not None:
                 self.flush()
+                for writer in list(self._writers):
+                    writer.stop()
                 if self.isopen():
                     self._h5file.close()
         except Exception as e:
             print(e)  # no big deal
+        self._staging_buffers = {}
+        self._writers = []
 
     def open_file(self, fullpathname, mode='r', title='PyMoDAQ file', **kwargs):
         self.file_path = fullpathname
+        self._staging_buffers = {}
         if self.backend == 'tables':
             self._h5file = self.h5_library.open_file(str(fullpathname), mode=mode, title=title, **kwargs)
             if mode == 'w':
@@ -627,26 +848,198 @@ class H5Backend:
         return attr_name in self.get_node(node).attrs.attrs_name
 
     def flush(self):
+        """Wait for the registered writers, write the staged elements of the enlargeable arrays
+        and flush the h5file
+
+        Can be called from a writer thread or while holding the lock, the writers then executing their
+        pending writes in the calling thread, see :meth:`BackgroundSaver.join`
+        """
         if self._h5file is not None:
-            self._h5file.flush()
+            self.join_writers()
+            with self.lock:
+                self.flush_staging_buffers()
+                self._h5file.flush()
+
+    def join_writers(self):
+        """Wait for the registered writers to have written all their pending data, see :meth:`add_writer`"""
+        for writer in list(self._writers):
+            writer.join()
+
+    def add_writer(self, writer):
+        """Register an object writing into the file from another thread
+
+        The writer should implement a join method (waiting for all its pending writes, without
+        waiting for itself or for the lock if held by the calling thread) and a stop method (called
+        before the file is closed)
+
+        See Also
+        --------
+        :class:`~pymodaq.utils.h5modules.background_saving.BackgroundSaver`
+        """
+        if writer not in self._writers:
+            self._writers.append(writer)
+
+    def remove_writer(self, writer):
+        if writer in self._writers:
+            self._writers.remove(writer)
+
+    def get_staging_buffer(self, array: EARRAY, max_frames: int = 100,
+                           max_delay_ms: float = 1000., update_size=False) -> EArrayStagingBuffer:
+        """Get (or create if absent) the staging buffer of an enlargeable array
+
+        The buffers live as long as the h5file is opened and are all written on :meth:`flush` and
+        :meth:`close_file`
+
+        See Also
+        --------
+        EArrayStagingBuffer
+        """
+        if array.path not in self._staging_buffers:
+            self._staging_buffers[array.path] = EArrayStagingBuffer(array, max_frames, max_delay_ms,
+                                                                    update_size)
+        return self._staging_buffers[array.path]
+
+    def flush_staging_buffers(self):
+        """Write all the elements staged for the enlargeable arrays of the h5file"""
+        for staging_buffer in self._staging_buffers.values():
+            staging_buffer.flush()
+
+    def flush_due_staging_buffers(self) -> bool:
+        """Write the staged elements older than the maximum delay of their staging buffer
+
+        To be called periodically so that the last staged elements are written even if nothing is
+        appended anymore. Does nothing if the lock is held by another thread (tried again on the next call)
+
+        Returns
+        -------
+        bool: False if the lock could not be acquired
+        """
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            if self.isopen():
+                for staging_buffer in list(self._staging_buffers.values()):
+                    if staging_buffer.is_due():
+                        staging_buffer.flush()
+        finally:
+            self.lock.release()
+        return True
+
+    def _direct_chunk_filters(self, array: CARRAY) -> Union[Tuple[bool, int], None]:
+        """Get the (shuffle, deflate level) filters of an array if its chunks can be encoded by
+        write_direct_chunk, None otherwise. A deflate level of None means no compression"""
+        if self.backend == 'tables':
+            filters = array.array.filters
+            if filters.fletcher32 or filters.bitshuffle or filters.least_significant_digit is not None:
+                return None
+            if filters.complevel == 0:
+                return False, None
+            if filters.complib != 'zlib':
+                return None
+            return filters.shuffle, filters.complevel
+        else:
+            plist = array.array.id.get_create_plist()
+            shuffle, level = False, None
+            for ind in range(plist.get_nfilters()):
+                code, _, values, _ = plist.get_filter(ind)
+                if code == self.h5_library.h5z.FILTER_SHUFFLE and level is None:
+                    shuffle = True
+                elif code == self.h5_library.h5z.FILTER_DEFLATE:
+                    level = values[0] if len(values) != 0 else 6
+                else:
+                    return None
+            return shuffle, level
+
+    def write_direct_chunk(self, array: CARRAY, indexes: Tuple[int], data: np.ndarray) -> bool:
+        """Write data as the chunk of the array located at the given leading indexes
+
+        The data are encoded here and directly written into the file, bypassing the HDF5 filter
+        pipeline. This is possible only if the data exactly fill a chunk, have the dtype of the
+        array and if the array filters are limited to the shuffle and the deflate (zlib/gzip)
+        compression. The tables backend needs the write_chunk method of recent PyTables versions.
 
-    def define_compression(self, compression, compression_opts):
-        """Define cmpression library and level of compression
         Parameters
         ----------
-        compression: (str) either gzip and zlib are supported here as they are compatible
-                        but zlib is used by pytables while gzip is used by h5py
+        array: CARRAY
+        indexes: tuple of int
+            the indexes of the leading dimensions where to put the data
+        data: ndarray
+
+        Returns
+        -------
+        bool: True if the chunk has been written, False if the data should be written by other means
+        """
+        if self.backend == 'tables' and not hasattr(array.array, 'write_chunk'):
+            return False
+        if self.backend == 'h5pyd':
+            return False
+        chunk_shape = array.chunk_shape
+        indexes = tuple(int(index) for index in indexes)
+        if chunk_shape is None or tuple(chunk_shape) != (1,) * len(indexes) + data.shape:
+            return False
+        dtype = np.dtype(array.array.dtype)
+        if data.dtype != dtype or not dtype.isnative:
+            return False
+        filters = self._direct_chunk_filters(array)
+        if filters is None:
+            return False
+
+        shuffle, level = filters
+        chunk = np.ascontiguousarray(data).tobytes()
+        if shuffle and dtype.itemsize > 1:
+            chunk = np.frombuffer(chunk, np.uint8).reshape((-1, dtype.itemsize)).T.tobytes()
+        if level is not None:
+            chunk = zlib.compress(chunk, level)
+        offsets = indexes + (0,) * data.ndim
+        if self.backend == 'tables':
+            array.array.write_chunk(offsets, chunk)
+        else:
+            array.array.id.write_direct_chunk(offsets, chunk)
+        return True
+
+    def define_compression(self, compression, compression_opts, shuffle: Union[Shuffle, str] = None):
+        """Define compression library and level of compression
+        Parameters
+        ----------
+        compression: (str) gzip and zlib are supported by all backends as they are compatible
+                        but zlib is used by pytables while gzip is used by h5py. blosc filters
+                        such as 'blosc2:zstd' are supported by pytables or by h5py if the
+                        hdf5plugin package is installed, see compression_libraries
         compression_opts (int) : 0 to 9  0: None, 9: maximum compression
+        shuffle (Shuffle or str): the shuffle filter applied before compression ('none', 'byte' or
+                                  'bit'), if None the default of the library is used
         """
-        #
+        if shuffle is not None:
+            shuffle = enum_checker(Shuffle, shuffle)
         if self.backend == 'tables':
             if compression == 'gzip':
                 compression = 'zlib'
-            self.compression = self.h5_library.Filters(complevel=compression_opts, complib=compression)
+            options = dict(complevel=compression_opts, complib=compression)
+            if shuffle is not None:
+                options.update(shuffle=shuffle == 'byte', bitshuffle=shuffle == 'bit')
+            self.compression = self.h5_library.Filters(**options)
         else:
             if compression == 'zlib':
                 compression = 'gzip'
-            self.compression = dict(compression=compression, compression_opts=compression_opts)
+            if compression.startswith('blosc'):
+                if not (is_hdf5plugin and self.backend == 'h5py'):
+                    raise ImportError(f'The {compression} filter needs the hdf5plugin package and the h5py '
+                                      f'backend')
+                blosc, _, cname = compression.partition(':')
+                shuffle = Shuffle['byte'] if shuffle is None else shuffle
+                if blosc == 'blosc2':
+                    blosc_filter = hdf5plugin.Blosc2(cname=cname if cname != '' else 'blosclz',
+                                                     clevel=compression_opts, filters=shuffle.value)
+                else:
+                    blosc_filter = hdf5plugin.Blosc(cname=cname if cname != '' else 'blosclz',
+                                                    clevel=compression_opts, shuffle=shuffle.value)
+                self.compression = dict(blosc_filter)
+            else:
+                if shuffle == 'bit':
+                    raise ValueError('The bit shuffle filter is only available with the blosc filters')
+                self.compression = dict(compression=compression, compression_opts=compression_opts)
+                if shuffle is not None:
+                    self.compression['shuffle'] = shuffle == 'byte'
 
     def get_set_group(self, where, name, title=''):
         """Retrieve or create (if absent) a node group
@@ -864,34 +1257,63 @@ class H5Backend:
         else:
             return array[:]
 
-    def create_carray(self, where, name, obj=None, title=''):
+    def create_carray(self, where, name, obj=None, title='', chunk_shape: Tuple[int] = None,
+                      shape: Tuple[int] = None, dtype: np.dtype = None):
+        """create a fixed size array from data, or filled with zeros from a shape and a dtype
+
+        Parameters
+        ----------
+        chunk_shape: tuple of int
+            the shape of the chunks, if None chosen by the library, see compute_chunk_shape
+        shape: tuple of int
+            the shape of the array if obj is None, its elements being allocated only once written
+        dtype: np.dtype
+            the dtype of the array if obj is None
+        """
         if isinstance(where, Node):
             where = where.node
-        if obj is None:
+        if obj is None and shape is None:
             raise ValueError('Data to be saved as carray cannot be None')
-        dtype = obj.dtype
+        if obj is not None:
+            shape = obj.shape
+            dtype = obj.dtype
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
         if self.backend == 'tables':
-            array = CARRAY(self._h5file.create_carray(where, name, obj=obj,
-                                                      title=title,
-                                                      filters=self.compression), self.backend)
+            if obj is not None:
+                array = CARRAY(self._h5file.create_carray(where, name, obj=obj,
+                                                          title=title,
+                                                          filters=self.compression,
+                                                          chunkshape=chunk_shape), self.backend)
+            else:
+                array = CARRAY(self._h5file.create_carray(where, name, atom=self.h5_library.Atom.from_dtype(dtype),
+                                                          shape=shape, title=title, filters=self.compression,
+                                                          chunkshape=chunk_shape), self.backend)
         else:
-            if self.compression is not None:
-                array = CARRAY(self.get_node(where).node.create_dataset(name, data=obj, **self.compression),
-                               self.backend)
+            if obj is not None:
+                dataset = self.get_node(where).node.create_dataset(name, data=obj, **self._dataset_options(chunk_shape))
             else:
-                array = CARRAY(self.get_node(where).node.create_dataset(name, data=obj), self.backend)
+                dataset = self.get_node(where).node.create_dataset(name, shape=shape, dtype=dtype,
+                                                                   **self._dataset_options(chunk_shape))
+            array = CARRAY(dataset, self.backend)
             array.array.attrs['TITLE'] = title
             array.array.attrs[
                 'CLASS'] = 'CARRAY'  # direct writing using h5py to be compatible with pytable automatic class writing as binary
-        array.attrs['shape'] = obj.shape
+        array.attrs['shape'] = shape
         array.attrs['dtype'] = dtype.name
         array.attrs['subdtype'] = ''
         array.attrs['backend'] = self.backend
         return array
 
-    def create_earray(self, where, name, dtype, data_shape=None, title=''):
+    def create_earray(self, where, name, dtype, data_shape=None, title='', chunk_shape: Tuple[int] = None):
         """create enlargeable arrays from data with a given shape and of a given type. The array is enlargeable along
         the first dimension
+
+        Parameters
+        ----------
+        chunk_shape: tuple of int
+            the shape of the chunks (including the enlargeable dimension), if None chosen by the library,
+            see compute_chunk_shape
         """
         if isinstance(where, Node):
             where = where.node
@@ -904,20 +1326,17 @@ class H5Backend:
         if self.backend == 'tables':
             atom = self.h5_library.Atom.from_dtype(dtype)
             array = EARRAY(self._h5file.create_earray(where, name, atom, shape=shape, title=title,
-                                                      filters=self.compression), self.backend)
+                                                      filters=self.compression, chunkshape=chunk_shape),
+                           self.backend)
         else:
             maxshape = [None]
             if data_shape is not None:
                 maxshape.extend(list(data_shape))
             maxshape = tuple(maxshape)
-            if self.compression is not None:
-                array = EARRAY(
-                    self.get_node(where).node.create_dataset(name, shape=shape, dtype=dtype, maxshape=maxshape,
-                                                             **self.compression), self.backend)
-            else:
-                array = EARRAY(
-                    self.get_node(where).node.create_dataset(name, shape=shape, dtype=dtype, maxshape=maxshape),
-                    self.backend)
+            array = EARRAY(
+                self.get_node(where).node.create_dataset(name, shape=shape, dtype=dtype, maxshape=maxshape,
+                                                         **self._dataset_options(chunk_shape)),
+                self.backend)
             array.array.attrs['TITLE'] = title
             array.array.attrs[
                 'CLASS'] = 'EARRAY'  # direct writing using h5py to be compatible with pytable automatic class writing as binary
@@ -928,6 +1347,13 @@ class H5Backend:
         array.attrs['backend'] = self.backend
         return array
 
+    def _dataset_options(self, chunk_shape: Tuple[int] = None) -> dict:
+        """Get the compression and chunking keyword arguments of the h5py create_dataset method"""
+        options = dict(self.compression) if self.compression is not None else dict([])
+        if chunk_shape is not None:
+            options['chunks'] = tuple(chunk_shape)
+        return options
+
     def create_vlarray(self, where, name, dtype, title=''):
         """create variable data length and type and enlargeable 1D arrays
 
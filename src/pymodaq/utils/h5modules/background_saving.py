@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Writing of the data to a h5file from a background thread, so that the acquisition is not slowed down by the disk
+"""
+from collections import deque
+import pickle
+import tempfile
+from threading import Condition, Thread, current_thread
+from typing import Union
+
+from pymodaq.utils.config import Config
+from pymodaq.utils.enums import BaseEnum, enum_checker
+from pymodaq.utils.logger import set_logger, get_module_name
+from .backends import Node
+from .data_saving import DataToExportSaver
+
+config = Config()
+logger = set_logger(get_module_name(__file__))
+
+
+class BackpressurePolicy(BaseEnum):
+    """What to do when data are added while the queue of a BackgroundSaver is full
+
+    * block: wait for the writer thread to make some room (or write the queued data from the calling thread if
+      it holds the lock of the file)
+    * drop_oldest: forget the oldest queued data, the structural calls (add_bkg, add_error, add_nav_axes) being
+      never dropped
+    * spill: pickle the data into a temporary file, read back once the queue is empty
+    """
+    block = 0
+    drop_oldest = 1
+    spill = 2
+
+
+class SpillFile:
+    """First in first out storage of pickled objects into a temporary file"""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._read_position = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, obj):
+        self._file.seek(0, 2)
+        pickle.dump(obj, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._count += 1
+
+    def pop(self):
+        self._file.seek(self._read_position)
+        obj = pickle.load(self._file)
+        self._read_position = self._file.tell()
+        self._count -= 1
+        if self._count == 0:  # reuse the file from its start
+            self._file.seek(0)
+            self._file.truncate()
+            self._read_position = 0
+        return obj
+
+    def close(self):
+        self._file.close()
+
+
+class BackgroundSaver:
+    """Proxy of a DataToExportSaver (or one of its enlargeable/extended flavours) writing data from
+    a dedicated thread
+
+    The add_data, add_bkg, add_error and add_nav_axes calls are queued and return immediately,
+    the writer thread executing them in order while holding the lock of the h5saver. The
+    BackgroundSaver registers itself as a writer of the h5saver, so that flushing or closing the
+    h5saver first waits for all the queued data to be written. Any other access to the file should
+    hold the lock of the h5saver.
+
+    The saved DataToExport should not be modified once given to add_data.
+
+    Parameters
+    ----------
+    saver: DataToExportSaver
+        the saver whose methods are called from the writer thread
+    max_queue_size: int
+        the maximum number of queued calls, default from the config
+    policy: BackpressurePolicy or str
+        the behaviour when the queue is full, default from the config
+
+    See Also
+    --------
+    BackpressurePolicy
+    """
+
+    def __init__(self, saver: DataToExportSaver, max_queue_size: int = None,
+                 policy: Union[BackpressurePolicy, str] = None):
+        if max_queue_size is None:
+            max_queue_size = config('data_saving', 'background_writer', 'queue_size')
+        if policy is None:
+            policy = config('data_saving', 'background_writer', 'policy')
+        self._saver = saver
+        self._h5saver = saver.h5saver
+        self.max_queue_size = max_queue_size
+        self.policy: BackpressurePolicy = enum_checker(BackpressurePolicy, policy)
+
+        self._jobs = deque()
+        self._spill: SpillFile = SpillFile() if self.policy == 'spill' else None
+        self._condition = Condition()
+        self._pending = 0
+        self._stopping = False
+        self.reset_statistics()
+
+        self._thread = Thread(target=self._write_jobs, name='BackgroundSaver', daemon=True)
+        self._thread.start()
+        self._h5saver.add_writer(self)
+
+    @property
+    def saver(self) -> DataToExportSaver:
+        return self._saver
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of calls waiting to be executed (in memory or spilled to disk)"""
+        with self._condition:
+            return self._queue_depth()
+
+    def _queue_depth(self) -> int:
+        return len(self._jobs) + (len(self._spill) if self._spill is not None else 0)
+
+    def reset_statistics(self):
+        self._max_queue_depth = 0
+        self._written = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._errors = 0
+
+    def statistics(self) -> dict:
+        """Get the queue metrics as a dictionary"""
+        return dict(queue_depth=self.queue_depth, max_queue_depth=self._max_queue_depth,
+                    written=self._written, dropped=self._dropped, spilled=self._spilled,
+                    errors=self._errors)
+
+    def add_data(self, where: Union[Node, str], *args, **kwargs):
+        self._enqueue('add_data', where, args, kwargs)
+
+    def add_bkg(self, where: Union[Node, str], *args, **kwargs):
+        self._enqueue('add_bkg', where, args, kwargs)
+
+    def add_error(self, where: Union[Node, str], *args, **kwargs):
+        self._enqueue('add_error', where, args, kwargs)
+
+    def add_nav_axes(self, where: Union[Node, str], *args, **kwargs):
+        self._enqueue('add_nav_axes', where, args, kwargs)
+
+    def _enqueue(self, method: str, where: Union[Node, str], args: tuple, kwargs: dict):
+        if isinstance(where, Node):
+            where = where.path  # nodes cannot be pickled and are not to be shared between threads
+        job = (method, where, args, kwargs)
+        with self._condition:
+            if self._stopping:
+                raise IOError('The BackgroundSaver has been stopped')
+            full = len(self._jobs) >= self.max_queue_size
+        if full and self.policy == 'block' and self._h5saver.lock.is_owned():
+            self._write_pending_jobs()  # the writer thread cannot make room as it needs the lock
+        with self._condition:
+            spilling = self._spill is not None and len(self._spill) != 0
+            if spilling or len(self._jobs) >= self.max_queue_size:
+                if self.policy == 'block':
+                    self._condition.wait_for(lambda: len(self._jobs) < self.max_queue_size)
+                elif self.policy == 'drop_oldest':
+                    self._drop_oldest_data()
+                else:
+                    self._spill.push(job)
+                    self._spilled += 1
+                    job = None
+            if job is not None:
+                self._jobs.append(job)
+            self._pending += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth())
+            self._condition.notify_all()
+
+    def _drop_oldest_data(self):
+        """Forget the oldest queued add_data call, if any"""
+        for job in self._jobs:
+            if job[0] == 'add_data':
+                self._jobs.remove(job)
+                self._pending -= 1
+                self._dropped += 1
+                return
+
+    def _has_jobs(self) -> bool:
+        return len(self._jobs) != 0 or (self._spill is not None and len(self._spill) != 0)
+
+    def _pop_job(self):
+        """Get the next queued call, to be called while holding the lock of the h5saver"""
+        with self._condition:
+            if len(self._jobs) != 0:
+                job = self._jobs.popleft()
+            elif self._spill is not None and len(self._spill) != 0:
+                job = self._spill.pop()
+            else:
+                job = None
+            self._condition.notify_all()
+        return job
+
+    def _execute(self, job):
+        method, where, args, kwargs = job
+        try:
+            getattr(self._saver, method)(where, *args, **kwargs)
+            self._written += 1
+        except Exception as e:
+            self._errors += 1
+            logger.exception(f'Could not execute {method} in the background: {str(e)}')
+        finally:
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+
+    def _write_jobs(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._has_jobs() or self._stopping)
+                if not self._has_jobs():
+                    break
+            with self._h5saver.lock:  # jobs are popped while holding the lock so that they are written in order
+                job = self._pop_job()
+                if job is not None:
+                    self._execute(job)
+
+    def _write_pending_jobs(self):
+        """Execute all queued calls from the calling thread, which should hold the lock of the h5saver"""
+        while True:
+            job = self._pop_job()
+            if job is None:
+                break
+            self._execute(job)
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait for all the queued calls to be executed
+
+        Does not wait if called from the writer thread. If the calling thread holds the lock of the
+        h5saver, the queued calls are executed from it, as the writer thread could not.
+
+        Returns
+        -------
+        bool: False if the timeout expired before
+        """
+        if current_thread() is self._thread:
+            return True
+        if self._h5saver.lock.is_owned():
+            self._write_pending_jobs()
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0 or not self.running,
+                                            timeout)
+
+    def stop(self):
+        """Write all the queued data and stop the writer thread"""
+        self.join()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        if self._spill is not None:
+            self._spill.close()
+        self._h5saver.remove_writer(self)
+
+    def flush(self):
+        """Write all the queued data and flush the file"""
+        self._h5saver.flush()
+
+    def close_file(self):
+        """Write all the queued data, stop the writer thread and close the file"""
+        self._h5saver.close_file()
+        if self.running:
+            self.stop()
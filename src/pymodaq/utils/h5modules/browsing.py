@@ -529,7 +529,9 @@ class H5Browser(QObject, ActionManager):
                 for txt in node.read():
                     self.view.text_list.addItem(txt)
             elif 'data_type' in node.attrs:
-                data_with_axes = self.data_loader.load_data(node, with_bkg=with_bkg, load_all=plot_all)
+                # large nodes are read only when displayed, the file staying opened with the browser
+                data_with_axes = self.data_loader.load_data(node, with_bkg=with_bkg, load_all=plot_all,
+                                                            lazy=None)
                 self.hyper_viewer.show_data(data_with_axes, force_update=True)
 
         except Exception as e:
@@ -611,7 +613,7 @@ def browse_data(fname=None, ret_all=False, message=None) -> Tuple[data_saving.Da
 
         if res == dialog.Accepted:
             node_path = browser.current_node_path
-            data = dataloader.load_data(node_path, with_bkg=True)
+            data = dataloader.load_data(node_path, with_bkg=True, lazy=False)  # the file is closed below
         else:
             data = None
             node_path = None
@@ -11,14 +11,17 @@ from pathlib import Path
 import numpy as np
 
 from pymodaq.utils.abstract import ABCMeta, abstract_attribute
+from pymodaq.utils.config import Config
 from pymodaq.utils.enums import enum_checker
 from pymodaq.utils.data import (Axis, DataDim, DataWithAxes, DataToExport, DataDistribution,
-                                DataDimError, squeeze)
+                                DataDimError, LazyArray, squeeze)
 from .saving import DataType, H5Saver
 from .backends import GROUP, CARRAY, Node, EARRAY, NodeError
 from pymodaq.utils.daq_utils import capitalize
 from pymodaq.utils.scanner.utils import ScanType
 
+config = Config()
+
 SPECIAL_GROUP_NAMES = dict(nav_axes='NavAxes')
 
 
@@ -26,6 +29,58 @@ class AxisError(Exception):
     pass
 
 
+class H5LazyArray(LazyArray):
+    """LazyArray reading its values from a CARRAY/EARRAY node of a h5file
+
+    The h5file should stay opened as long as the lazy array is used, reading it once the file is closed
+    raises an error. Use DataWithAxes.to_memory to get data independent of the file.
+
+    Parameters
+    ----------
+    array: CARRAY
+        the node (its current shape is used, data appended later to an enlargeable array are ignored)
+    squeeze_indexes: tuple of int
+        the indexes of the axes of size 1 of the node not appearing in the shape of the lazy array
+    bkg: CARRAY
+        a node of the same shape as array to be subtracted from its values
+    lock: FileLock
+        held while reading the node
+    """
+
+    def __init__(self, array: CARRAY, squeeze_indexes: Tuple[int] = (), bkg: CARRAY = None, lock=None):
+        self._array = array
+        self._bkg = bkg
+        self._lock = lock
+        self._node_shape = tuple(array.array.shape)
+        self._squeeze_indexes = tuple(squeeze_indexes)
+        if len(self._squeeze_indexes) == len(self._node_shape):  # at least 1D as squeeze would return
+            self._squeeze_indexes = self._squeeze_indexes[:-1]
+        self._shape = tuple(size for ind, size in enumerate(self._node_shape) if ind not in self._squeeze_indexes)
+        dtype = np.dtype(array.array.dtype)
+        self._dtype = dtype if bkg is None else np.result_type(dtype, bkg.array.dtype)
+
+    @property
+    def shape(self) -> Tuple[int]:
+        return self._shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    def _read(self, item: Tuple[Union[int, slice]]) -> np.ndarray:
+        item = list(item)
+        node_item = tuple(0 if ind in self._squeeze_indexes else item.pop(0) for ind in range(len(self._node_shape)))
+        if self._lock is None:
+            return self._read_node(node_item)
+        with self._lock:  # data could be written from a BackgroundSaver thread
+            return self._read_node(node_item)
+
+    def _read_node(self, item: Tuple[Union[int, slice]]) -> np.ndarray:
+        if self._bkg is None:
+            return np.asarray(self._array[item])
+        return np.asarray(self._array[item]) - np.asarray(self._bkg[item])
+
+
 class DataManagement(metaclass=ABCMeta):
     """Base abstract class to be used for all specialized object saving and loading data to/from a h5file
 
@@ -348,7 +403,7 @@ class DataSaverLoader(DataManagement):
         return bkg_nodes
 
     def get_data_arrays(self, where: Union[Node, str], with_bkg=False,
-                        load_all=False) -> List[np.ndarray]:
+                        load_all=False, lazy: bool = False) -> List[Union[np.ndarray, H5LazyArray]]:
         """
 
         Parameters
@@ -359,10 +414,14 @@ class DataSaverLoader(DataManagement):
             If True try to load background node and return the array with background subtraction
         load_all: bool
             If True load all similar nodes hanging from a parent
+        lazy: bool or None
+            If False (the default) the nodes are read. If True return H5LazyArray reading the values of
+            the nodes only when needed (the h5file should then stay opened as long as they are used).
+            If None only the nodes larger than the lazy_loading_mb config value are not read
 
         Returns
         -------
-        list of ndarray
+        list of ndarray or H5LazyArray
         """
         where = self._get_node(where)
         if with_bkg:
@@ -378,13 +437,27 @@ class DataSaverLoader(DataManagement):
             getter = self._get_nodes
 
         if with_bkg:
-            return [squeeze(array.read()-bkg.read(),
-                            squeeze_indexes=self._get_signal_indexes_to_squeeze(array))
-                    for array, bkg in zip(getter(where), bkg_nodes)]
+            nodes = zip(getter(where), bkg_nodes)
         else:
-            return [squeeze(array.read(),
-                            squeeze_indexes=self._get_signal_indexes_to_squeeze(array))
-                    for array in getter(where)]
+            nodes = [(array, None) for array in getter(where)]
+        arrays = []
+        for array, bkg in nodes:
+            squeeze_indexes = self._get_signal_indexes_to_squeeze(array)
+            if self._is_lazy(array, lazy) and (bkg is None or bkg.array.shape == array.array.shape):
+                arrays.append(H5LazyArray(array, squeeze_indexes, bkg=bkg, lock=self._h5saver.lock))
+            elif bkg is None:
+                arrays.append(squeeze(array.read(), squeeze_indexes=squeeze_indexes))
+            else:
+                arrays.append(squeeze(array.read() - bkg.read(), squeeze_indexes=squeeze_indexes))
+        return arrays
+
+    @staticmethod
+    def _is_lazy(array: CARRAY, lazy: bool = False) -> bool:
+        """Tell if the node should be lazily loaded, see get_data_arrays"""
+        if lazy is None:
+            nbytes = np.prod(array.array.shape) * np.dtype(array.array.dtype).itemsize
+            return nbytes > config('data_saving', 'h5file', 'lazy_loading_mb') * 2**20
+        return lazy
 
     def _get_signal_indexes_to_squeeze(self, array: Union[CARRAY, EARRAY]):
         """ Get the tuple of indexes in the array shape that are not navigation and should be
@@ -395,7 +468,7 @@ class DataSaverLoader(DataManagement):
                 sig_indexes.append(ind)
         return tuple(sig_indexes)
 
-    def load_data(self, where, with_bkg=False, load_all=False) -> DataWithAxes:
+    def load_data(self, where, with_bkg=False, load_all=False, lazy: bool = False) -> DataWithAxes:
         """Return a DataWithAxes object from the Data and Axis Nodes hanging from (or among) a
         given Node
 
@@ -410,12 +483,21 @@ class DataSaverLoader(DataManagement):
             If True try to load background node and return the data with background subtraction
         load_all: bool
             If True, will load all data hanging from the same parent node
+        lazy: bool or None
+            If True, the data arrays are H5LazyArray read from the h5file only when needed (the file
+            should then stay opened as long as the data are used), if None only the large ones, if
+            False (the default) the arrays are read, see get_data_arrays
 
         See Also
         --------
         load_data
         """
+        self._h5saver.join_writers()  # so that the data queued by a BackgroundSaver are read too
+        with self._h5saver.lock:  # data could be written from a BackgroundSaver thread
+            return self._load_data(where, with_bkg=with_bkg, load_all=load_all, lazy=lazy)
 
+    def _load_data(self, where, with_bkg=False, load_all=False, lazy: bool = False) -> DataWithAxes:
+        self._h5saver.flush_staging_buffers()  # elements appended to enlargeable arrays
         data_node = self._get_node(where)
 
         if load_all:
@@ -442,10 +524,10 @@ class DataSaverLoader(DataManagement):
                          data=np.linspace(0, ndarrays[0].size-1, ndarrays[0].size-1))]
             error_arrays = None
         else:
-            ndarrays = self.get_data_arrays(data_node, with_bkg=with_bkg, load_all=load_all)
+            ndarrays = self.get_data_arrays(data_node, with_bkg=with_bkg, load_all=load_all, lazy=lazy)
             axes = self.get_axes(parent_node)
             if error_node is not None:
-                error_arrays = self._error_saver.get_data_arrays(error_node, load_all=load_all)
+                error_arrays = self._error_saver.get_data_arrays(error_node, load_all=load_all, lazy=lazy)
                 if len(error_arrays) == 0:
                     error_arrays = None
             else:
@@ -523,6 +605,10 @@ class DataEnlargeableSaver(DataSaverLoader):
     Parameters
     ----------
     h5saver: H5Saver
+    staging_frames: int
+        The data are written by blocks of staging_frames elements, default from the config
+    staging_time_ms: float
+        The maximum time (ms) data are kept in memory before being written, default from the config
 
     Attributes
     ----------
@@ -533,17 +619,36 @@ class DataEnlargeableSaver(DataSaverLoader):
     -----
     To be used to save data from a timed logger (DAQViewer continuous saving or DAQLogger extension) or from an
     adaptive scan where the final shape is unknown or other module that need this feature
+
+    The appended data are staged in memory, see :class:`~pymodaq.utils.h5modules.backends.EArrayStagingBuffer`,
+    use the flush method (or flush/close the h5saver) to make sure they are written into the file
     """
     data_type = DataType['data_enlargeable']
 
     def __init__(self, h5saver: Union[H5Saver, Path],
                  enl_axis_names: Iterable[str] = ('nav axis',),
-                 enl_axis_units: Iterable[str] = ('',)):
+                 enl_axis_units: Iterable[str] = ('',),
+                 staging_frames: int = None, staging_time_ms: float = None):
         super().__init__(h5saver)
 
         self._n_enl_axes = len(enl_axis_names)
         self._enl_axis_names = enl_axis_names
         self._enl_axis_units = enl_axis_units
+        if staging_frames is None:
+            staging_frames = config('data_saving', 'h5file', 'staging_frames')
+        if staging_time_ms is None:
+            staging_time_ms = config('data_saving', 'h5file', 'staging_time_ms')
+        self.staging_frames = staging_frames
+        self.staging_time_ms = staging_time_ms
+
+    def append_staged(self, array: EARRAY, data: np.ndarray, expand=True, update_size=False):
+        """Append data to the staging buffer of the enlargeable array"""
+        self._h5saver.get_staging_buffer(array, self.staging_frames, self.staging_time_ms,
+                                         update_size).append(data, expand=expand)
+
+    def flush(self):
+        """Write all staged data into the h5file and flush it"""
+        self._h5saver.flush()
 
     def _create_data_arrays(self, where: Union[Node, str], data: DataWithAxes, save_axes=True,
                             add_enl_axes=True):
@@ -630,12 +735,12 @@ class DataEnlargeableSaver(DataSaverLoader):
 
         for ind_data in range(len(data)):
             array: EARRAY = self.get_node_from_index(where, ind_data)
-            array.append(data[ind_data])
+            self.append_staged(array, data[ind_data])
         if add_enl_axes and axis_values is not None:
             for ind_axis in range(self._n_enl_axes):
                 axis_array: EARRAY = self._axis_saver.get_node_from_index(where, ind_axis)
-                axis_array.append(np.array([axis_values[ind_axis]]))
-                axis_array.attrs['size'] += 1
+                self.append_staged(axis_array, np.array([axis_values[ind_axis]]),
+                                   update_size=True)
 
 
 class DataExtendedSaver(DataSaverLoader):
@@ -646,6 +751,10 @@ class DataExtendedSaver(DataSaverLoader):
     h5saver: H5Saver
     extended_shape: Tuple[int]
         the extra shape compared to the data the h5array will have
+    direct_chunk_write: bool
+        if True and if the chunks of the h5saver are fitted to a 'frame' access, arrays of large enough data have
+        one chunk per extended index, written at once without going through the HDF5 filter pipeline when
+        possible, see H5Backend.write_direct_chunk. Default from the config (False)
 
     Attributes
     ----------
@@ -654,9 +763,19 @@ class DataExtendedSaver(DataSaverLoader):
     """
     data_type = DataType['data']
 
-    def __init__(self, h5saver: H5Saver, extended_shape: Tuple[int]):
+    def __init__(self, h5saver: H5Saver, extended_shape: Tuple[int], direct_chunk_write: bool = None):
         super().__init__(h5saver)
         self.extended_shape = extended_shape
+        if direct_chunk_write is None:
+            direct_chunk_write = config('data_saving', 'h5file', 'direct_chunk_write')
+        self.direct_chunk_write = direct_chunk_write
+
+    def _get_chunk_shape(self, array: np.ndarray) -> Union[Tuple[int], None]:
+        """Get chunks aligned on the extended indexes if activated for a frame access and if the data are large
+        enough, None otherwise (the chunk shape being then computed from the chunk access of the h5saver)"""
+        if (self.direct_chunk_write and self._h5saver.chunk_access == 'frame' and array.size > 1 and
+                array.nbytes >= config('data_saving', 'h5file', 'direct_chunk_min_kb') * 1024):
+            return (1,) * len(self.extended_shape) + array.shape
 
     def _create_data_arrays(self, where: Union[Node, str], data: DataWithAxes, save_axes=True,
                             distribution=DataDistribution['uniform']):
@@ -685,6 +804,7 @@ class DataExtendedSaver(DataSaverLoader):
                                         array_type=data[ind_data].dtype,
                                         scan_shape=self.extended_shape,
                                         add_scan_dim=True,
+                                        chunk_shape=self._get_chunk_shape(data[ind_data]),
                                         data_dimension=data.dim.name,
                                         metadata=dict(timestamp=data.timestamp, label=data.labels[ind_data],
                                                       source=data.source.name, distribution=distribution.name,
@@ -706,23 +826,42 @@ class DataExtendedSaver(DataSaverLoader):
         where: Union[Node, str]
             the path of a given node or the node itself
         data: DataWithAxes
-        indexes: Iterable[int]
+        indexes: Iterable[int or slice]
             indexes where to save data in the init h5array (should have the same length as extended_shape and with values
-            coherent with this shape
+            coherent with this shape. One of them can be a slice, data being then a block of data whose first
+            (navigation) dimension spans this slice, for instance a whole scan line, written at once
         """
         if len(indexes) != len(self.extended_shape):
             raise IndexError(f'Cannot put data into the h5array with extended indexes {indexes}')
+        indexes = list(indexes)
+        block = False
         for ind in range(len(indexes)):
-            if indexes[ind] > self.extended_shape[ind]:
+            if isinstance(indexes[ind], slice):
+                start, stop, step = indexes[ind].indices(self.extended_shape[ind])
+                if step == -1:  # reversed block (back and forth scans) written in increasing order
+                    start, stop = stop + 1, start + 1
+                    data = data.deepcopy_with_new_data([array[::-1] for array in data.data],
+                                                      source=data.source, keep_dim=True)
+                elif step != 1:
+                    raise IndexError(f'Cannot put a block of data with a step of {step}')
+                indexes[ind] = slice(start, stop)
+                block = True
+            elif indexes[ind] > self.extended_shape[ind]:
                 raise IndexError(f'Indexes cannot be higher than the array shape')
 
         if self.get_last_node_name(where) is None:
-            self._create_data_arrays(where, data, save_axes=True, distribution=distribution)
+            if block:  # arrays are created from the data at a single index of the block
+                data.create_missing_axes()
+                self._create_data_arrays(where, data.inav[0], save_axes=True, distribution=distribution)
+            else:
+                self._create_data_arrays(where, data, save_axes=True, distribution=distribution)
 
         for ind_data in range(len(data)):
             #todo check that getting with index is safe...
             array: CARRAY = self.get_node_from_index(where, ind_data)
-            array[tuple(indexes)] = data[ind_data]
+            if block or not (self.direct_chunk_write and
+                             self._h5saver.write_direct_chunk(array, tuple(indexes), data[ind_data])):
+                array[tuple(indexes)] = data[ind_data]
             # maybe use array.__setitem__(indexes, data[ind_data]) if it's not working
 
 
@@ -744,6 +883,10 @@ class DataToExportSaver:
         self._data_saver = DataSaverLoader(h5saver)
         self._bkg_saver = BkgSaver(h5saver)
 
+    @property
+    def h5saver(self) -> H5Saver:
+        return self._h5saver
+
     def _get_node(self, where: Union[Node, str]) -> Node:
         return self._h5saver.get_node(where)
 
@@ -837,11 +980,20 @@ class DataToExportEnlargeableSaver(DataToExportSaver):
         the name of the enlarged axis array
     axis_units: str, deprecated use enl_axis_units
         the units of the enlarged axis array
+    staging_frames: int
+        The data are written by blocks of staging_frames elements, default from the config
+    staging_time_ms: float
+        The maximum time (ms) data are kept in memory before being written, default from the config
+
+    See Also
+    --------
+    DataEnlargeableSaver
     """
     def __init__(self, h5saver: H5Saver,
                  enl_axis_names: Iterable[str] = None,
                  enl_axis_units: Iterable[str] = None,
-                 axis_name: str = 'nav axis', axis_units: str = ''):
+                 axis_name: str = 'nav axis', axis_units: str = '',
+                 staging_frames: int = None, staging_time_ms: float = None):
 
         super().__init__(h5saver)
         if enl_axis_names is None:  # for backcompatibility
@@ -856,9 +1008,14 @@ class DataToExportEnlargeableSaver(DataToExportSaver):
         self._enl_axis_units = enl_axis_units
         self._n_enl = len(enl_axis_names)
 
-        self._data_saver = DataEnlargeableSaver(h5saver)
+        self._data_saver = DataEnlargeableSaver(h5saver, staging_frames=staging_frames,
+                                                staging_time_ms=staging_time_ms)
         self._nav_axis_saver = AxisSaverLoader(h5saver)
 
+    def flush(self):
+        """Write all staged data into the h5file and flush it"""
+        self._data_saver.flush()
+
     def add_data(self, where: Union[Node, str], data: DataToExport,
                  axis_values: List[Union[float, np.ndarray]] = None,
                  axis_value: Union[float, np.ndarray] = None,
@@ -900,9 +1057,8 @@ class DataToExportEnlargeableSaver(DataToExportSaver):
 
         for ind in range(self._n_enl):
             axis_array: EARRAY = self._nav_axis_saver.get_node_from_index(nav_group, ind)
-            axis_array.append(squeeze(np.array([axis_values[ind]])),
-                              expand=False)
-            axis_array.attrs['size'] += 1
+            self._data_saver.append_staged(axis_array, squeeze(np.array([axis_values[ind]])),
+                                           expand=False, update_size=True)
 
 
 class DataToExportTimedSaver(DataToExportEnlargeableSaver):
@@ -915,8 +1071,10 @@ class DataToExportTimedSaver(DataToExportEnlargeableSaver):
     -----
     This object is made for continuous saving mode of DAQViewer and logging to h5file for DAQLogger
     """
-    def __init__(self, h5saver: H5Saver):
-        super().__init__(h5saver, enl_axis_names=('time',), enl_axis_units=('s',))
+    def __init__(self, h5saver: H5Saver, staging_frames: int = None,
+                 staging_time_ms: float = None):
+        super().__init__(h5saver, enl_axis_names=('time',), enl_axis_units=('s',),
+                         staging_frames=staging_frames, staging_time_ms=staging_time_ms)
 
     def add_data(self, where: Union[Node, str], data: DataToExport, settings_as_xml='',
                  metadata=None, **kwargs):
@@ -934,11 +1092,13 @@ class DataToExportExtendedSaver(DataToExportSaver):
     h5saver: H5Saver
     extended_shape: Tuple[int]
         the extra shape compared to the data the h5array will have
+    direct_chunk_write: bool
+        see DataExtendedSaver, default from the config
     """
 
-    def __init__(self, h5saver: H5Saver, extended_shape: Tuple[int]):
+    def __init__(self, h5saver: H5Saver, extended_shape: Tuple[int], direct_chunk_write: bool = None):
         super().__init__(h5saver)
-        self._data_saver = DataExtendedSaver(h5saver, extended_shape)
+        self._data_saver = DataExtendedSaver(h5saver, extended_shape, direct_chunk_write)
         self._nav_axis_saver = AxisSaverLoader(h5saver)
 
     def add_nav_axes(self, where: Union[Node, str], axes: List[Axis]):
@@ -966,7 +1126,8 @@ class DataToExportExtendedSaver(DataToExportSaver):
         data: DataToExport
         indexes: List[int]
             indexes where to save data in the init h5array (should have the same length as
-            extended_shape and with values coherent with this shape
+            extended_shape and with values coherent with this shape. One of them can be a slice, see
+            DataExtendedSaver.add_data
         settings_as_xml: str
             The settings parameter as an XML string
         metadata: dict
@@ -1057,10 +1218,12 @@ class DataLoader:
                     return self._h5saver.get_node(node, SPECIAL_GROUP_NAMES['nav_axes'])
             node = node.parent_node
 
-    def load_data(self, where: Union[Node, str], with_bkg=False, load_all=False) -> DataWithAxes:
+    def load_data(self, where: Union[Node, str], with_bkg=False, load_all=False,
+                  lazy: bool = False) -> DataWithAxes:
         """Load data from a node (or channel node)
 
-        Loaded data contains also nav_axes if any and with optional background subtraction
+        Loaded data contains also nav_axes if any and with optional background subtraction. The data queued by
+        the background writers of the h5saver (see BackgroundSaver) are written before being read
 
         Parameters
         ----------
@@ -1070,38 +1233,44 @@ class DataLoader:
             If True will attempt to substract a background data node before loading
         load_all: bool
             If True, will load all data hanging from the same parent node
+        lazy: bool or None
+            If True, the data arrays are read from the h5file only when needed (the file should then stay
+            opened as long as the data are used), if None only those larger than the lazy_loading_mb config
+            value, if False (the default) they are read, see DataSaverLoader.get_data_arrays
 
         Returns
         -------
 
         """
-        node_data_type = DataType[self._h5saver.get_node(where).attrs['data_type']]
-        self._data_loader.data_type = node_data_type
-        data = self._data_loader.load_data(where, with_bkg=with_bkg, load_all=load_all)
-        if 'axis' not in node_data_type.name:
-            nav_group = self.get_nav_group(where)
-            if nav_group is not None:
-                nav_axes = self._axis_loader.get_axes(nav_group)
-                axes = data.axes[:]
-                axes.extend(nav_axes)
-                data.axes = axes
-                data.get_dim_from_data_axes()
+        self._h5saver.join_writers()  # so that the data queued by a BackgroundSaver are read too
+        with self._h5saver.lock:  # data could be written from a BackgroundSaver thread
+            node_data_type = DataType[self._h5saver.get_node(where).attrs['data_type']]
+            self._data_loader.data_type = node_data_type
+            data = self._data_loader.load_data(where, with_bkg=with_bkg, load_all=load_all, lazy=lazy)
+            if 'axis' not in node_data_type.name:
+                nav_group = self.get_nav_group(where)
+                if nav_group is not None:
+                    nav_axes = self._axis_loader.get_axes(nav_group)
+                    axes = data.axes[:]
+                    axes.extend(nav_axes)
+                    data.axes = axes
+                    data.get_dim_from_data_axes()
         data.create_missing_axes()
         return data
 
-    def load_all(self, where: GROUP, data: DataToExport, with_bkg=False) -> DataToExport:
+    def load_all(self, where: GROUP, data: DataToExport, with_bkg=False, lazy: bool = False) -> DataToExport:
 
         where = self._h5saver.get_node(where)
         children_dict = where.children()
         data_list = []
         for child in children_dict:
             if isinstance(children_dict[child], GROUP):
-                self.load_all(children_dict[child], data, with_bkg=with_bkg)
+                self.load_all(children_dict[child], data, with_bkg=with_bkg, lazy=lazy)
             elif ('data_type' in children_dict[child].attrs and 'data' in
                   children_dict[child].attrs['data_type']):
 
                 data_list.append(self.load_data(children_dict[child].path,
-                                                with_bkg=with_bkg, load_all=True))
+                                                with_bkg=with_bkg, load_all=True, lazy=lazy))
                 break
         data_tmp = DataToExport(name=where.name, data=data_list)
         data.append(data_tmp)
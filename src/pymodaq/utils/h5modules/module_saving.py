@@ -13,11 +13,13 @@ import xml.etree.ElementTree as ET
 import numpy as np
 
 from pymodaq.utils.abstract import ABCMeta, abstract_attribute, abstractmethod
+from pymodaq.utils.config import Config
 from pymodaq.utils.daq_utils import capitalize
 from pymodaq.utils.data import Axis, DataDim, DataWithAxes, DataToExport, DataDistribution
 from .saving import H5SaverLowLevel
 from .backends import GROUP, CARRAY, Node, GroupType
 from .data_saving import DataToExportSaver, AxisSaverLoader, DataToExportTimedSaver, DataToExportExtendedSaver
+from .background_saving import BackgroundSaver
 from pymodaq.utils.parameter import ioxml
 
 if TYPE_CHECKING:
@@ -26,6 +28,8 @@ if TYPE_CHECKING:
     from pymodaq.control_modules.daq_move import DAQ_Move
     from pymodaq.utils.h5modules.h5logging import H5Logger
 
+config = Config()
+
 
 class ModuleSaver(metaclass=ABCMeta):
     """Abstract base class to save info and data from main modules (DAQScan, DAQViewer, DAQMove, ...)"""
@@ -39,6 +43,12 @@ class ModuleSaver(metaclass=ABCMeta):
         """Flush the underlying file"""
         self._h5saver.flush()
 
+    def _in_background(self, saver: DataToExportSaver) -> Union[DataToExportSaver, BackgroundSaver]:
+        """Wrap the saver into a BackgroundSaver if activated in the config"""
+        if self._h5saver is not None and config('data_saving', 'background_writer', 'enabled'):
+            return BackgroundSaver(saver)
+        return saver
+
     def get_set_node(self, where: Union[Node, str] = None, name: str = None) -> GROUP:
         """Get or create the node corresponding to this particular Module instance
 
@@ -58,12 +68,13 @@ class ModuleSaver(metaclass=ABCMeta):
             where = self._h5saver.raw_group
         if name is None:
             name = self._module.title
-        group = self._h5saver.get_node_from_title(where, name)
-        if group is not None:
-            self._module_group = group
-            return group  # if I got one I return it else I create one
+        with self._h5saver.lock:
+            group = self._h5saver.get_node_from_title(where, name)
+            if group is not None:
+                self._module_group = group
+                return group  # if I got one I return it else I create one
 
-        self._module_group = self._add_module(where)
+            self._module_group = self._add_module(where)
         return self._module_group
 
     def get_last_node(self, where: Union[Node, str] = None):
@@ -84,7 +95,8 @@ class ModuleSaver(metaclass=ABCMeta):
         if where is None:
             where = self._h5saver.raw_group
 
-        group = self._h5saver.get_last_group(where, self.group_type)
+        with self._h5saver.lock:
+            group = self._h5saver.get_last_group(where, self.group_type)
         self._module_group = group
         return self._module_group
 
@@ -106,6 +118,9 @@ class ModuleSaver(metaclass=ABCMeta):
 
     @h5saver.setter
     def h5saver(self, _h5saver: H5SaverLowLevel):
+        datatoexport_saver = getattr(self, '_datatoexport_saver', None)
+        if isinstance(datatoexport_saver, BackgroundSaver) and datatoexport_saver.running:
+            datatoexport_saver.stop()
         self._h5saver = _h5saver
         self.update_after_h5changed()
 
@@ -139,7 +154,7 @@ class DetectorSaver(ModuleSaver):
         self._h5saver = None
 
     def update_after_h5changed(self, ):
-        self._datatoexport_saver = DataToExportSaver(self.h5saver)
+        self._datatoexport_saver = self._in_background(DataToExportSaver(self.h5saver))
 
     def _add_module(self, where: Union[Node, str] = None, metadata={}) -> Node:
         """
@@ -193,20 +208,21 @@ class DetectorSaver(ModuleSaver):
 
     def add_external_h5(self, other_h5data: H5SaverLowLevel):
         if other_h5data is not None:
-            external_group = self._h5saver.add_group('external_data', 'external_h5', self.module_group)
-            try:
-                if not other_h5data.isopen:
-                    h5saver = H5SaverLowLevel()
-                    h5saver.init_file(addhoc_file_path=other_h5data.filename)
-                    h5_file = h5saver.h5_file
-                else:
-                    h5_file = other_h5data
-                h5_file.copy_children(h5_file.get_node('/'), external_group, recursive=True)
-                h5_file.flush()
-                h5_file.close()
-
-            except Exception as e:
-                self.logger.exception(str(e))
+            with self._h5saver.lock:  # data could be written from a BackgroundSaver thread
+                external_group = self._h5saver.add_group('external_data', 'external_h5', self.module_group)
+                try:
+                    if not other_h5data.isopen:
+                        h5saver = H5SaverLowLevel()
+                        h5saver.init_file(addhoc_file_path=other_h5data.filename)
+                        h5_file = h5saver.h5_file
+                    else:
+                        h5_file = other_h5data
+                    h5_file.copy_children(h5_file.get_node('/'), external_group, recursive=True)
+                    h5_file.flush()
+                    h5_file.close()
+
+                except Exception as e:
+                    self.logger.exception(str(e))
 
 
 class DetectorEnlargeableSaver(DetectorSaver):
@@ -223,7 +239,7 @@ class DetectorEnlargeableSaver(DetectorSaver):
         self._datatoexport_saver: DataToExportTimedSaver = None
 
     def update_after_h5changed(self, ):
-        self._datatoexport_saver = DataToExportTimedSaver(self.h5saver)
+        self._datatoexport_saver = self._in_background(DataToExportTimedSaver(self.h5saver))
 
 
 class DetectorExtendedSaver(DetectorSaver):
@@ -241,7 +257,8 @@ class DetectorExtendedSaver(DetectorSaver):
         self._datatoexport_saver: DataToExportExtendedSaver = None
 
     def update_after_h5changed(self, ):
-        self._datatoexport_saver = DataToExportExtendedSaver(self.h5saver, self._extended_shape)
+        self._datatoexport_saver = self._in_background(
+            DataToExportExtendedSaver(self.h5saver, self._extended_shape))
 
     def add_data(self, where: Union[Node, str], data: DataToExport, indexes: Tuple[int],
                  distribution=DataDistribution['uniform']):
@@ -268,7 +285,7 @@ class ActuatorSaver(ModuleSaver):
         self._h5saver = None
 
     def update_after_h5changed(self, ):
-        self._datatoexport_saver = DataToExportTimedSaver(self.h5saver)
+        self._datatoexport_saver = self._in_background(DataToExportTimedSaver(self.h5saver))
 
     def _add_module(self, where: Union[Node, str] = None, metadata={}):
         if where is None:
@@ -328,10 +345,11 @@ class ScanSaver(ModuleSaver):
         -------
         GROUP: the GROUP associated with this module
         """
-        self._module_group = self.get_last_node(where)
-        new = new or (self._module_group is None)
-        if new:
-            self._module_group = self._add_module(where)
+        with self._h5saver.lock:
+            self._module_group = self.get_last_node(where)
+            new = new or (self._module_group is None)
+            if new:
+                self._module_group = self._add_module(where)
         for module in self._module.modules_manager.modules:
             module.module_and_data_saver.main_module = False
             module.module_and_data_saver.get_set_node(self._module_group)
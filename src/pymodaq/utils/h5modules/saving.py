@@ -14,7 +14,7 @@ from typing import Union, Iterable
 
 
 import numpy as np
-from qtpy.QtCore import QObject, Signal
+from qtpy.QtCore import QObject, Signal, QTimer
 from qtpy import QtWidgets
 
 from pymodaq.utils.logger import set_logger, get_module_name
@@ -34,7 +34,7 @@ from pymodaq.utils.messenger import deprecation_msg
 
 from .backends import (H5Backend, backends_available, SaveType, InvalidSave, InvalidExport, InvalidDataType,
                        InvalidGroupType, InvalidGroupDataType, Node, GroupType, InvalidDataDimension, InvalidScanType,
-                       GROUP, VLARRAY)
+                       GROUP, VLARRAY, ChunkAccess, Shuffle, compute_chunk_shape, compression_libraries)
 from . import browsing
 
 
@@ -190,7 +190,8 @@ class H5SaverLowLevel(H5Backend):
     def add_array(self, where: Union[GROUP, str], name: str, data_type: DataType, array_to_save: np.ndarray = None,
                   data_shape: tuple = None, array_type: np.dtype = None, data_dimension: DataDim = None,
                   scan_shape: tuple = tuple([]), add_scan_dim=False, enlargeable: bool = False,
-                  title: str = '', metadata=dict([]), ):
+                  title: str = '', metadata=dict([]), chunk_access: ChunkAccess = None,
+                  chunk_shape: tuple = None):
 
         """save data arrays on the hdf5 file together with metadata
         Parameters
@@ -220,6 +221,11 @@ class H5SaverLowLevel(H5Backend):
             dictionnary whose keys will be saved as the array attributes
         add_scan_dim: if True, the scan axes dimension (scan_shape iterable) is prepended to the array shape on the hdf5
                       In that case, the array is usually initialized as zero and further populated
+        chunk_access: ChunkAccess
+            the expected way the array will be read, used to choose its chunk shape. If None, the chunk_access
+            attribute is used
+        chunk_shape: tuple
+            the shape of the chunks, if None computed from chunk_access
 
         Returns
         -------
@@ -237,21 +243,33 @@ class H5SaverLowLevel(H5Backend):
 
         data_type = enum_checker(DataType, data_type)
         data_dimension = enum_checker(DataDim, data_dimension)
+        if chunk_access is None:
+            chunk_access = self.chunk_access
 
         if enlargeable:
             # if data_shape == (1,):
             #     data_shape = None
+            if chunk_shape is None:
+                chunk_shape = compute_chunk_shape((None,), tuple(data_shape) if data_shape is not None else (),
+                                                  array_type, chunk_access)
             array = self.create_earray(where, utils.capitalize(name), dtype=np.dtype(array_type),
-                                       data_shape=data_shape, title=title)
+                                       data_shape=data_shape, title=title, chunk_shape=chunk_shape)
         else:
+            nav_shape = ()
+            shape = None
             if add_scan_dim:  # means it is an array initialization to zero
                 shape = list(scan_shape[:])
                 if not(len(data_shape) == 1 and data_shape[0] == 1):  # means data are not ndarrays of scalars
                     shape.extend(data_shape)
-                if array_to_save is None:
-                    array_to_save = np.zeros(shape, dtype=np.dtype(array_type))
+                nav_shape = tuple(scan_shape)
+            if array_to_save is not None:
+                shape = array_to_save.shape
+                array_type = array_to_save.dtype
 
-            array = self.create_carray(where, utils.capitalize(name), obj=array_to_save, title=title)
+            if chunk_shape is None and shape is not None and len(shape) > 0 and np.prod(shape) > 0:
+                chunk_shape = compute_chunk_shape(nav_shape, shape[len(nav_shape):], array_type, chunk_access)
+            array = self.create_carray(where, utils.capitalize(name), obj=array_to_save, title=title,
+                                       chunk_shape=chunk_shape, shape=shape, dtype=array_type)
         self.set_attr(array, 'data_type', data_type.name)
         self.set_attr(array, 'data_dimension', data_dimension.name)
 
@@ -510,10 +528,14 @@ class H5SaverBase(H5SaverLowLevel, ParameterManager):
          'value': config('data_saving', 'data_type', 'dynamic')},
         {'title': 'Compression options:', 'name': 'compression_options', 'type': 'group', 'children': [
             {'title': 'Compression library:', 'name': 'h5comp_library', 'type': 'list', 'value': 'zlib',
-                'limits': ['zlib', 'gzip']},
+                'limits': compression_libraries()},
             {'title': 'Compression level:', 'name': 'h5comp_level', 'type': 'int',
                 'value': config('data_saving', 'h5file', 'compression_level'), 'min': 0, 'max': 9},
+            {'title': 'Shuffle:', 'name': 'h5comp_shuffle', 'type': 'list', 'value': 'byte',
+                'limits': Shuffle.names()},
         ]},
+        {'title': 'Chunks for access by:', 'name': 'chunk_access', 'type': 'list',
+         'value': config('data_saving', 'h5file', 'chunk_access'), 'limits': ChunkAccess.names()},
     ]
 
     def __init__(self, save_type='scan', backend='tables'):
@@ -535,6 +557,10 @@ class H5SaverBase(H5SaverLowLevel, ParameterManager):
         self.current_scan_name = None
 
         self.settings.child('save_type').setValue(self.save_type.name)
+        comp_library = self.settings.child('compression_options', 'h5comp_library')
+        comp_library.blockSignals(True)  # the compression is not to be defined when updating the limits
+        comp_library.setLimits(compression_libraries(self.backend))
+        comp_library.blockSignals(False)
 
     def show_settings(self, show=True):
         self.settings_tree.setVisible(show)
@@ -821,7 +847,11 @@ class H5SaverBase(H5SaverLowLevel, ParameterManager):
         elif param.name() in putils.iter_children(self.settings.child('compression_options'), []):
             compression = self.settings.child('compression_options', 'h5comp_library').value()
             compression_opts = self.settings.child('compression_options', 'h5comp_level').value()
-            self.define_compression(compression, compression_opts)
+            shuffle = self.settings.child('compression_options', 'h5comp_shuffle').value()
+            self.define_compression(compression, compression_opts, shuffle)
+
+        elif param.name() == 'chunk_access':
+            self.chunk_access = enum_checker(ChunkAccess, param.value())
 
     def update_status(self, status):
         logger.warning(status)
@@ -851,6 +881,11 @@ class H5Saver(H5SaverBase, QObject):
 
         self.settings.child('new_file').sigActivated.connect(lambda: self.emit_new_file(True))
 
+        self._staging_timer = QTimer(self)  # writes the staged elements when no more data are appended
+        self._staging_timer.setInterval(int(config('data_saving', 'h5file', 'staging_time_ms')))
+        self._staging_timer.timeout.connect(self.flush_due_staging_buffers)
+        self._staging_timer.start()
+
     def close(self):
         self.close_file()
 
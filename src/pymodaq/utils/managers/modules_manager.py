@@ -1,7 +1,7 @@
-from typing import List, Union, TYPE_CHECKING
+from typing import Callable, List, Union, TYPE_CHECKING
 
 from collections import OrderedDict
-from qtpy.QtCore import QObject, Signal, Slot, QThread
+from qtpy.QtCore import QObject, Signal, Slot, QThread, QEventLoop, QTimer
 from qtpy import QtWidgets
 import time
 
@@ -40,6 +40,10 @@ class ModulesManager(QObject, ParameterManager):
     det_done_signal = Signal(DataToExport)  # dte here contains DataWithAxes
     move_done_signal = Signal(DataToExport)  # dte here contains DataActuators
     timeout_signal = Signal(bool)
+    _detectors_done = Signal()  # emitted when all selected detectors sent their data
+    _detectors_latched = Signal()  # emitted when all selected detectors latched or sent their data
+    _detectors_armed = Signal()  # emitted when all selected detectors are ready to grab a line
+    _actuators_done = Signal()  # emitted when all selected actuators reached their target
 
     params = [
         {'title': 'Actuators/Detectors Selection', 'name': 'modules', 'type': 'group', 'children': [
@@ -76,7 +80,14 @@ class ModulesManager(QObject, ParameterManager):
         self.detector_timeout = config('viewer', 'timeout')
 
         self.det_done_datas: DataToExport = None
+        self.grab_latency = 0.  # duration in s of the last grab_datas
+        self.move_latency = 0.  # duration in s of the last move_actuators
+        self._grab_start = time.perf_counter()
+        self._move_start = time.perf_counter()
         self.det_done_flag = False
+        self._latched_detectors = set()
+        self._armed_detectors = set()
+        self._expected_moves = set()  # the titles of the actuators expected to send a move done
         self.move_done_positions: DataToExport = None
         self.move_done_flag = False
 
@@ -274,28 +285,59 @@ class ModulesManager(QObject, ParameterManager):
 
     def grab_datas(self, **kwargs):
         """Do a single grab of connected and selected detectors"""
+        self.start_grab(**kwargs)
+        return self.wait_grab()
+
+    def start_grab(self, **kwargs):
+        """Send a single grab command to the connected and selected detectors without waiting for their data
+
+        See Also
+        --------
+        wait_latched, wait_grab
+        """
+        self._reset_grab()
+        for mod in self.detectors:
+            kwargs.update(dict(Naverage=mod.Naverage))
+            mod.command_hardware.emit(utils.ThreadCommand("single", kwargs))
+
+    def _reset_grab(self):
         self.det_done_datas = DataToExport(name=__class__.__name__, control_module='DAQ_Viewer')
         self._received_data = 0
+        self._latched_detectors = set()
+        self._armed_detectors = set()
         self.det_done_flag = False
         self.settings.child('det_done').setValue(self.det_done_flag)
-        tzero = time.perf_counter()
+        self._grab_start = time.perf_counter()
 
-        for mod in self.detectors:
-            kwargs.update(dict(Naverage=mod.Naverage))
-            mod.command_hardware.emit(utils.ThreadCommand("single", kwargs))
+    def wait_latched(self) -> bool:
+        """Wait for the detectors of the current grab to have latched their data, meaning the acquisition
+        is over while the data may still be read out
 
-        while not self.det_done_flag:
-            # wait for grab done signals to end
+        Detectors not signaling it are latched once their data are received.
 
-            QtWidgets.QApplication.processEvents()
-            if time.perf_counter() - tzero > self.detector_timeout:
-                self.timeout_signal.emit(True)
-                logger.error('Timeout Fired during waiting for data to be acquired')
-                break
+        Returns
+        -------
+        bool: False if the timeout fired
+        """
+        if not self._wait_for(self._all_latched, self._detectors_latched, self.detector_timeout):
+            self.timeout_signal.emit(True)
+            logger.error('Timeout Fired during waiting for data to be latched')
+            return False
+        return True
+
+    def wait_grab(self) -> DataToExport:
+        """Wait for the data of the current grab"""
+        if not self._wait_for(lambda: self.det_done_flag, self._detectors_done, self.detector_timeout):
+            self.timeout_signal.emit(True)
+            logger.error('Timeout Fired during waiting for data to be acquired')
+        self.grab_latency = time.perf_counter() - self._grab_start
 
         self.det_done_signal.emit(self.det_done_datas)
         return self.det_done_datas
 
+    def _all_latched(self) -> bool:
+        return self.det_done_flag or set(self.selected_detectors_name).issubset(self._latched_detectors)
+
     def connect_actuators(self, connect=True, slot=None, signal='move_done'):
         """Connect the selected actuators signal to a given or default slot
 
@@ -353,7 +395,17 @@ class ModulesManager(QObject, ParameterManager):
         if connect:
             for sig in [mod.grab_done_signal for mod in self.detectors]:
                 sig.connect(slot)
+            if slot == self.det_done:
+                for signal_name, default_slot in self._default_detectors_connections():
+                    for sig in [getattr(mod, signal_name) for mod in self.detectors]:
+                        sig.connect(default_slot)
         else:
+            for signal_name, default_slot in self._default_detectors_connections():
+                for sig in [getattr(mod, signal_name) for mod in self.detectors_all]:
+                    try:
+                        sig.disconnect(default_slot)
+                    except TypeError:
+                        pass  # not connected by a default connection
 
             for sig in [mod.grab_done_signal for mod in self.detectors_all]:
                 try:
@@ -364,6 +416,11 @@ class ModulesManager(QObject, ParameterManager):
 
         self.detectors_connected = connect
 
+    def _default_detectors_connections(self):
+        """The other signals of the detectors connected when connecting their grab_done_signal to det_done"""
+        return [('data_latched_signal', self.det_latched), ('line_armed_signal', self.det_armed),
+                ('line_done_signal', self.det_done)]
+
     def test_move_actuators(self):
         """Do a move of selected actuator"""
         dte_act = DataToExport('Actuators', control_module='DAQ_MOVE')
@@ -403,9 +460,24 @@ class ModulesManager(QObject, ParameterManager):
         -------
         DataToExport with the selected actuators's name as key and current actuators's value as value
         """
-        self.move_done_positions = DataToExport(name=__class__.__name__, control_module='DAQ_Move')
-        self.move_done_flag = False
-        self.settings.child('move_done').setValue(self.move_done_flag)
+        if not self.start_move(dte_act, mode, polling):
+            return self.move_done_positions
+        return self.wait_move(polling)
+
+    def start_move(self, dte_act: DataToExport, mode='abs', polling=True) -> bool:
+        """Send the positions to the selected actuators without waiting for them to reach their targets
+
+        Parameters are the same as for move_actuators
+
+        Returns
+        -------
+        bool: False if the positions could not be applied
+
+        See Also
+        --------
+        move_actuators, wait_move
+        """
+        self._reset_move(self.selected_actuators_name)
 
         if mode == 'abs':
             command = 'move_abs'
@@ -413,7 +485,7 @@ class ModulesManager(QObject, ParameterManager):
             command = 'move_rel'
         else:
             logger.error(f'Invalid positioning mode: {mode}')
-            return self.move_done_positions
+            return False
 
         if len(dte_act) == self.Nactuators:
             for dact in dte_act:
@@ -428,25 +500,116 @@ class ModulesManager(QObject, ParameterManager):
 
         else:
             logger.error('Invalid number of positions compared to selected actuators')
-            return self.move_done_positions
+            return False
+        return True
 
-        tzero = time.perf_counter()
-        if polling:
-            while not self.move_done_flag:  # polling move done
+    def _reset_move(self, actuators: List[str]):
+        self.move_done_positions = DataToExport(name=__class__.__name__, control_module='DAQ_Move')
+        self.move_done_flag = False
+        self.settings.child('move_done').setValue(self.move_done_flag)
+        self._move_start = time.perf_counter()
+        self._expected_moves = set(actuators)
 
-                QtWidgets.QApplication.processEvents()
-                if time.perf_counter() - tzero > self.actuator_timeout / 1000:  # timeout in seconds
-                    self.timeout_signal.emit(True)
-                    logger.error('Timeout Fired during waiting for actuators to be moved')
-                    break
-                QThread.msleep(20)
+    def wait_move(self, polling=True) -> DataToExport:
+        """Wait for the actuators moved with start_move to reach their targets, if polling"""
+        if polling:
+            if not self._wait_for(lambda: self.move_done_flag, self._actuators_done, self.actuator_timeout):
+                self.timeout_signal.emit(True)
+                logger.error('Timeout Fired during waiting for actuators to be moved')
+        self.move_latency = time.perf_counter() - self._move_start
 
         self.move_done_signal.emit(self.move_done_positions)
         return self.move_done_positions
 
+    def grab_line(self, positions: DataToExport, actuator: str, **kwargs) -> DataToExport:
+        """Grab the data of a whole scan line, run by one of the selected actuators
+
+        The selected detectors are armed with a grab_line command, then the actuator is sent all the positions of
+        the line with a move_line command, triggering the acquisitions or letting the controllers run the line.
+        Detectors and actuator have to be in line mode, see DAQ_Viewer_base.grab_line and DAQ_Move_base.move_line
+
+        Parameters
+        ----------
+        positions: DataToExport
+            the DataActuators holding the positions of the line for each selected actuator
+        actuator: str
+            the title of the actuator running the line, the other ones being already at their position
+        kwargs: optional named arguments passed to the grab_line method of the detector plugins
+
+        Returns
+        -------
+        DataToExport: the data of the line, whose first dimension spans the line steps
+        """
+        n_points = positions.get_data_from_name(actuator).size
+        timeout = n_points * max(self.detector_timeout, self.actuator_timeout)
+
+        self._reset_grab()
+        for mod in self.detectors:
+            mod.command_hardware.emit(utils.ThreadCommand(
+                'grab_line', dict(n_points=n_points, Naverage=mod.Naverage, positions=positions, **kwargs)))
+        if not self._wait_for(lambda: set(self.selected_detectors_name).issubset(self._armed_detectors),
+                              self._detectors_armed, self.detector_timeout):
+            self.timeout_signal.emit(True)
+            logger.error('Timeout Fired during waiting for detectors to be ready to grab a line')
+            return self.det_done_datas
+
+        self._reset_move([actuator])
+        self.get_mod_from_name(actuator, 'act').command_hardware.emit(
+            utils.ThreadCommand('move_line', [positions.get_data_from_name(actuator)]))
+        if not self._wait_for(lambda: self.move_done_flag, self._actuators_done, timeout):
+            self.timeout_signal.emit(True)
+            logger.error('Timeout Fired during waiting for the line to be run')
+        self.move_latency = time.perf_counter() - self._move_start
+
+        if not self._wait_for(lambda: self.det_done_flag, self._detectors_done, timeout):
+            self.timeout_signal.emit(True)
+            logger.error('Timeout Fired during waiting for the line data to be acquired')
+        self.grab_latency = time.perf_counter() - self._grab_start - self.move_latency
+
+        self.det_done_signal.emit(self.det_done_datas)
+        return self.det_done_datas
+
     def reset_signals(self):
         self.move_done_flag = True
         self.det_done_flag = True
+        self._actuators_done.emit()
+        self._detectors_done.emit()
+        self._detectors_latched.emit()
+        self._detectors_armed.emit()
+
+    @staticmethod
+    def _wait_for(is_done: Callable[[], bool], done_signal: Signal, timeout: int) -> bool:
+        """Process the events of the calling thread until is_done returns True or the timeout fired
+
+        The local event loop sleeps until an event is posted and quits as soon as done_signal is emitted,
+        from this thread or another one.
+
+        Parameters
+        ----------
+        is_done: Callable
+            returns True when the waiting is over
+        done_signal: Signal
+            emitted when is_done is to return True
+        timeout: int
+            maximum waiting time in ms
+
+        Returns
+        -------
+        bool: the is_done value, False if the timeout fired
+        """
+        if is_done():
+            return True
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(loop.quit)
+        done_signal.connect(loop.quit)
+        timer.start(int(timeout))
+        if not is_done():  # the done signal may have been emitted by another thread in between
+            loop.exec()
+        timer.stop()
+        done_signal.disconnect(loop.quit)
+        return is_done()
 
     def order_positions(self, positions: DataToExport):
         """ Reorder the content of the DataToExport given the order of the selected actuators"""
@@ -459,12 +622,15 @@ class ModulesManager(QObject, ParameterManager):
     @Slot(DataActuator)
     def move_done(self, data_act: DataActuator):
         try:
+            if self.move_done_positions is None or data_act.name not in self._expected_moves:
+                return  # not moved by this object, or not the actuator running the current line
             if data_act.name not in self.move_done_positions.get_names():
                 self.move_done_positions.append(data_act)
 
-            if len(self.move_done_positions) == len(self.actuators):
+            if len(self.move_done_positions) == len(self._expected_moves):
                 self.move_done_flag = True
                 self.settings.child('move_done').setValue(self.move_done_flag)
+                self._actuators_done.emit()
         except Exception as e:
             logger.exception(str(e))
 
@@ -477,12 +643,26 @@ class ModulesManager(QObject, ParameterManager):
             if self._received_data == len(self.detectors):
                 self.det_done_flag = True
                 self.settings.child('det_done').setValue(self.det_done_flag)
+                self._detectors_done.emit()
+            self.det_latched(data.name)
 
         # if data.name not in list(self.det_done_datas.keys()):
         #     self.det_done_datas[data['name']] = data
         # if len(self.det_done_datas.items()) == len(self.detectors):
         #     self.det_done_flag = True
 
+    def det_armed(self, title: str):
+        """Slot called when the detector with the given title is ready to grab a line"""
+        self._armed_detectors.add(title)
+        if set(self.selected_detectors_name).issubset(self._armed_detectors):
+            self._detectors_armed.emit()
+
+    def det_latched(self, title: str):
+        """Slot called when the detector with the given title latched the data of the current grab"""
+        self._latched_detectors.add(title)
+        if self._all_latched():
+            self._detectors_latched.emit()
+
 
 if __name__ == '__main__':
     import sys
@@ -136,6 +136,8 @@ class ViewerBase(QObject):
     ----------
     view: QObject
         Ui interface of the viewer
+    lazy_data_supported: bool
+        if False, the lazy data (see DataWithAxes.is_lazy) are read into memory before being displayed
 
     data_to_export_signal: Signal[DataToExport]
     ROI_changed: Signal
@@ -146,6 +148,7 @@ class ViewerBase(QObject):
     """
     data_to_export_signal = Signal(DataToExport)
     _data_to_show_signal = Signal(DataWithAxes)
+    lazy_data_supported = False
 
     ROI_changed = Signal()
     crosshair_dragged = Signal(float, float)  # Crosshair position in units of scaled top/right axes
@@ -226,6 +229,8 @@ class ViewerBase(QObject):
         """
         if len(data.shape) > 4:
             raise ViewerError(f'Ndarray of dim: {len(data.shape)} cannot be plotted using a {self.viewer_type}')
+        if not self.lazy_data_supported:
+            data = data.to_memory()
 
         self.data_to_export = DataToExport(name=self.title)
         self._raw_data = data
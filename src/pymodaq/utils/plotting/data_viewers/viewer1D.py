@@ -577,7 +577,7 @@ class Viewer1D(ViewerBase):
                     dwa.name = f'Hlineout_{dwa.origin}'
                 elif dwa.name == 'IntData':
                     dwa.name = f'Integrated_{dwa.origin}'
-            self.data_to_export.append(roi_dte_bis.data)
+            self.data_to_export.append(roi_dte_bis.data, copy=False)
             self.data_to_export_signal.emit(self.data_to_export)
         self.ROI_changed.emit()
 
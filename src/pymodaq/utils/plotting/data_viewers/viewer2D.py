@@ -1,5 +1,4 @@
 from collections import OrderedDict
-import copy
 import datetime
 import numpy as np
 import sys
@@ -861,7 +860,7 @@ class Viewer2D(ViewerBase):
         """
         Deactivate some tool buttons if data type is "spread" then apply transform_image
         """
-        data = copy.deepcopy(self._raw_data)
+        data = self._raw_data.view()  # the transformed arrays are views of the raw ones
         self.view.set_action_visible('flip_ud', data.distribution != 'spread')
         self.view.set_action_visible('flip_lr', data.distribution != 'spread')
         self.view.set_action_visible('rotate', data.distribution != 'spread')
@@ -980,7 +979,7 @@ class Viewer2D(ViewerBase):
                         dwa.name = f'Vlineout_{dwa.origin}'
                     elif dwa.name == 'int':
                         dwa.name = f'Integrated_{dwa.origin}'
-                self.data_to_export.append(roi_dte_bis)
+                self.data_to_export.append(roi_dte_bis, copy=False)
 
                 self.measure_data_dict = dict([])
 
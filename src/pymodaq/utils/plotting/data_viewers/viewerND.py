@@ -1,6 +1,6 @@
 from abc import ABCMeta, abstractmethod, abstractproperty
 import sys
-from typing import List, Tuple, Union
+from typing import Callable, List, Optional, Tuple, Union
 
 import numpy as np
 
@@ -12,9 +12,10 @@ except ImportError:
     from scipy.spatial.qhull import Delaunay as Triangulation
 
 from qtpy import QtWidgets
-from qtpy.QtCore import QObject, Slot, Signal, QRectF, QPointF
+from qtpy.QtCore import QObject, Slot, Signal, QRectF, QPointF, QRunnable, QThreadPool
 
 from pymodaq.utils.logger import set_logger, get_module_name
+from pymodaq.utils.config import Config
 from pymodaq.utils.gui_utils.dock import DockArea, Dock
 from pymodaq.utils.plotting.data_viewers.viewer1D import Viewer1D
 from pymodaq.utils.plotting.utils.axes_viewer import AxesViewer
@@ -27,11 +28,12 @@ from pymodaq.utils.data import DataRaw, Axis, DataDistribution, DataWithAxes, Da
 from pymodaq.utils.plotting.data_viewers.viewer import ViewerBase
 from pymodaq.utils.managers.action_manager import ActionManager
 from pymodaq.utils.managers.parameter_manager import ParameterManager
-from pymodaq.post_treatment.process_to_scalar import DataProcessorFactory
+from pymodaq.post_treatment.process_to_scalar import DataProcessorFactory, SignalSummedArea
 from pymodaq.utils.managers.roi_manager import SimpleRectROI, LinearROI
 
 
 logger = set_logger(get_module_name(__file__))
+config = Config()
 data_processors = DataProcessorFactory()
 
 DEBUG_VIEWER = False
@@ -149,15 +151,147 @@ class BaseDataDisplayer(QObject):
         self._nav_limits = x, y, width, height
 
 
+class ProjectionTask(QRunnable):
+    """Run a projection computation in a QThreadPool"""
+    def __init__(self, run: Callable[[], None]):
+        super().__init__()
+        self._run = run
+
+    def run(self):
+        self._run()
+
+
 class UniformDataDisplayer(BaseDataDisplayer):
     """Specialized object to filter and plot linearly spaced data in dedicated viewers
 
     Meant for any navigation axes and up to signal data dimensionality of 2 (images)
+
+    The projections over the whole dataset are computed one at a time in a background thread and cached
+    until the data change (the pending and running computations being then cancelled): the summed-area tables of the signal (so that the sum and mean navigator data cost O(nav size)
+    whatever the signal ROI) and the means over the navigation axes.
     """
     distribution = DataDistribution['uniform']
+    projection_ready = Signal(str, object, int)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._data_version = 0
+        self._projections = dict([])
+        self._computing = set([])
+        self._thread_pool = QThreadPool()
+        self._thread_pool.setMaxThreadCount(1)
+        self.projection_ready.connect(self._set_projection)
+
+    def update_data(self, data: DataRaw, force_update=False):
+        self._invalidate_projections()
+        super().update_data(data, force_update)
+
+    def _invalidate_projections(self):
+        """Forget the cached projections and cancel the running computations"""
+        self._data_version += 1
+        self._projections = dict([])
+        self._computing = set([])
+        self._thread_pool.clear()  # the running one stops at its next is_cancelled check
+
+    def _get_projection(self, key: str, compute: Callable[[Callable[[], bool]], object]):
+        """Get a cached projection of the data or queue its computation in the background thread
+
+        Parameters
+        ----------
+        key: str
+            the projection identifier
+        compute: Callable
+            called with a function returning True if the computation should be cancelled, returns the projection
+
+        Returns
+        -------
+        object: the projection or None if not yet available
+        """
+        if key in self._projections:
+            return self._projections[key]
+        if key not in self._computing:
+            self._computing.add(key)
+            version = self._data_version
+
+            def run():
+                try:
+                    projection = compute(lambda: version != self._data_version)
+                    if projection is not None and version == self._data_version:
+                        self.projection_ready.emit(key, projection, version)
+                except Exception as e:
+                    logger.exception(f'Could not compute the {key} projection: {str(e)}')
+
+            self._thread_pool.start(ProjectionTask(run))
+        return None
+
+    @Slot(str, object, int)
+    def _set_projection(self, key: str, projection, version: int):
+        if version == self._data_version:
+            self._projections[key] = projection
+            self._computing.discard(key)
+            if key.startswith('nav_mean'):
+                self.update_viewer_data(*self._signal_at)
+
+    def get_nav_mean(self, axis: Union[int, Tuple[int]]) -> DataWithAxes:
+        """Get the mean of the data over the given navigation axes, None while being computed"""
+        data = self._data
+        return self._get_projection(f'nav_mean{axis}',
+                                    lambda is_cancelled: self.compute_mean(data, axis, is_cancelled))
+
+    @staticmethod
+    def compute_mean(data: DataWithAxes, axis: Union[int, Tuple[int]], is_cancelled: Callable[[], bool] = None,
+                     chunk_nbytes: int = 2**24) -> Optional[DataWithAxes]:
+        """Compute the mean of the data over the given axes as DataWithAxes.mean, chunk by chunk along
+        the first of them
+
+        Parameters
+        ----------
+        data: DataWithAxes
+        axis: int or tuple of int
+        is_cancelled: Callable
+            called between chunks, the computation is stopped if it returns True
+        chunk_nbytes: int
+            approximate size of the chunks
+
+        Returns
+        -------
+        DataWithAxes: None if cancelled
+        """
+        axes = (axis,) if isinstance(axis, int) else tuple(axis)
+        first_axis = min(axes)
+        count = int(np.prod([data.shape[ind] for ind in axes]))
+        frame_nbytes = int(np.prod(data.shape)) // max(1, data.shape[first_axis]) * 8
+        chunk = max(1, int(chunk_nbytes / max(1, frame_nbytes)))
+        arrays = []
+        for array in data:
+            sums = None
+            for ind in range(0, data.shape[first_axis], chunk):
+                if is_cancelled is not None and is_cancelled():
+                    return None
+                chunk_slices = tuple(slice(ind, ind + chunk) if index == first_axis else slice(None)
+                                     for index in range(len(data.shape)))
+                chunk_sum = np.sum(np.asarray(array[chunk_slices]), axis=axes,
+                                   dtype=np.result_type(array.dtype, np.float64))
+                sums = chunk_sum if sums is None else sums + chunk_sum
+            arrays.append(np.atleast_1d(sums / count))
+        return data.deepcopy_with_new_data(arrays, remove_axes_index=axis)
+
+    def get_summed_area(self) -> SignalSummedArea:
+        """Get the summed-area tables of the signal, None while being computed or if too large"""
+        data = self._data
+        if not SignalSummedArea.is_applicable(data) or \
+                SignalSummedArea.nbytes(data) > config('plotting', 'summed_area_max_mb') * 2**20:
+            return None
+        return self._get_projection('summed_area',
+                                    lambda is_cancelled: SignalSummedArea.compute(data, is_cancelled))
+
+    def _process_signal(self, data: DataRaw, limits: List[Tuple[int, int]], sub_data: Callable[[], DataRaw]):
+        """Apply the current filter to the signal within limits, using the summed-area tables if possible"""
+        if self._filter_type in ('sum', 'mean') and data is self._data:
+            summed_area = self.get_summed_area()
+            if summed_area is not None:
+                return getattr(summed_area, self._filter_type)(limits)
+        return self._processor.get(self._filter_type).process(sub_data())
 
     def init(self, data: DataRaw):
         if len(data.nav_indexes) > 2:
@@ -229,7 +363,9 @@ class UniformDataDisplayer(BaseDataDisplayer):
                             ind_x1 = min(int(nav_axis.max()), int(nav_axis.find_index(x1)))
                             data.append(self._data.inav[ind_x0:ind_x1].mean(axis=(nav_axis.index)))
                         else:
-                            data.append(self._data.mean(axis=nav_axis.index))
+                            nav_mean = self.get_nav_mean(nav_axis.index)
+                            if nav_mean is not None:
+                                data.append(nav_mean)
 
                 elif len(self._data.nav_indexes) == 2:
                     nav_x = self._data.axes_manager.get_nav_axes()[1]
@@ -250,7 +386,9 @@ class UniformDataDisplayer(BaseDataDisplayer):
                             ind_y1 = min(int(nav_y.max()), ind_y0 + int(self._navigator2D.view.ROIselect.size().y()))
                             data.append(self._data.inav[ind_y0:ind_y1, ind_x0:ind_x1].mean(axis=(nav_x.index, nav_y.index)))
                         else:
-                            data.append(self._data.mean(axis=(nav_x.index, nav_y.index)))
+                            nav_mean = self.get_nav_mean((nav_x.index, nav_y.index))
+                            if nav_mean is not None:
+                                data.append(nav_mean)
                 else:
                     data = self._data.inav.__getitem__(self._axes_viewer.get_indexes())
 
@@ -290,12 +428,13 @@ class UniformDataDisplayer(BaseDataDisplayer):
 
             elif len(data.axes_manager.sig_shape) == 1:  # signal data is 1D
                 indx, indy = data.get_axis_from_index(data.sig_indexes[0])[0].find_indexes((x, y))
-                navigator_data = self._processor.get(self._filter_type).process(data.isig[indx:indy])
+                navigator_data = self._process_signal(data, [(indx, indy)], lambda: data.isig[indx:indy])
 
             elif len(data.axes_manager.sig_shape) == 2:  # signal data is 2D
                 x, y, width, height = self.get_out_of_range_limits(x, y, width, height)
                 if not (width is None or height is None or width < 2 or height < 2):
-                    navigator_data = self._processor.get(self._filter_type).process(data.isig[y: y + height, x: x + width])
+                    navigator_data = self._process_signal(data, [(y, y + height), (x, x + width)],
+                                                          lambda: data.isig[y: y + height, x: x + width])
                 else:
                     navigator_data = None
             else:
@@ -492,6 +631,7 @@ class ViewerND(ParameterManager, ActionManager, ViewerBase):
             {'title': 'Set Nav axes:', 'name': 'set_nav_axes', 'type': 'action', 'visible': True},
         ]},
     ]
+    lazy_data_supported = True  # only the displayed slices and projections are read
 
     def __init__(self, parent: QtWidgets.QWidget = None, title=''):
         ViewerBase.__init__(self, parent, title=title)
@@ -2,7 +2,8 @@ import collections
 
 import numpy as np
 import pyqtgraph as pg
-from pymodaq.utils.plotting.utils.plot_utils import makeAlphaTriangles, makePolygons
+from pymodaq.utils.plotting.utils.plot_utils import (makeAlphaTriangles, makePolygons, TriangulationCache,
+                                                     ImagePyramid)
 from pyqtgraph import debug as debug, Point, functions as fn
 from qtpy import QtCore, QtGui
 
@@ -31,8 +32,75 @@ class PymodaqImage(pg.ImageItem):
 
 
 class UniformImageItem(PymodaqImage):
+    """Image item rendering large images from a multi-resolution pyramid
+
+    The displayed level is the one matching the screen resolution at the current zoom, and the
+    autolevels and histogram are computed from a decimated level. The full resolution image is still
+    the one stored in the image attribute (and used by get_val_at)
+    """
     def __init__(self, image=None, **kargs):
-        super().__init__(image, **kargs)
+        super().__init__(None, **kargs)
+        self._pyramid = ImagePyramid()
+        self._rendered_level = 0
+        if image is not None:
+            self.setImage(image)
+
+    def setImage(self, image=None, autoLevels=None, **kargs):
+        if image is not None:
+            self._pyramid.update(image)
+            if autoLevels is None:
+                autoLevels = 'levels' not in kargs
+            if autoLevels and self._pyramid.n_levels > 0:
+                level = self._pyramid.get_level(self._pyramid.level_for_size(kargs.pop('levelSamples', 2**16)))
+                mn, mx = np.nanmin(level), np.nanmax(level)
+                if mn == mx or np.isnan(mn) or np.isnan(mx):
+                    mn, mx = 0, 255
+                kargs['levels'] = [mn, mx]
+                autoLevels = False
+        super().setImage(image, autoLevels, **kargs)
+
+    def _get_display_level(self) -> int:
+        """Get the pyramid level matching the screen resolution"""
+        if self._pyramid.n_levels == 0:
+            return 0
+        xds, yds = self._computeDownsampleFactors()
+        if xds is None:
+            return self._rendered_level
+        return min(self._pyramid.level_for_downsampling(min(xds, yds)), self._pyramid.n_levels - 1)
+
+    def _with_level(self, level: int, method, *args, **kwargs):
+        """Call method with the image attribute temporarily replaced by a level of the pyramid"""
+        image = self.image
+        self.image = self._pyramid.get_level(level)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self.image = image
+
+    def render(self):
+        level = self._get_display_level()
+        self._rendered_level = level
+        if level == 0:
+            super().render()
+        else:  # paint draws the rendered qimage in the rect of the full resolution image
+            auto_downsample = self.autoDownsample
+            self.autoDownsample = False
+            try:
+                self._with_level(level, super().render)
+            finally:
+                self.autoDownsample = auto_downsample
+
+    def viewTransformChanged(self):
+        if self._pyramid.n_levels > 0 and self._get_display_level() != self._rendered_level:
+            self._renderRequired = True
+            self.update()
+        super().viewTransformChanged()
+
+    def getHistogram(self, bins='auto', step='auto', perChannel=False, targetImageSize=200, **kwds):
+        if self._pyramid.n_levels == 0 or step != 'auto':
+            return super().getHistogram(bins, step, perChannel, targetImageSize, **kwds)
+        level = self._pyramid.level_for_size(targetImageSize ** 2)
+        return self._with_level(level, super().getHistogram, bins, step, perChannel, targetImageSize, **kwds)
 
     def get_val_at(self, xy):
         """
@@ -81,6 +149,9 @@ class SpreadImageItem(PymodaqImage):
         self.triangulation = None
         self.tri_data = None
         self.mesh_pen = [255, 255, 255]
+        self._triangulation_cache = TriangulationCache()
+        self._polygons = None
+        self._polygons_version = -1
 
     def width(self):
         if self.image is None:
@@ -207,8 +278,12 @@ class SpreadImageItem(PymodaqImage):
         -------
         flaot: the mean value of the three points surrounding the point
         """
-        triangle_ind = self.triangulation.find_simplex(xy)
-        val = np.mean(self.image[self.triangulation.simplices[triangle_ind]], axis=0)[2]
+        triangulation = self._triangulation_cache.update(self.image[:, :2])
+        triangle_ind = self._triangulation_cache.find_simplex(xy)
+        if self.tri_data is not None and triangulation is self.triangulation and \
+                len(self.tri_data) == len(triangulation.simplices):
+            return self.tri_data[triangle_ind]
+        val = np.mean(self.image[triangulation.simplices[triangle_ind]], axis=0)[2]
         return val
 
     def render(self):
@@ -249,10 +324,14 @@ class SpreadImageItem(PymodaqImage):
         # Assume images are in column-major order for backward compatibility
         # (most images are in row-major order)
 
+        triangulation = self._triangulation_cache.update(image[:, :2])
         self.triangulation, self.tri_data, rgba_values, alpha = makeAlphaTriangles(image, lut=lut, levels=levels,
-                                                                                   useRGBA=True)
-        polygons = makePolygons(self.triangulation)
-        self.qimage = dict(polygons=polygons, values=rgba_values, alpha=alpha)
+                                                                                   useRGBA=True,
+                                                                                   triangulation=triangulation)
+        if self._polygons_version != self._triangulation_cache.version:  # only values changed otherwise
+            self._polygons = makePolygons(self.triangulation)
+            self._polygons_version = self._triangulation_cache.version
+        self.qimage = dict(polygons=self._polygons, values=rgba_values, alpha=alpha)
 
     def get_points_at(self, axis='x', val=0):
         """
@@ -12,6 +12,7 @@ from pymodaq.utils import math_utils as mutils
 from pymodaq.utils.managers.roi_manager import ROIManager, LinearROI, RectROI
 from pymodaq.utils.plotting.items.crosshair import Crosshair
 from pymodaq.utils.plotting.items.image import UniformImageItem
+from pymodaq.utils.plotting.utils.plot_utils import SpreadPointsIndex
 from pymodaq.utils.plotting.data_viewers.viewer1Dbasic import Viewer1DBasic
 from pymodaq.utils.logger import set_logger, get_module_name
 from pymodaq.utils.data import DataFromRoi, DataToExport, Axis, DataWithAxes
@@ -312,6 +313,7 @@ class Filter2DFromRois(Filter):
         self._graph_item = graph_item
         self.axes = (0, 1)
         self._ROIs = roi_manager.ROIs
+        self._spread_index = SpreadPointsIndex()
 
     def _filter_data(self, dwa: data_mod.DataFromPlugins) -> DataToExport:
         dte = DataToExport('ROI')
@@ -408,20 +410,12 @@ class Filter2DFromRois(Filter):
     #     return data, coords
 
     def get_xydata_spread(self, data, roi):
-        xvals = []
-        yvals = []
-        data_out = []
-        for ind in range(data.shape[0]):
-            # invoke the QPainterpath of the ROI (from the shape method)
-            if roi.shape().contains(QPointF(data.get_axis_from_index(0)[0].get_data()[ind] - roi.pos().x(),
-                                            data.get_axis_from_index(0)[1].get_data()[ind] - roi.pos().y())):
-                xvals.append(data.get_axis_from_index(0)[0].get_data()[ind])
-                yvals.append(data.get_axis_from_index(0)[1].get_data()[ind])
-                data_out.append(data[0][ind])
-        data_out = np.array(data_out)
-        xvals = np.array(xvals)
-        yvals = np.array(yvals)
-        return xvals, yvals, data_out
+        """Get the coordinates and values of the spread points within the ROI (the QPainterPath of its shape)"""
+        x_axis, y_axis = data.get_axis_from_index(0)[:2]
+        self._spread_index.update(x_axis.get_data(), y_axis.get_data())
+        indexes = self._spread_index.in_path(roi.shape().translated(roi.pos()))
+        points = self._spread_index.points[indexes]
+        return points[:, 0], points[:, 1], np.asarray(data[0])[indexes]
 
 
 class FourierFilterer(QObject):
@@ -3,7 +3,7 @@ from dataclasses import dataclass, field
 
 import copy
 from numbers import Real, Number
-from typing import List, Union, Tuple
+from typing import Dict, List, Union, Tuple
 from typing import Iterable as IterableType
 
 from easydict import EasyDict as edict
@@ -237,7 +237,252 @@ class QVector(QtCore.QLineF):
         return vec
 
 
-def makeAlphaTriangles(data, lut=None, levels=None, scale=None, useRGBA=False):
+class TriangulationCache:
+    """Delaunay triangulation of 2D points kept from one call to the other
+
+    The triangulation is recomputed only if the points changed. Points appended to the previous ones
+    (as during a spread scan) are added incrementally to the existing triangulation. The simplex found by
+    find_simplex is used as a first guess for the next call, making successive lookups of nearby positions
+    (crosshair) O(1).
+
+    Attributes
+    ----------
+    version: int
+        incremented each time the triangulation changes
+    """
+    def __init__(self):
+        self._points: np.ndarray = None
+        self._triangulation: Triangulation = None
+        self._last_simplex = -1
+        self.version = 0
+
+    @property
+    def triangulation(self) -> Triangulation:
+        return self._triangulation
+
+    def update(self, points: np.ndarray) -> Triangulation:
+        """Get the triangulation of the points, updating it if necessary
+
+        Parameters
+        ----------
+        points: ndarray
+            array of shape (N, 2)
+        """
+        points = np.asarray(points, dtype=float)
+        if self._triangulation is not None:
+            n_points = len(self._points)
+            if points.shape == self._points.shape and np.array_equal(points, self._points):
+                return self._triangulation
+            if len(points) > n_points and np.array_equal(points[:n_points], self._points):
+                try:
+                    self._triangulation.add_points(points[n_points:])
+                    self._set_points(points)
+                    return self._triangulation
+                except Exception:  # degenerated points, let's recompute it all
+                    pass
+        self._triangulation = Triangulation(points, incremental=True)
+        self._set_points(points)
+        return self._triangulation
+
+    def _set_points(self, points: np.ndarray):
+        self._points = points.copy()
+        self._last_simplex = -1
+        self.version += 1
+
+    def _contains(self, simplex: int, xy: np.ndarray, eps=1e-12) -> bool:
+        transform = self._triangulation.transform[simplex]
+        barycentric = transform[:2].dot(xy - transform[2])
+        return barycentric.min() >= -eps and barycentric.sum() <= 1 + eps
+
+    def find_simplex(self, xy) -> int:
+        """Get the index of the simplex containing the point xy, -1 if outside of the triangulation"""
+        xy = np.asarray(xy, dtype=float)
+        if self._last_simplex >= 0:
+            for simplex in [self._last_simplex] + list(self._triangulation.neighbors[self._last_simplex]):
+                if simplex >= 0 and self._contains(simplex, xy):
+                    self._last_simplex = simplex
+                    return simplex
+        self._last_simplex = int(self._triangulation.find_simplex(xy))
+        return self._last_simplex
+
+
+class ImagePyramid:
+    """Multi-resolution pyramid (mipmaps) of a 2D image
+
+    Level n is the image decimated by 2**n along both axes (mean of 2x2 blocks of level n-1, with the
+    dtype of the image). Levels are computed only when requested and reuse their buffers from one image
+    to the next, so that for a stream of frames only the levels actually displayed are computed, once
+    per frame.
+
+    Parameters
+    ----------
+    min_size: int
+        the levels are decimated until one of their dimensions would be smaller than min_size
+    """
+    def __init__(self, min_size: int = 16):
+        self.min_size = min_size
+        self._image: np.ndarray = None
+        self._levels: List[np.ndarray] = []
+        self._buffers: List[np.ndarray] = []
+        self._computed = 0
+
+    @property
+    def n_levels(self) -> int:
+        """int: the number of levels, including the full resolution image (level 0)"""
+        return len(self._levels)
+
+    @staticmethod
+    def is_applicable(image: np.ndarray) -> bool:
+        return image is not None and image.ndim == 2 and image.dtype.kind in 'uif'
+
+    def update(self, image: np.ndarray):
+        """Set a new full resolution image, the other levels being computed when requested"""
+        if not self.is_applicable(image):
+            self._image = None
+            self._levels = []
+            self._buffers = []
+            return
+        if self._image is None or image.shape != self._image.shape or image.dtype != self._image.dtype:
+            self._allocate(image)
+        self._image = image
+        self._levels[0] = image
+        self._computed = 1
+
+    def _allocate(self, image: np.ndarray):
+        if image.dtype.kind == 'f':
+            sum_dtype = image.dtype
+        elif image.dtype.itemsize <= 2:
+            sum_dtype = np.int32 if image.dtype.kind == 'i' else np.uint32
+        else:
+            sum_dtype = np.int64 if image.dtype.kind == 'i' else np.uint64
+        self._levels = [image]
+        self._buffers = [None]
+        shape = image.shape
+        while min(shape) // 2 >= self.min_size:
+            shape = (shape[0] // 2, shape[1] // 2)
+            self._buffers.append(np.empty(shape, dtype=sum_dtype))
+            self._levels.append(self._buffers[-1] if sum_dtype == image.dtype else np.empty(shape, image.dtype))
+
+    def get_level(self, level: int) -> np.ndarray:
+        """Get the image decimated by 2**level, the level being clipped to the available ones"""
+        if self._image is None:
+            return None
+        level = min(max(0, level), self.n_levels - 1)
+        for ind in range(self._computed, level + 1):
+            previous = self._levels[ind - 1]
+            rows, cols = self._buffers[ind].shape
+            buffer = self._buffers[ind]
+            np.add(previous[0:2 * rows:2, 0:2 * cols:2], previous[1:2 * rows:2, 0:2 * cols:2], out=buffer,
+                   dtype=buffer.dtype)
+            np.add(buffer, previous[0:2 * rows:2, 1:2 * cols:2], out=buffer, dtype=buffer.dtype)
+            np.add(buffer, previous[1:2 * rows:2, 1:2 * cols:2], out=buffer, dtype=buffer.dtype)
+            if buffer.dtype.kind == 'f':
+                buffer *= 0.25
+            else:
+                buffer //= 4
+                self._levels[ind][...] = buffer
+            self._computed = ind + 1
+        return self._levels[level]
+
+    def level_for_size(self, size: int) -> int:
+        """Get the finest level with at most size pixels"""
+        level = 0
+        while level < self.n_levels - 1 and self._levels[level].size > size:
+            level += 1
+        return level
+
+    @staticmethod
+    def level_for_downsampling(factor: float) -> int:
+        """Get the level matching a downsampling factor (number of image pixels per screen pixel)"""
+        return max(0, int(np.floor(np.log2(max(1., factor)))))
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Tell which points are inside a polygon (even-odd rule, as QPainterPath.contains)
+
+    Vectorized over the points, looping only over the polygon vertices
+
+    Parameters
+    ----------
+    points: ndarray
+        array of shape (N, 2) of the x, y coordinates
+    polygon: ndarray
+        array of shape (M, 2) of the vertices, the last one being connected to the first one
+
+    Returns
+    -------
+    ndarray of bool of shape (N,)
+    """
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros((len(points),), dtype=bool)
+    if len(polygon) < 3:
+        return inside
+    x_prev, y_prev = polygon[-1]
+    for x_vertex, y_vertex in polygon:
+        crossing = (y_vertex > y) != (y_prev > y)
+        if np.any(crossing):
+            x_crossing = x_vertex + (x_prev - x_vertex) * (y[crossing] - y_vertex) / (y_prev - y_vertex)
+            inside[crossing] ^= x[crossing] < x_crossing
+        x_prev, y_prev = x_vertex, y_vertex
+    return inside
+
+
+class SpreadPointsIndex:
+    """Spatial index of 2D spread points to select those within a region
+
+    The points are sorted along x once, a bounding box query is then a binary search plus a test of the
+    y coordinates of the points within the x range. The index is rebuilt only if the points changed.
+
+    Attributes
+    ----------
+    version: int
+        incremented each time the index is rebuilt
+    """
+    def __init__(self):
+        self._points: np.ndarray = None
+        self._order: np.ndarray = None
+        self._x_sorted: np.ndarray = None
+        self.version = 0
+
+    @property
+    def points(self) -> np.ndarray:
+        return self._points
+
+    def update(self, x: np.ndarray, y: np.ndarray):
+        """Set the x and y coordinates of the points, rebuilding the index if they changed"""
+        points = np.stack((np.asarray(x, dtype=float), np.asarray(y, dtype=float)), axis=1)
+        if self._points is not None and points.shape == self._points.shape and \
+                np.array_equal(points, self._points):
+            return
+        self._points = points
+        self._order = np.argsort(points[:, 0], kind='stable')
+        self._x_sorted = points[self._order, 0]
+        self.version += 1
+
+    def in_box(self, x_min: float, x_max: float, y_min: float, y_max: float) -> np.ndarray:
+        """Get the indexes (sorted) of the points within the bounding box (edges included)"""
+        start = np.searchsorted(self._x_sorted, x_min, side='left')
+        stop = np.searchsorted(self._x_sorted, x_max, side='right')
+        indexes = self._order[start:stop]
+        y = self._points[indexes, 1]
+        return np.sort(indexes[(y >= y_min) & (y <= y_max)])
+
+    def in_path(self, path: QtGui.QPainterPath) -> np.ndarray:
+        """Get the indexes (sorted) of the points within a QPainterPath (in the points coordinates)"""
+        rect = path.boundingRect()
+        indexes = self.in_box(rect.left(), rect.right(), rect.top(), rect.bottom())
+        if len(indexes) == 0:
+            return indexes
+        points = self._points[indexes]
+        inside = np.zeros((len(indexes),), dtype=bool)
+        scale = 1e4 / max(rect.width(), rect.height(), 1e-300)  # curves are flattened with a tolerance of 1 unit
+        for polygon in path.toFillPolygons(QtGui.QTransform.fromScale(scale, scale)):
+            vertices = np.array([(point.x(), point.y()) for point in polygon]) / scale
+            inside ^= points_in_polygon(points, vertices)
+        return indexes[inside]
+
+
+def makeAlphaTriangles(data, lut=None, levels=None, scale=None, useRGBA=False, triangulation=None):
     """
     Convert an array of values into an ARGB array suitable for building QImages,
     OpenGL textures, etc.
@@ -275,6 +520,7 @@ def makeAlphaTriangles(data, lut=None, levels=None, scale=None, useRGBA=False):
                    The default is False, which returns in ARGB order for use with QImage
                    (Note that 'ARGB' is a term used by the Qt documentation; the *actual* order
                    is BGRA).
+    triangulation  Optional triangulation of the points (see TriangulationCache), computed if None
     ============== ==================================================================================
     """
     points = data[:, :2]
@@ -284,10 +530,8 @@ def makeAlphaTriangles(data, lut=None, levels=None, scale=None, useRGBA=False):
     if points.ndim not in (2,):
         raise TypeError("points must be 1D sequence of points")
 
-    tri = Triangulation(points)
-    tri_data = np.zeros((len(tri.simplices),))
-    for ind, pts in enumerate(tri.simplices):
-        tri_data[ind] = np.mean(values[pts])
+    tri = Triangulation(points) if triangulation is None else triangulation
+    tri_data = np.mean(values[tri.simplices], axis=1)
     data = tri_data.copy()
     if lut is not None and not isinstance(lut, np.ndarray):
         lut = np.array(lut)
@@ -405,19 +649,32 @@ def makeAlphaTriangles(data, lut=None, levels=None, scale=None, useRGBA=False):
 
 def makePolygons(tri):
     polygons = []
-    for seq in tri.points[tri.simplices]:
+    for seq in tri.points[tri.simplices].tolist():
         polygons.append(QtGui.QPolygonF([QtCore.QPointF(*s) for s in seq] + [QtCore.QPointF(*seq[0])]))
     return polygons
 
 
 class Data0DWithHistory:
-    """Object to store scalar values and keep a history of a given length to them"""
+    """Object to store scalar values and keep a history of a given length to them
+
+    Each history is a preallocated circular buffer of twice the history length where every value is
+    written twice (at index i and i + length), so that adding a value is O(1) and the ordered history
+    is always a contiguous view of the buffer (see datas and xaxis). The minimum and maximum values
+    since the last clear are also updated on the fly (see mins and maxs)
+
+    The arrays returned by datas and xaxis are views on the buffers and are therefore modified by
+    further calls to add_datas, copy them if they have to be kept
+    """
     def __init__(self, Nsamples=200):
         super().__init__()
-        self._datas = dict([])
+        self._buffers: Dict[str, np.ndarray] = dict([])
+        self._mins: Dict[str, float] = dict([])
+        self._maxs: Dict[str, float] = dict([])
         self.last_data: data_mod.DataRaw = None
         self._Nsamples = Nsamples
-        self._xaxis = None
+        self._xaxis_buffer = np.zeros((2 * Nsamples,))
+        self._index = 0  # position of the next value in the circular buffers
+        self._count = 0  # number of values in the circular buffers
         self._data_length = 0
 
     @property
@@ -430,12 +687,31 @@ class Data0DWithHistory:
 
     @length.setter
     def length(self, history_length: int):
-        if history_length > 0:
-            self._Nsamples = history_length
+        history_length = int(history_length)
+        if history_length > 0 and history_length != self._Nsamples:
+            self._resize(history_length)
 
     def __len__(self):
         return self.length
 
+    def _resize(self, history_length: int):
+        """Reallocate the circular buffers keeping the last values"""
+        count = min(self._count, history_length)
+        xaxis = self.xaxis[self._count - count:]
+        self._xaxis_buffer = self._reallocate(xaxis, history_length)
+        self._buffers = {key: self._reallocate(data[self._count - count:], history_length)
+                         for key, data in self.datas.items()}
+        self._Nsamples = history_length
+        self._count = count
+        self._index = count % history_length
+
+    @staticmethod
+    def _reallocate(data: np.ndarray, history_length: int) -> np.ndarray:
+        buffer = np.zeros((2 * history_length,))
+        buffer[:len(data)] = data
+        buffer[history_length:history_length + len(data)] = data
+        return buffer
+
     @dispatch(data_mod.DataWithAxes)
     def add_datas(self, data: data_mod.DataWithAxes):
         self.last_data = data
@@ -462,40 +738,61 @@ class Data0DWithHistory:
         ----------
         datas: (dict) dictionaary of floats or np.array(float)
         """
-        if datas.keys() != self._datas.keys():
+        if datas.keys() != self._buffers.keys():
             self.clear_data()
+            self._buffers = {data_key: np.zeros((2 * self._Nsamples,)) for data_key in datas}
 
-        self._data_length += 1
+        index = self._index
+        mirror = index + self._Nsamples
+        for data_key, data in datas.items():
+            value = float(np.ravel(data)[0])
+            buffer = self._buffers[data_key]
+            buffer[index] = value
+            buffer[mirror] = value
+            if self._data_length == 0:
+                self._mins[data_key] = value
+                self._maxs[data_key] = value
+            else:
+                self._mins[data_key] = min(self._mins[data_key], value)
+                self._maxs[data_key] = max(self._maxs[data_key], value)
+        self._xaxis_buffer[index] = self._data_length
+        self._xaxis_buffer[mirror] = self._data_length
 
-        if self._data_length > self._Nsamples:
-            self._xaxis += 1
-        else:
-            self._xaxis = np.linspace(0, self._data_length, self._data_length, endpoint=False)
+        self._data_length += 1
+        self._index = (index + 1) % self._Nsamples
+        self._count = min(self._count + 1, self._Nsamples)
 
-        for data_key, data in datas.items():
-            if not isinstance(data, np.ndarray):
-                data = np.array([data])
+    def _ordered_view(self, buffer: np.ndarray) -> np.ndarray:
+        start = (self._index - self._count) % self._Nsamples
+        return buffer[start:start + self._count]
 
-            if self._data_length == 1:
-                self._datas[data_key] = data
-            else:
-                self._datas[data_key] = np.concatenate((self._datas[data_key], data))
+    @property
+    def datas(self) -> Dict[str, np.ndarray]:
+        """The ordered histories as views on the circular buffers"""
+        return {data_key: self._ordered_view(buffer) for data_key, buffer in self._buffers.items()}
 
-            if self._data_length > self._Nsamples:
-                self._datas[data_key] = self._datas[data_key][1:]
+    @property
+    def xaxis(self) -> np.ndarray:
+        """The indexes of the samples in the history as a view on a circular buffer"""
+        return self._ordered_view(self._xaxis_buffer)
 
     @property
-    def datas(self):
-        return self._datas
+    def mins(self) -> Dict[str, float]:
+        """The minimum values since the last clear"""
+        return self._mins
 
     @property
-    def xaxis(self):
-        return self._xaxis
+    def maxs(self) -> Dict[str, float]:
+        """The maximum values since the last clear"""
+        return self._maxs
 
     def clear_data(self):
-        self._datas = dict([])
+        self._buffers = dict([])
+        self._mins = dict([])
+        self._maxs = dict([])
+        self._index = 0
+        self._count = 0
         self._data_length = 0
-        self._xaxis = np.array([])
 
 
 class View_cust(pg.ViewBox):
@@ -17,9 +17,8 @@ from pymodaq.utils.managers.parameter_manager import ParameterManager, Parameter
 from pymodaq.utils.parameter.utils import get_param_path, iter_children_params
 from pymodaq.utils.factory import ObjectFactory
 from pymodaq.utils.logger import set_logger, get_module_name
-from pymodaq.utils.data import Axis, DataDistribution
+from pymodaq.utils.data import Axis, DataDistribution, LazyArray
 from pymodaq.utils.abstract import abstract_attribute
-from pymodaq.utils import math_utils as mutils
 from pymodaq.utils import config as configmod
 from pymodaq.utils.scanner.scan_config import ScanConfig
 
@@ -43,6 +42,40 @@ class ScanParameterManager(ParameterManager):
         self.settings_tree.setMinimumHeight(150)
 
 
+class LazyScanArray(LazyArray):
+    """Positions (or axes indexes) of a scan, one row per scan step, computed on demand
+
+    Parameters
+    ----------
+    n_steps: int
+    n_axes: int
+    func: Callable
+        computing the rows from a 1D ndarray of scan step indexes
+    dtype: np.dtype
+    """
+
+    def __init__(self, n_steps: int, n_axes: int, func: Callable[[np.ndarray], np.ndarray], dtype=float):
+        self._shape = (n_steps, n_axes)
+        self._func = func
+        self._dtype = np.dtype(dtype)
+
+    @property
+    def shape(self) -> Tuple[int]:
+        return self._shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    def _read(self, item: Tuple[Union[int, slice]]) -> np.ndarray:
+        if isinstance(item[0], slice):
+            steps = np.arange(*item[0].indices(self.shape[0]))
+        else:
+            steps = np.array([item[0]])
+        values = np.asarray(self._func(steps), dtype=self.dtype)[:, item[1]]
+        return values if isinstance(item[0], slice) else values[0]
+
+
 class ScannerBase(ScanParameterManager, metaclass=ABCMeta):
     """Abstract class for all Scanners
 
@@ -54,7 +87,7 @@ class ScannerBase(ScanParameterManager, metaclass=ABCMeta):
         String defining the second identifier
     params: List[dict]
         list specifying the scanner set of parameters to properly configure all the scan steps
-    positions: np.ndarray
+    positions: np.ndarray or LazyScanArray
         ndarray of all positions. First dimension is number of actuators, second is positions of a given actuator at
         each step
     axes_unique: List[np.ndarray]
@@ -76,6 +109,7 @@ class ScannerBase(ScanParameterManager, metaclass=ABCMeta):
     n_axes: int = abstract_attribute()
     distribution: DataDistribution = abstract_attribute()
     save_settings = True
+    lazy_positions = False  # True if the positions of large scans can be computed on demand, see set_scan_from_grid
 
     def __init__(self, actuators: List[DAQ_Move] = None):
         super().__init__()
@@ -151,12 +185,11 @@ class ScannerBase(ScanParameterManager, metaclass=ABCMeta):
             if len(positions.shape) == 1:
                 positions = np.expand_dims(positions, 1)
             axes_unique = []
-            for ax in positions.T:
-                axes_unique.append(np.unique(ax))
             axes_indexes = np.zeros_like(positions, dtype=int)
-            for ind in range(positions.shape[0]):
-                for ind_pos, pos in enumerate(positions[ind]):
-                    axes_indexes[ind, ind_pos] = mutils.find_index(axes_unique[ind_pos], pos)[0][0]
+            for ind_pos, ax in enumerate(positions.T):
+                unique, indexes = np.unique(ax, return_inverse=True)
+                axes_unique.append(unique)
+                axes_indexes[:, ind_pos] = indexes.reshape(-1)
 
             self.n_axes = len(axes_unique)
             self.axes_unique = axes_unique
@@ -164,6 +197,59 @@ class ScannerBase(ScanParameterManager, metaclass=ABCMeta):
             self.positions = positions
             self.n_steps = positions.shape[0]
 
+    def get_grid_indexes(self, steps: np.ndarray) -> np.ndarray:
+        """To be reimplemented by the scanners using set_scan_from_grid. Indexes of the positions within the
+        grid values of each axis
+
+        Parameters
+        ----------
+        steps: np.ndarray
+            1D array of scan step indexes
+
+        Returns
+        -------
+        np.ndarray: the grid indexes of shape (len(steps), n_axes)
+        """
+        raise NotImplementedError
+
+    def set_scan_from_grid(self, grid: List[np.ndarray], n_steps: int):
+        """Set mandatory attributes from the values each axis can take and the get_grid_indexes method
+
+        If the scanner supports lazy positions and the number of steps is above the configured limit, positions and
+        axes_indexes are LazyScanArray computing their values on demand from get_grid_indexes.
+
+        Parameters
+        ----------
+        grid: list of ndarray
+            the positions each axis can take
+        n_steps: int
+            the number of scan steps
+        """
+        self._grid = [np.asarray(values) for values in grid]
+        uniques = [np.unique(values, return_inverse=True) for values in self._grid]
+        self._grid_to_unique = [inverse.reshape(-1) for _, inverse in uniques]
+        self.n_axes = len(grid)
+        self.axes_unique = [unique for unique, _ in uniques]
+        self.n_steps = n_steps
+
+        positions = LazyScanArray(n_steps, self.n_axes, self._get_positions_from_steps,
+                                  np.result_type(*self._grid))
+        axes_indexes = LazyScanArray(n_steps, self.n_axes, self._get_axes_indexes_from_steps, int)
+        if not self.lazy_positions or n_steps <= config('scan', 'lazy_positions_steps'):
+            positions = np.asarray(positions)
+            axes_indexes = np.asarray(axes_indexes)
+        self.positions = positions
+        self.axes_indexes = axes_indexes
+
+    def _get_positions_from_steps(self, steps: np.ndarray) -> np.ndarray:
+        grid_indexes = self.get_grid_indexes(steps)
+        return np.stack([values[grid_indexes[:, ind]] for ind, values in enumerate(self._grid)], axis=-1)
+
+    def _get_axes_indexes_from_steps(self, steps: np.ndarray) -> np.ndarray:
+        grid_indexes = self.get_grid_indexes(steps)
+        return np.stack([to_unique[grid_indexes[:, ind]] for ind, to_unique in enumerate(self._grid_to_unique)],
+                        axis=-1)
+
     @abstractmethod
     def evaluate_steps(self):
         """To be reimplemented. Quick evaluation of the number of steps to stop the calculation if the evaluation os above the
@@ -63,6 +63,7 @@ class Scan2DLinear(Scan2DBase):
     distribution = DataDistribution['uniform']
     scan_type = 'Scan2D'
     scan_subtype = 'Linear'
+    lazy_positions = True
 
     def __init__(self, actuators: List['DAQ_Move'] = None, **_ignored):
         super().__init__(actuators=actuators)
@@ -92,12 +93,10 @@ class Scan2DLinear(Scan2DBase):
             axis_1_unique = mutils.linspace_step(starts[0], stops[0], steps[0])
             axis_2_unique = mutils.linspace_step(starts[1], stops[1], steps[1])
 
-            positions = []
-            for ind_x, pos1 in enumerate(axis_1_unique):
-                for ind_y, pos2 in enumerate(axis_2_unique):
-                    positions.append([pos1, pos2])
+        self.set_scan_from_grid([axis_1_unique, axis_2_unique], len(axis_1_unique) * len(axis_2_unique))
 
-        self.get_info_from_positions(np.array(positions))
+    def get_grid_indexes(self, steps: np.ndarray) -> np.ndarray:
+        return np.stack(np.divmod(steps, len(self._grid[1])), axis=-1)
 
     def set_settings_titles(self):
         if len(self.actuators) == 2:
@@ -136,32 +135,17 @@ class Scan2DLinearBF(Scan2DLinear):
     def __init__(self, actuators: List['DAQ_Move'] = None, **_ignored):
         super().__init__(actuators=actuators)
 
-    def set_scan(self):
-        starts, stops, steps = self.get_pos()
-        if np.any(np.abs(steps) < 1e-12) or \
-                np.any(np.sign(stops - starts) != np.sign(steps)) or \
-                np.any(starts == stops):
-
-            return np.array([starts])
-
-        else:
-            axis_1_unique = mutils.linspace_step(starts[0], stops[0], steps[0])
-            axis_2_unique = mutils.linspace_step(starts[1], stops[1], steps[1])
-
-            positions = []
-            for ind_x, pos1 in enumerate(axis_1_unique):
-                for ind_y, pos2 in enumerate(axis_2_unique):
-                    if not mutils.odd_even(ind_x):
-                        positions.append([pos1, pos2])
-                    else:
-                        positions.append([pos1, axis_2_unique[len(axis_2_unique) - ind_y - 1]])
-
-        self.get_info_from_positions(np.array(positions))
+    def get_grid_indexes(self, steps: np.ndarray) -> np.ndarray:
+        indexes = super().get_grid_indexes(steps)
+        backward = mutils.odd_even(indexes[:, 0])  # odd lines are scanned backward
+        indexes[backward, 1] = len(self._grid[1]) - 1 - indexes[backward, 1]
+        return indexes
 
 
 @ScannerFactory.register()
 class Scan2DRandom(Scan2DLinear):
     scan_subtype = 'Random'
+    lazy_positions = False
 
     def __init__(self, actuators: List['DAQ_Move'] = None, **_ignored):
         super().__init__(actuators=actuators)
@@ -239,43 +223,35 @@ class Scan2DSpiral(Scan2DLinear):
         starts, rmaxs, rsteps = self.get_pos()
 
         if np.any(np.array(rmaxs) == 0) or np.any(np.abs(rmaxs) < 1e-12) or np.any(np.abs(rsteps) < 1e-12):
-            positions = np.array([starts])
+            self.get_info_from_positions(np.array([starts]))
 
         else:
-            Nlin = self.settings['npts_by_axis'] / 2
-            axis_1_indexes = [0]
-            axis_2_indexes = [0]
-            ind = 0
-            flag = True
-
-            while flag:
-                if mutils.odd_even(ind):
-                    step = 1
-                else:
-                    step = -1
-                if flag:
-
-                    for ind_step in range(ind):
-                        axis_1_indexes.append(axis_1_indexes[-1] + step)
-                        axis_2_indexes.append(axis_2_indexes[-1])
-                        if len(axis_1_indexes) >= (2 * Nlin + 1) ** 2:
-                            flag = False
-                            break
-                if flag:
-                    for ind_step in range(ind):
-                        axis_1_indexes.append(axis_1_indexes[-1])
-                        axis_2_indexes.append(axis_2_indexes[-1] + step)
-                        if len(axis_1_indexes) >= (2 * Nlin + 1) ** 2:
-                            flag = False
-                            break
-                ind += 1
-
-            positions = []
-            for ind in range(len(axis_1_indexes)):
-                positions.append(np.array([axis_1_indexes[ind] * rsteps[0] + starts[0],
-                                           axis_2_indexes[ind] * rsteps[1] + starts[1]]))
-
-        self.get_info_from_positions(np.array(positions))
+            n_points = int(np.ceil((self.settings['npts_by_axis'] + 1) ** 2))
+            # the spiral turns are made of segments of increasing length, along axis1 then axis2, going forward
+            # for odd lengths and backward for even ones
+            lengths = np.arange(1, int(np.ceil(np.sqrt(n_points))) + 1)
+            segment_lengths = np.repeat(lengths, 2)
+            segment_moves = np.zeros((len(segment_lengths), 2), dtype=int)
+            segment_moves[np.arange(len(segment_lengths)), np.tile([0, 1], len(lengths))] = \
+                np.repeat(np.where(mutils.odd_even(lengths), 1, -1), 2)
+            ends = np.cumsum(segment_lengths[:, None] * segment_moves, axis=0)
+
+            self._segment_moves = segment_moves
+            self._segment_starts = np.concatenate(([0], np.cumsum(segment_lengths)[:-1]))  # scan index
+            self._segment_origins = np.concatenate(([[0, 0]], ends[:-1]))  # spiral indexes at the segment starts
+            self._grid_offset = np.zeros((2,), dtype=int)
+            corners = self.get_grid_indexes(np.append(self._segment_starts[self._segment_starts < n_points],
+                                                      n_points - 1))
+            self._grid_offset = np.min(corners, axis=0)
+            grid = [np.arange(self._grid_offset[ind], np.max(corners[:, ind]) + 1) * rsteps[ind] + starts[ind]
+                    for ind in range(2)]
+            self.set_scan_from_grid(grid, n_points)
+
+    def get_grid_indexes(self, steps: np.ndarray) -> np.ndarray:
+        segments = np.searchsorted(self._segment_starts, steps, side='right') - 1
+        indexes = (self._segment_origins[segments] +
+                   (steps - self._segment_starts[segments])[:, None] * self._segment_moves[segments])
+        return indexes - self._grid_offset
 
     def update_from_scan_selector(self, scan_selector: Selector):
         coordinates = scan_selector.get_coordinates()
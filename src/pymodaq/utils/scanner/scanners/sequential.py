@@ -151,6 +151,16 @@ class SequentialScanner(ScannerBase):
                 state.append(pos < stop)
         return state
 
+    @staticmethod
+    def axis_positions(start: float, stop: float, step: float) -> np.ndarray:
+        """Get the positions of an axis, accumulating step from start as long as stop is not overshot"""
+        if step == 0:
+            return np.array([start])
+        n_positions = int(np.floor((stop - start) / step)) + 3  # so that the last one overshoots stop
+        positions = np.cumsum(np.concatenate(([start], np.full((n_positions - 1,), step))))
+        above = positions > stop if step >= 0 else positions < stop
+        return positions[:np.argmax(above)] if np.any(above) else positions
+
     def update_table_view(self):
         self.table_view.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeToContents)
         self.table_view.horizontalHeader().setStretchLastSection(True)
@@ -170,24 +180,12 @@ class SequentialScanner(ScannerBase):
 
     def set_scan(self):
         starts, stops, steps = self.get_pos()
-        all_positions = [starts.copy()]
-        positions = starts.copy()
-        state = self.pos_above_stops(positions, steps, stops)
-        if len(state) != 0:
-            while not state[0]:
-                if not np.any(np.array(state)):
-                    positions[-1] += steps[-1]
-
-                else:
-                    indexes_true = np.where(np.array(state))
-                    positions[indexes_true[-1][0]] = starts[indexes_true[-1][0]]
-                    positions[indexes_true[-1][0] - 1] += steps[indexes_true[-1][0] - 1]
-
-                state = self.pos_above_stops(positions, steps, stops)
-                if not np.any(np.array(state)):
-                    all_positions.append(positions.copy())
-
-        self.get_info_from_positions(np.array(all_positions))
+        if starts.size == 0 or np.any(self.pos_above_stops(starts, steps, stops)):
+            self.get_info_from_positions(np.array([starts]))
+        else:
+            axes_positions = [self.axis_positions(start, stop, step) for start, stop, step in zip(starts, stops, steps)]
+            positions = np.stack(np.meshgrid(*axes_positions, indexing='ij'), axis=-1)  # the last axis is the fastest
+            self.get_info_from_positions(positions.reshape((-1, starts.size)))
 
     def get_nav_axes(self) -> List[Axis]:
         return [Axis(label=f'{act.title}', units=act.units, data=self.axes_unique[ind], index=ind)
@@ -66,7 +66,7 @@ class ScanInfo:
 
     Nsteps: int
         Number of steps of the scan
-    positions: ndarray
+    positions: ndarray or LazyScanArray
         multidimensional array. the first dimension has a length of Nsteps and each element is an actuator position
     positions_indexes: ndarray
         multidimensional array of Nsteps 0th dimension length where each element is the index
@@ -81,7 +81,7 @@ class ScanInfo:
     ----------
     Nsteps: int
         Number of steps of the scan
-    positions: ndarray
+    positions: ndarray or LazyScanArray
         multidimensional array. the first dimension has a length of Nsteps and each element is an actuator position
     positions_indexes: ndarray
         multidimensional array of Nsteps 0th dimension length where each element is the index
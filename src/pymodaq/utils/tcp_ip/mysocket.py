@@ -4,18 +4,51 @@ Created the 26/10/2023
 
 @author: Sebastien Weber
 """
+from collections import deque
+from itertools import islice
 import socket
-from typing import Union
+import time
+from typing import Union, List
 
-from pymodaq.utils.tcp_ip.serializer import Serializer
+from pymodaq.utils.tcp_ip.serializer import Serializer, SchemaCache, PayloadCompressor, SEGMENT
+
+
+SENDMSG_MAX_SEGMENTS = 512  # stay below the IOV_MAX limit of the OS
+RECV_CHUNK_SIZE = 65536  # maximum number of bytes read from the socket by a single recv call
 
 
 class Socket:
     """Custom Socket wrapping the built-in one and added functionalities to
-    make sure message have been sent and received entirely"""
-    def __init__(self, socket: socket.socket = None):
+    make sure message have been sent and received entirely
+
+    Received bytes are read into a receive buffer reused from one field to the other and
+    statistics about the link efficiency are accumulated (see :meth:`statistics`). A field is one
+    read of the deserializer (a length, a string, an array...), a message being made of several fields
+
+    Parameters
+    ----------
+    socket: socket.socket
+        the built-in socket to wrap
+    chunk_size: int
+        the maximum number of bytes read from the socket by a single recv call
+
+    Attributes
+    ----------
+    schema_cache: SchemaCache
+        None by default. Set once both ends of the connection agreed to transfer DataToExport
+        objects as schema references, see :class:`~pymodaq.utils.tcp_ip.serializer.SchemaCache`
+    compressor: PayloadCompressor
+        None by default. Set once both ends of the connection agreed on a compression codec for
+        the ndarray payloads, see :class:`~pymodaq.utils.tcp_ip.serializer.PayloadCompressor`
+    """
+    def __init__(self, socket: socket.socket = None, chunk_size: int = RECV_CHUNK_SIZE):
         super().__init__()
         self._socket = socket
+        self.chunk_size = chunk_size
+        self._recv_buffer = bytearray()
+        self.schema_cache: SchemaCache = None
+        self.compressor: PayloadCompressor = None
+        self.reset_statistics()
 
     def __eq__(self, other_obj):
         if isinstance(other_obj, Socket):
@@ -26,6 +59,55 @@ class Socket:
     def socket(self):
         return self._socket
 
+    @property
+    def received_bytes(self) -> int:
+        """Total number of bytes received since the last reset"""
+        return self._received_bytes
+
+    @property
+    def recv_calls(self) -> int:
+        """Total number of recv system calls since the last reset"""
+        return self._recv_calls
+
+    @property
+    def received_fields(self) -> int:
+        """Total number of fields (check_received_length or check_received_into calls) since the last
+        reset"""
+        return self._received_fields
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Mean receiving rate, only counting the time spent within the receiving methods"""
+        if self._receiving_time == 0.:
+            return 0.
+        return self._received_bytes / self._receiving_time
+
+    @property
+    def syscalls_per_field(self) -> float:
+        """Mean number of recv system calls needed to get a field"""
+        if self._received_fields == 0:
+            return 0.
+        return self._recv_calls / self._received_fields
+
+    def reset_statistics(self):
+        self._received_bytes = 0
+        self._recv_calls = 0
+        self._received_fields = 0
+        self._receiving_time = 0.
+
+    def statistics(self) -> dict:
+        """Get the link efficiency statistics as a dictionary
+
+        If a compressor is set, its statistics are given under the 'compression' key
+        """
+        statistics = dict(received_bytes=self.received_bytes, recv_calls=self.recv_calls,
+                          received_fields=self.received_fields,
+                          bytes_per_second=self.bytes_per_second,
+                          syscalls_per_field=self.syscalls_per_field)
+        if self.compressor is not None:
+            statistics['compression'] = self.compressor.statistics()
+        return statistics
+
     def bind(self, *args, **kwargs):
         return self.socket.bind(*args, **kwargs)
 
@@ -37,7 +119,7 @@ class Socket:
 
     def accept(self):
         sock, addr = self.socket.accept()
-        return Socket(sock), addr
+        return Socket(sock, chunk_size=self.chunk_size), addr
 
     def connect(self, *args, **kwargs):
         return self.socket.connect(*args, **kwargs)
@@ -67,14 +149,44 @@ class Socket:
         while sended < len(data_bytes):
             sended += self.socket.send(data_bytes[sended:])
 
+    def check_sended_segments(self, segments: List[SEGMENT]):
+        """
+        Make sure all segments are sent through the socket, one after the other
+
+        Use a scatter-gather sendmsg call if available on the platform so that the segments don't
+        have to be concatenated before being sent.
+
+        Parameters
+        ----------
+        segments: list of bytes or memoryview
+        """
+        views = deque(view for view in (memoryview(segment).cast('B') for segment in segments)
+                      if view.nbytes != 0)
+        if hasattr(self.socket, 'sendmsg'):
+            while len(views) != 0:
+                sended = self.socket.sendmsg(list(islice(views, SENDMSG_MAX_SEGMENTS)))
+                while sended > 0:
+                    if sended >= views[0].nbytes:
+                        sended -= views.popleft().nbytes
+                    else:
+                        views[0] = views[0][sended:]
+                        sended = 0
+        else:
+            for view in views:
+                sended = 0
+                while sended < view.nbytes:
+                    sended += self.socket.send(view[sended:])
+
     def check_sended_with_serializer(self, obj: object):
-        """ Convenience function to convert permitted objects to bytes and then use the check_sended method
+        """ Convenience function to convert permitted objects to bytes segments and then use the
+        check_sended_segments method
 
         For a list of allowed objects, see :meth:`Serializer.to_bytes`
         """
-        self.check_sended(Serializer(obj).to_bytes())
+        self.check_sended_segments(Serializer(obj, schema_cache=self.schema_cache,
+                                              compressor=self.compressor).to_segments())
 
-    def check_received_length(self, length) -> bytes:
+    def check_received_length(self, length) -> memoryview:
         """
         Make sure all bytes (length) that should be received are received through the socket
 
@@ -85,24 +197,53 @@ class Socket:
 
         Returns
         -------
-        bytes
+        memoryview: a view of the receive buffer, only valid until the next receiving call. Copy it
+            (bytes(view)) to keep the received bytes
         """
         if not isinstance(length, int):
             raise TypeError(f'{length} should be an integer, not a {type(length)}')
 
-        mess_length = 0
-        data_bytes = b''
-        while mess_length < length:
-            if mess_length < length - 4096:
-                data_bytes_tmp = self.socket.recv(4096)
-            else:
-                data_bytes_tmp = self.socket.recv(length - mess_length)
-            mess_length += len(data_bytes_tmp)
-            data_bytes += data_bytes_tmp
-        # print(data_bytes)
-        return data_bytes
-
-    def get_first_nbytes(self, length: int) -> bytes:
+        if len(self._recv_buffer) < length:
+            self._recv_buffer = bytearray(length)
+        view = memoryview(self._recv_buffer)[:length]
+        self._receive_into(view)
+        return view
+
+    def check_received_into(self, buffer: Union[bytearray, memoryview]) -> int:
+        """
+        Make sure the buffer is entirely filled with bytes received through the socket
+
+        The bytes are directly written into the buffer memory
+
+        Parameters
+        ----------
+        buffer: bytearray or memoryview
+            a writable buffer whose length is the number of bytes to be read from the socket
+
+        Returns
+        -------
+        int: the number of bytes received
+        """
+        return self._receive_into(memoryview(buffer).cast('B'))
+
+    def _receive_into(self, view: memoryview) -> int:
+        """Fill the view with recv_into calls of at most chunk_size bytes and update the
+        statistics"""
+        start = time.perf_counter()
+        received = 0
+        while received < view.nbytes:
+            nbytes = self.socket.recv_into(view[received:], min(self.chunk_size,
+                                                                view.nbytes - received))
+            self._recv_calls += 1
+            if nbytes == 0:
+                raise ConnectionAbortedError('The socket connection has been closed while receiving')
+            received += nbytes
+        self._receiving_time += time.perf_counter() - start
+        self._received_bytes += received
+        self._received_fields += 1
+        return received
+
+    def get_first_nbytes(self, length: int) -> memoryview:
         """ Read the first N bytes from the socket
 
         Parameters
@@ -112,7 +253,20 @@ class Socket:
 
         Returns
         -------
-        bytes: the read bytes string
+        memoryview: the read bytes, see :meth:`check_received_length`
         """
         return self.check_received_length(length)
 
+    def get_first_nbytes_into(self, buffer: Union[bytearray, memoryview]) -> int:
+        """ Read the first bytes from the socket directly into a buffer
+
+        Parameters
+        ----------
+        buffer: bytearray or memoryview
+            a writable buffer whose length is the number of bytes to be read from the socket
+
+        Returns
+        -------
+        int: the number of bytes received
+        """
+        return self.check_received_into(buffer)
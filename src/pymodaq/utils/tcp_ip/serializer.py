@@ -4,9 +4,12 @@ Created the 20/10/2023
 
 @author: Sebastien Weber
 """
+import copy
 from base64 import b64encode, b64decode
 import numbers
-from typing import Tuple, List, Union, TYPE_CHECKING, Iterable
+import time
+from typing import Tuple, List, Union, TYPE_CHECKING, Iterable, Optional
+import zlib
 
 
 import numpy as np
@@ -30,24 +33,62 @@ SERIALIZABLE = Union[
     DataToExport,
 ]
 
+SEGMENT = Union[bytes, memoryview]
+
+ZERO_COPY_MIN_SIZE = 65536  # arrays smaller than this (in bytes) are merged with the headers
+
+COMPRESSION_CODECS = {'zlib': (lambda data: zlib.compress(data, 1), zlib.decompress)}
+try:
+    import lz4.frame
+    COMPRESSION_CODECS['lz4'] = (lz4.frame.compress, lz4.frame.decompress)
+except ImportError:
+    pass
+try:
+    import zstandard
+    COMPRESSION_CODECS['zstd'] = (lambda data: zstandard.ZstdCompressor().compress(data),
+                                  lambda data: zstandard.ZstdDecompressor().decompress(data))
+except ImportError:
+    pass
+
+
+def available_codecs() -> List[str]:
+    """Get the names of the compression codecs installed in the environment"""
+    return list(COMPRESSION_CODECS.keys())
+
 
 class SocketString:
     """Mimic the Socket object but actually using a bytes string not a socket connection
 
-    Implements a minimal interface of two methods
+    Implements a minimal interface of three methods. The bytes string is never modified, a cursor
+    is advanced on each read so that reading the whole string is linear in its length.
 
     Parameters
     ----------
-    bytes_string: bytes
+    bytes_string: bytes, bytearray or memoryview
 
     See Also
     --------
     :class:`~pymodaq.utils.tcp_ip.mysocket.Socket`
     """
-    def __init__(self, bytes_string: bytes):
-        self._bytes_string = bytes_string
+    def __init__(self, bytes_string: Union[bytes, bytearray, memoryview]):
+        self._bytes_string = memoryview(bytes_string).cast('B')
+        self._cursor = 0
+
+    @property
+    def cursor(self) -> int:
+        """The position of the next byte to be read"""
+        return self._cursor
 
-    def check_received_length(self, length: int) -> bytes:
+    def remaining(self) -> int:
+        """The number of bytes not yet read"""
+        return self._bytes_string.nbytes - self._cursor
+
+    def _advance(self, length: int) -> memoryview:
+        view = self._bytes_string[self._cursor:self._cursor + length]
+        self._cursor += view.nbytes
+        return view
+
+    def check_received_length(self, length: int) -> memoryview:
         """
         Make sure all bytes (length) that should be received are received through the socket.
 
@@ -60,13 +101,11 @@ class SocketString:
 
         Returns
         -------
-        bytes
+        memoryview: a view of the underlying bytes string (no copy)
         """
-        data = self._bytes_string[0:length]
-        self._bytes_string = self._bytes_string[length:]
-        return data
+        return self._advance(length)
 
-    def get_first_nbytes(self, length: int) -> bytes:
+    def get_first_nbytes(self, length: int) -> memoryview:
         """ Read the first N bytes from the socket
 
         Parameters
@@ -76,19 +115,177 @@ class SocketString:
 
         Returns
         -------
-        bytes
-            the read bytes string
+        memoryview
+            the read bytes
         """
         return self.check_received_length(length)
 
+    def get_first_nbytes_into(self, buffer: Union[bytearray, memoryview]) -> int:
+        """ Fill the buffer with its length of first bytes from the bytes string
+
+        Parameters
+        ----------
+        buffer: bytearray or memoryview
+            a writable buffer whose length is the number of bytes to read
+
+        Returns
+        -------
+        int: the number of bytes written into the buffer
+        """
+        view = memoryview(buffer).cast('B')
+        data = self._advance(view.nbytes)
+        view[:data.nbytes] = data
+        return data.nbytes
+
+
+class SchemaCache:
+    """Registry of the structures of the DataToExport objects already transferred through a
+    connection
+
+    When both ends of a connection use a SchemaCache, a DataToExport is fully serialized only the
+    first time its structure (names, units, labels, axes, array dtypes and shapes...) is seen,
+    together with a schema id. Later DataToExport with the same structure are serialized as
+    the schema id, the timestamps, the raw array payloads and the extra attributes, the
+    DeSerializer rebuilding the objects from the cached template.
+
+    The sent and received schemas are stored independently, one SchemaCache can therefore be
+    used for both directions of a connection.
+
+    Parameters
+    ----------
+    max_schemas: int
+        The maximum number of registered structures. Once reached, new structures are fully
+        serialized each time.
+    """
+
+    def __init__(self, max_schemas: int = 256):
+        self.max_schemas = max_schemas
+        self._sent_ids = {}
+        self._received_templates = {}
+
+    def get_sent_id(self, signature: tuple) -> Optional[int]:
+        """Get the schema id of an already sent structure or None"""
+        return self._sent_ids.get(signature, None)
+
+    def register_sent(self, signature: tuple) -> Optional[int]:
+        """Register a new structure to be sent and get its schema id, None if the cache is full"""
+        if len(self._sent_ids) >= self.max_schemas:
+            return None
+        schema_id = len(self._sent_ids)
+        self._sent_ids[signature] = schema_id
+        return schema_id
+
+    def register_received(self, schema_id: int, dte: DataToExport):
+        """Store a copy of a received DataToExport as the template of the schema id"""
+        self._received_templates[schema_id] = copy.deepcopy(dte)
+
+    def get_received(self, schema_id: int) -> DataToExport:
+        """Get the template of a received schema id"""
+        if schema_id not in self._received_templates:
+            raise KeyError(f'Unknown DataToExport schema id: {schema_id}')
+        return self._received_templates[schema_id]
+
+
+class PayloadCompressor:
+    """Compression of the ndarray payloads transferred through a connection
+
+    Arrays whose data are at least threshold bytes long are compressed with the codec before
+    being sent, their dtype string being prefixed with the codec name (for instance 'lz4:<f8') so
+    that the DeSerializer knows how to decompress them. Compressed arrays can be deserialized by
+    any DeSerializer having the codec installed, the compressor only keeps track of the
+    compression statistics of the connection.
+
+    Parameters
+    ----------
+    codec: str
+        One of the :func:`available_codecs` or None to never compress (while still computing the
+        decompression statistics)
+    threshold: int
+        Arrays smaller than this number of bytes are sent raw
+    """
+
+    def __init__(self, codec: str = None, threshold: int = 65536):
+        if codec is not None and codec not in COMPRESSION_CODECS:
+            raise ValueError(f'The compression codec {codec} is not available, possible ones are '
+                             f'{available_codecs()}')
+        self.codec = codec
+        self.threshold = threshold
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        self._raw_bytes = 0
+        self._compressed_bytes = 0
+        self._compression_time = 0.
+        self._decompressed_bytes = 0
+        self._decompression_time = 0.
+
+    @property
+    def compression_ratio(self) -> float:
+        """Ratio between the raw and compressed sizes of the compressed payloads"""
+        if self._compressed_bytes == 0:
+            return 1.
+        return self._raw_bytes / self._compressed_bytes
+
+    def statistics(self) -> dict:
+        """Get the compression statistics as a dictionary"""
+        return dict(codec=self.codec, raw_bytes=self._raw_bytes,
+                    compressed_bytes=self._compressed_bytes,
+                    compression_ratio=self.compression_ratio,
+                    compression_time=self._compression_time,
+                    decompressed_bytes=self._decompressed_bytes,
+                    decompression_time=self._decompression_time)
+
+    def compress(self, view: memoryview) -> Optional[bytes]:
+        """Compress the payload or return None if it should be sent raw (codec is None, payload
+        smaller than the threshold or not compressible)"""
+        if self.codec is None or view.nbytes < self.threshold:
+            return None
+        start = time.perf_counter()
+        compressed = COMPRESSION_CODECS[self.codec][0](view)
+        self._compression_time += time.perf_counter() - start
+        if len(compressed) >= view.nbytes:
+            return None
+        self._raw_bytes += view.nbytes
+        self._compressed_bytes += len(compressed)
+        return compressed
+
+    def decompress(self, codec: str, payload: bytes) -> bytearray:
+        """Decompress a payload compressed with the given codec"""
+        start = time.perf_counter()
+        data = decompress_payload(codec, payload)
+        self._decompression_time += time.perf_counter() - start
+        self._decompressed_bytes += len(data)
+        return data
+
+
+def decompress_payload(codec: str, payload: bytes) -> bytearray:
+    """Decompress a payload compressed with the given codec into a writable buffer"""
+    if codec not in COMPRESSION_CODECS:
+        raise ValueError(f'Cannot decompress data compressed with {codec}, possible codecs are '
+                         f'{available_codecs()}')
+    return bytearray(COMPRESSION_CODECS[codec][1](payload))
+
 
 class Serializer:
     """Used to Serialize to bytes python objects, numpy arrays and PyMoDAQ DataWithAxes and
-    DataToExport objects"""
+    DataToExport objects
+
+    Parameters
+    ----------
+    obj: SERIALIZABLE
+        the object to be serialized
+    schema_cache: SchemaCache
+        if not None, DataToExport objects are serialized using the schema registry of the
+        connection, see :class:`SchemaCache`
+    compressor: PayloadCompressor
+        if not None, large ndarray payloads are compressed, see :class:`PayloadCompressor`
+    """
 
-    def __init__(self, obj: SERIALIZABLE = None):
-        self._bytes_string = b''
+    def __init__(self, obj: SERIALIZABLE = None, schema_cache: SchemaCache = None,
+                 compressor: PayloadCompressor = None):
         self._obj = obj
+        self._schema_cache = schema_cache
+        self._compressor = compressor
 
     def to_bytes(self):
         """ Generic method to obtain the bytes string from various objects
@@ -105,26 +302,79 @@ class Serializer:
         * :class:`list` of any objects above
 
         """
+        return b''.join(self._object_segments())
+
+    def to_segments(self) -> List[SEGMENT]:
+        """ Generic method to obtain the serialized object as a list of buffer segments
+
+        The concatenation of the segments is equal to the output of :meth:`to_bytes` but the
+        data of large numpy arrays are not copied: they are given as memoryviews on the
+        arrays' memory. Small segments are merged together so that the list can be sent
+        directly using scatter-gather methods such as :meth:`socket.socket.sendmsg`.
+
+        Returns
+        -------
+        list of bytes or memoryview
+
+        See Also
+        --------
+        :meth:`~pymodaq.utils.tcp_ip.mysocket.Socket.check_sended_segments`
+        """
+        return self.merge_segments(self._object_segments())
+
+    def _object_segments(self) -> List[SEGMENT]:
         if isinstance(self._obj, bytes):
-            return self.bytes_serialization(self._obj)
+            return self._bytes_segments(self._obj)
         elif isinstance(self._obj, numbers.Number):
-            return self.scalar_serialization(self._obj)
+            return [self.scalar_serialization(self._obj)]
         elif isinstance(self._obj, str):
-            return self.string_serialization(self._obj)
+            return [self.string_serialization(self._obj)]
         elif isinstance(self._obj, np.ndarray):
-            return self.ndarray_serialization(self._obj)
+            return self._ndarray_segments(self._obj)
         elif isinstance(self._obj, Axis):
-            return self.axis_serialization(self._obj)
+            return self._axis_segments(self._obj)
         elif self._obj.__class__.__name__ in DwaType.names():
-            return self.dwa_serialization(self._obj)
+            return self._dwa_segments(self._obj)
         elif isinstance(self._obj, DataToExport):
-            return self.dte_serialization(self._obj)
+            return self._dte_segments(self._obj)
         elif isinstance(self._obj, list):
-            return self.list_serialization(self._obj)
+            return self._list_segments(self._obj)
         elif isinstance(self._obj, bool):
-            return self.scalar_serialization(int(self._obj))
+            return [self.scalar_serialization(int(self._obj))]
         raise ValueError
 
+    @staticmethod
+    def merge_segments(segments: List[SEGMENT],
+                       min_size: int = ZERO_COPY_MIN_SIZE) -> List[SEGMENT]:
+        """ Merge consecutive small segments into single bytes strings
+
+        Segments whose length is greater or equal to min_size are kept as is, others are
+        concatenated with their neighbours.
+
+        Parameters
+        ----------
+        segments: list of bytes or memoryview
+        min_size: int
+            the length in bytes below which a segment is merged
+
+        Returns
+        -------
+        list of bytes or memoryview
+        """
+        merged = []
+        pending = []
+        for segment in segments:
+            if len(segment) < min_size:
+                pending.append(segment)
+            else:
+                if len(pending) != 0:
+                    merged.append(b''.join(pending))
+                    pending = []
+                merged.append(segment)
+        if len(pending) != 0:
+            merged.append(b''.join(pending))
+        return merged
+
     def to_b64_string(self) -> str:
         b = self.to_bytes()
         return b64encode(b).decode()
@@ -176,16 +426,13 @@ class Serializer:
     def _int_serialization(self, int_obj: int) -> bytes:
         """serialize an unsigned integer used for getting the length of messages internaly, for outside integer
         serialization or deserialization use scalar_serialization"""
-        int_bytes = self.int_to_bytes(int_obj)
-        bytes_string = int_bytes
-        self._bytes_string += bytes_string
-        return bytes_string
+        return self.int_to_bytes(int_obj)
+
+    def _bytes_segments(self, bytes_string_in: bytes) -> List[SEGMENT]:
+        return [self.int_to_bytes(len(bytes_string_in)), bytes_string_in]
 
     def bytes_serialization(self, bytes_string_in: bytes) -> bytes:
-        bytes_string = b''
-        bytes_string += self.int_to_bytes(len(bytes_string_in))
-        bytes_string += bytes_string_in
-        return bytes_string
+        return b''.join(self._bytes_segments(bytes_string_in))
 
     def string_serialization(self, string: str) -> bytes:
         """ Convert a string into a bytes message together with the info to convert it back
@@ -198,12 +445,8 @@ class Serializer:
         -------
         bytes: the total bytes message to serialize the string
         """
-        bytes_string = b''
         cmd_bytes, cmd_length_bytes = self.str_len_to_bytes(string)
-        bytes_string += cmd_length_bytes
-        bytes_string += cmd_bytes
-        self._bytes_string += bytes_string
-        return bytes_string
+        return cmd_length_bytes + cmd_bytes
 
     def scalar_serialization(self, scalar: numbers.Number) -> bytes:
         """ Convert a scalar into a bytes message together with the info to convert it back
@@ -222,12 +465,9 @@ class Serializer:
         data_type = scalar_array.dtype.descr[0][1]
         data_bytes = scalar_array.tobytes()
 
-        bytes_string = b''
-        bytes_string += self.string_serialization(data_type)
-        bytes_string += self._int_serialization(len(data_bytes))
-        bytes_string += data_bytes
-        self._bytes_string += bytes_string
-        return bytes_string
+        return b''.join([self.string_serialization(data_type),
+                         self._int_serialization(len(data_bytes)),
+                         data_bytes])
 
     def ndarray_serialization(self, array: np.ndarray) -> bytes:
         """ Convert a ndarray into a bytes message together with the info to convert it back
@@ -253,23 +493,59 @@ class Serializer:
         * serialize data shape length
         * serialize all values of the shape as integers converted to bytes
         * serialize array as bytes
+
+        If the Serializer has a compressor and the array is compressed, the data type is prefixed
+        with the codec name as 'codec:type' and the compressed length is serialized before the
+        compressed bytes
+        """
+        return b''.join(self._ndarray_segments(array))
+
+    def _ndarray_segments(self, array: np.ndarray) -> List[SEGMENT]:
+        """ Same as ndarray_serialization but the array data are given as a memoryview
+
+        The memoryview is on the array memory itself if the array is C-contiguous, otherwise on a
+        C-contiguous copy
         """
         if not isinstance(array, np.ndarray):
             raise TypeError(f'{array} should be an numpy array, not a {type(array)}')
         array_type = array.dtype.descr[0][1]
         array_shape = array.shape
 
-        array = array.reshape(array.size)
-        array_bytes = array.tobytes()
-        bytes_string = b''
-        bytes_string += self.string_serialization(array_type)
-        bytes_string += self._int_serialization(len(array_bytes))
-        bytes_string += self._int_serialization(len(array_shape))
+        array_view = self._array_view(array)
+        compressed = None if self._compressor is None else self._compressor.compress(array_view)
+        if compressed is not None:
+            array_type = f'{self._compressor.codec}:{array_type}'
+        header = [self.string_serialization(array_type),
+                  self._int_serialization(array_view.nbytes),
+                  self._int_serialization(len(array_shape))]
         for shape_elt in array_shape:
-            bytes_string += self._int_serialization(shape_elt)
-        bytes_string += array_bytes
-        self._bytes_string += bytes_string
-        return bytes_string
+            header.append(self._int_serialization(shape_elt))
+        if compressed is not None:
+            return [b''.join(header), self._int_serialization(len(compressed)), compressed]
+        return [b''.join(header), array_view]
+
+    @staticmethod
+    def _array_view(array: np.ndarray) -> memoryview:
+        """Get a bytes memoryview of the array (of a C-contiguous copy if needed)"""
+        return memoryview(np.ascontiguousarray(array).reshape(array.size).view(np.uint8))
+
+    def _raw_array_segments(self, array: np.ndarray) -> List[SEGMENT]:
+        """Serialize only the array data, its dtype and shape being known from a schema
+
+        If the Serializer has a compressor, the data are preceded by the codec name (empty if not
+        compressed) and, if compressed, the compressed length
+        """
+        array_view = self._array_view(array)
+        if self._compressor is None:
+            return [array_view]
+        compressed = self._compressor.compress(array_view)
+        if compressed is None:
+            return [self.string_serialization(''), array_view]
+        return [self.string_serialization(self._compressor.codec),
+                self._int_serialization(len(compressed)), compressed]
+
+    def _raw_timestamp_segments(self, timestamp: float) -> List[SEGMENT]:
+        return [np.array([timestamp], dtype=float).tobytes()]
 
     def object_type_serialization(self, obj: Union[Axis, DataToExport, DataWithAxes]) -> bytes:
         """ Convert an object type into a bytes message as a string together with the info to
@@ -302,18 +578,19 @@ class Serializer:
         * serialize the axis
         * serialize the axis spread_order
         """
+        return b''.join(self._axis_segments(axis))
+
+    def _axis_segments(self, axis: Axis) -> List[SEGMENT]:
         if not isinstance(axis, Axis):
             raise TypeError(f'{axis} should be a list, not a {type(axis)}')
 
-        bytes_string = b''
-        bytes_string += self.object_type_serialization(axis)
-        bytes_string += self.string_serialization(axis.label)
-        bytes_string += self.string_serialization(axis.units)
-        bytes_string += self.ndarray_serialization(axis.get_data())
-        bytes_string += self.scalar_serialization(axis.index)
-        bytes_string += self.scalar_serialization(axis.spread_order)
-        self._bytes_string += bytes_string
-        return bytes_string
+        segments = [self.object_type_serialization(axis),
+                    self.string_serialization(axis.label),
+                    self.string_serialization(axis.units)]
+        segments.extend(self._ndarray_segments(axis.get_data()))
+        segments.append(self.scalar_serialization(axis.index))
+        segments.append(self.scalar_serialization(axis.spread_order))
+        return segments
 
     def list_serialization(self, list_object: List) -> bytes:
         """ Convert a list of objects into a bytes message together with the info to convert it back
@@ -339,68 +616,70 @@ class Serializer:
         * get data type as a string
         * use the serialization method adapted to each object in the list
         """
+        return b''.join(self._list_segments(list_object))
+
+    def _list_segments(self, list_object: List) -> List[SEGMENT]:
         if not isinstance(list_object, list):
             raise TypeError(f'{list_object} should be a list, not a {type(list_object)}')
 
-        bytes_string = b''
-
-        bytes_string += self._int_serialization(len(list_object))
+        segments = [self._int_serialization(len(list_object))]
         for obj in list_object:
-            bytes_string += self.type_and_object_serialization(obj)
-        self._bytes_string += bytes_string
-        return bytes_string
+            segments.extend(self._type_and_object_segments(obj))
+        return segments
+
+    def type_and_object_serialization(self, obj) -> bytes:
+        return b''.join(self._type_and_object_segments(obj))
 
-    def type_and_object_serialization(self, obj):
-        bytes_string = b''
+    def _type_and_object_segments(self, obj) -> List[SEGMENT]:
         if isinstance(obj, DataWithAxes):
-            bytes_string += self.string_serialization('dwa')
-            bytes_string += self.dwa_serialization(obj)
+            segments = [self.string_serialization('dwa')]
+            segments.extend(self._dwa_segments(obj))
 
         elif isinstance(obj, Axis):
-            bytes_string += self.string_serialization('axis')
-            bytes_string += self.axis_serialization(obj)
+            segments = [self.string_serialization('axis')]
+            segments.extend(self._axis_segments(obj))
 
         elif isinstance(obj, np.ndarray):
-            bytes_string += self.string_serialization('array')
-            bytes_string += self.ndarray_serialization(obj)
+            segments = [self.string_serialization('array')]
+            segments.extend(self._ndarray_segments(obj))
 
         elif isinstance(obj, bytes):
-            bytes_string += self.string_serialization('bytes')
-            bytes_string += self.bytes_serialization(obj)
+            segments = [self.string_serialization('bytes')]
+            segments.extend(self._bytes_segments(obj))
 
         elif isinstance(obj, str):
-            bytes_string += self.string_serialization('string')
-            bytes_string += self.string_serialization(obj)
+            segments = [self.string_serialization('string'),
+                        self.string_serialization(obj)]
 
         elif isinstance(obj, numbers.Number):
-            bytes_string += self.string_serialization('scalar')
-            bytes_string += self.scalar_serialization(obj)
+            segments = [self.string_serialization('scalar'),
+                        self.scalar_serialization(obj)]
 
         elif isinstance(obj, bool):
-            bytes_string += self.string_serialization('bool')
-            bytes_string += self.scalar_serialization(int(obj))
+            segments = [self.string_serialization('bool'),
+                        self.scalar_serialization(int(obj))]
 
         elif isinstance(obj, list):
-            bytes_string += self.string_serialization('list')
-            bytes_string += self.list_serialization(obj)
+            segments = [self.string_serialization('list')]
+            segments.extend(self._list_segments(obj))
 
         elif isinstance(obj, putils.ParameterWithPath):
             path = obj.path
             param_as_xml = ioxml.parameter_to_xml_string(obj.parameter)
-            bytes_string += self.string_serialization('parameter')
-            bytes_string += self.list_serialization(path)
-            bytes_string += self.string_serialization(param_as_xml)
+            segments = [self.string_serialization('parameter')]
+            segments.extend(self._list_segments(path))
+            segments.append(self.string_serialization(param_as_xml))
 
         elif isinstance(obj, DataToExport):
-            bytes_string += self.string_serialization('dte')
-            bytes_string += self.dte_serialization(obj)
+            segments = [self.string_serialization('dte')]
+            segments.extend(self._dte_segments(obj))
 
         else:
             raise TypeError(
                 f'the element {obj} type cannot be serialized into bytes, only numpy arrays'
                 f', strings, or scalars (int or float)')
 
-        return bytes_string
+        return segments
 
     def dwa_serialization(self, dwa: DataWithAxes) -> bytes:
         """ Convert a DataWithAxes into a bytes string
@@ -433,33 +712,34 @@ class Serializer:
         * serialize the list of names of extra attributes
         * serialize the extra attributes
         """
+        return b''.join(self._dwa_segments(dwa))
+
+    def _dwa_segments(self, dwa: DataWithAxes) -> List[SEGMENT]:
         if not isinstance(dwa, DataWithAxes):
             raise TypeError(f'{dwa} should be a DataWithAxes, not a {type(dwa)}')
 
-        bytes_string = b''
-        bytes_string += self.object_type_serialization(dwa)
-        bytes_string += self.scalar_serialization(dwa.timestamp)
-        bytes_string += self.string_serialization(dwa.name)
-        bytes_string += self.string_serialization(dwa.units)
-        bytes_string += self.string_serialization(dwa.source.name)
-        bytes_string += self.string_serialization(dwa.dim.name)
-        bytes_string += self.string_serialization(dwa.distribution.name)
-        bytes_string += self.list_serialization(dwa.data)
-        bytes_string += self.list_serialization(dwa.labels)
-        bytes_string += self.string_serialization(dwa.origin)
-        bytes_string += self.list_serialization(list(dwa.nav_indexes))
-        bytes_string += self.list_serialization(dwa.axes)
+        segments = [self.object_type_serialization(dwa),
+                    self.scalar_serialization(dwa.timestamp),
+                    self.string_serialization(dwa.name),
+                    self.string_serialization(dwa.units),
+                    self.string_serialization(dwa.source.name),
+                    self.string_serialization(dwa.dim.name),
+                    self.string_serialization(dwa.distribution.name)]
+        segments.extend(self._list_segments(dwa.data))
+        segments.extend(self._list_segments(dwa.labels))
+        segments.append(self.string_serialization(dwa.origin))
+        segments.extend(self._list_segments(list(dwa.nav_indexes)))
+        segments.extend(self._list_segments(dwa.axes))
         if dwa.errors is None:
             errors = []  # have to use this extra attribute as if I force dwa.errors = [], it will be
             #internally modified as None again
         else:
             errors = dwa.errors
-        bytes_string += self.list_serialization(errors)
-        bytes_string += self.list_serialization(dwa.extra_attributes)
+        segments.extend(self._list_segments(errors))
+        segments.extend(self._list_segments(dwa.extra_attributes))
         for attribute in dwa.extra_attributes:
-            bytes_string += self.type_and_object_serialization(getattr(dwa, attribute))
-        self._bytes_string += bytes_string
-        return bytes_string
+            segments.extend(self._type_and_object_segments(getattr(dwa, attribute)))
+        return segments
 
     def dte_serialization(self, dte: DataToExport) -> bytes:
         """ Convert a DataToExport into a bytes string
@@ -481,16 +761,82 @@ class Serializer:
         * serialize the name
         * serialize the list of DataWithAxes
         """
+        return b''.join(self._dte_segments(dte))
+
+    def _dte_segments(self, dte: DataToExport) -> List[SEGMENT]:
         if not isinstance(dte, DataToExport):
             raise TypeError(f'{dte} should be a DataToExport, not a {type(dte)}')
 
-        bytes_string = b''
-        bytes_string += self.object_type_serialization(dte)
-        bytes_string += self.scalar_serialization(dte.timestamp)
-        bytes_string += self.string_serialization(dte.name)
-        bytes_string += self.list_serialization(dte.data)
-        self._bytes_string += bytes_string
-        return bytes_string
+        if self._schema_cache is not None:
+            signature = self.dte_signature(dte)
+            schema_id = self._schema_cache.get_sent_id(signature)
+            if schema_id is not None:
+                return self._dte_schema_ref_segments(schema_id, dte)
+            schema_id = self._schema_cache.register_sent(signature)
+            if schema_id is not None:
+                segments = [self.string_serialization('DataToExportSchema'),
+                            self._int_serialization(schema_id)]
+                segments.extend(self._dte_full_segments(dte))
+                return segments
+        return self._dte_full_segments(dte)
+
+    def _dte_full_segments(self, dte: DataToExport) -> List[SEGMENT]:
+        segments = [self.object_type_serialization(dte),
+                    self.scalar_serialization(dte.timestamp),
+                    self.string_serialization(dte.name)]
+        segments.extend(self._list_segments(dte.data))
+        return segments
+
+    def _dte_schema_ref_segments(self, schema_id: int, dte: DataToExport) -> List[SEGMENT]:
+        """ Serialize a DataToExport whose structure has already been sent
+
+        The bytes sequence is constructed as:
+
+        * serialize the string type: 'DataToExportRef' ('DataToExportCompressedRef' if the
+          Serializer has a compressor, see :meth:`_raw_array_segments`)
+        * serialize the schema id
+        * serialize the timestamp as the 8 bytes of a float
+        * then for each DataWithAxes:
+
+          * serialize the timestamp as the 8 bytes of a float
+          * serialize the raw bytes of the data arrays
+          * serialize the number of errors arrays and the raw bytes of the errors arrays
+          * serialize the extra attributes
+        """
+        ref_type = 'DataToExportRef' if self._compressor is None else 'DataToExportCompressedRef'
+        segments = [self.string_serialization(ref_type),
+                    self._int_serialization(schema_id)]
+        segments.extend(self._raw_timestamp_segments(dte.timestamp))
+        for dwa in dte:
+            segments.extend(self._raw_timestamp_segments(dwa.timestamp))
+            for array in dwa.data:
+                segments.extend(self._raw_array_segments(array))
+            errors = dwa.errors if dwa.errors is not None else []
+            segments.append(self._int_serialization(len(errors)))
+            for array in errors:
+                segments.extend(self._raw_array_segments(array))
+            for attribute in dwa.extra_attributes:
+                segments.extend(self._type_and_object_segments(getattr(dwa, attribute)))
+        return segments
+
+    @staticmethod
+    def _axis_signature(axis: Axis) -> tuple:
+        return (axis.label, axis.units, axis.index, axis.spread_order, axis.size, axis.offset,
+                axis.scaling, None if axis.data is None else axis.data.tobytes())
+
+    @classmethod
+    def dte_signature(cls, dte: DataToExport) -> tuple:
+        """Get a hashable representation of everything in a DataToExport but its timestamps,
+        array values and extra attributes values"""
+        return (dte.name, tuple(
+            (dwa.__class__.__name__, dwa.name, dwa.units, dwa.source.name, dwa.dim.name,
+             dwa.distribution.name, tuple(dwa.labels), dwa.origin, tuple(dwa.nav_indexes),
+             tuple((array.dtype.str, array.shape) for array in dwa.data),
+             None if dwa.errors is None else tuple((array.dtype.str, array.shape)
+                                                   for array in dwa.errors),
+             tuple(cls._axis_signature(axis) for axis in dwa.axes),
+             tuple(dwa.extra_attributes))
+            for dwa in dte))
 
 
 class DeSerializer:
@@ -499,20 +845,44 @@ class DeSerializer:
 
     Parameters
     ----------
-    bytes_string: bytes or Socket
+    bytes_string: bytes, bytearray, memoryview or Socket
         the bytes string to deserialize into an object: int, float, string, arrays, list, Axis, DataWithAxes...
         Could also be a Socket object reading bytes from the network having a `get_first_nbytes` method
+    schema_cache: SchemaCache
+        the schema registry used to rebuild DataToExport objects serialized as schema references.
+        If None, the one of the Socket (if any) is used
+    compressor: PayloadCompressor
+        used to get the decompression statistics. If None, the one of the Socket (if any) is used.
+        Compressed arrays are decompressed whether a compressor is given or not.
 
     See Also
     --------
     :py:class:`~pymodaq.utils.tcp_ip.serializer.SocketString`
     :py:class:`~pymodaq.utils.tcp_ip.mysocket.Socket`
+    :py:class:`~pymodaq.utils.tcp_ip.serializer.SchemaCache`
     """
 
-    def __init__(self, bytes_string:  Union[bytes, 'Socket'] = None):
-        if isinstance(bytes_string, bytes):
+    def __init__(self, bytes_string:  Union[bytes, bytearray, memoryview, 'Socket'] = None,
+                 schema_cache: SchemaCache = None, compressor: PayloadCompressor = None):
+        if isinstance(bytes_string, (bytes, bytearray, memoryview)):
             bytes_string = SocketString(bytes_string)
         self._bytes_string = bytes_string
+        self._schema_cache = schema_cache
+        self._compressor = compressor
+
+    @property
+    def schema_cache(self) -> Optional[SchemaCache]:
+        """The SchemaCache given at init or the one of the underlying Socket if any"""
+        if self._schema_cache is not None:
+            return self._schema_cache
+        return getattr(self._bytes_string, 'schema_cache', None)
+
+    @property
+    def compressor(self) -> Optional[PayloadCompressor]:
+        """The PayloadCompressor given at init or the one of the underlying Socket if any"""
+        if self._compressor is not None:
+            return self._compressor
+        return getattr(self._bytes_string, 'compressor', None)
 
     @classmethod
     def from_b64_string(cls, b64_string: Union[bytes, str]) -> "DeSerializer":
@@ -523,9 +893,9 @@ class DeSerializer:
         return message.decode()
 
     @staticmethod
-    def bytes_to_int(bytes_string: bytes) -> int:
+    def bytes_to_int(bytes_string: Union[bytes, memoryview]) -> int:
         """Convert a bytes of length 4 into an integer"""
-        if not isinstance(bytes_string, bytes):
+        if not isinstance(bytes_string, (bytes, memoryview)):
             raise TypeError(f'{bytes_string} should be an bytes string, not a {type(bytes_string)}')
         assert len(bytes_string) == 4
         return int.from_bytes(bytes_string, 'big')
@@ -570,9 +940,22 @@ class DeSerializer:
         int_obj = self.bytes_to_int(self._bytes_string.get_first_nbytes(4))
         return int_obj
 
+    def _nbytes_to_buffer(self, length: int) -> bytearray:
+        """Read length bytes into a newly allocated bytearray
+
+        If the underlying object implements a `get_first_nbytes_into` method, the bytes are
+        directly received into the bytearray (no intermediate bytes strings)
+        """
+        buffer = bytearray(length)
+        if hasattr(self._bytes_string, 'get_first_nbytes_into'):
+            self._bytes_string.get_first_nbytes_into(buffer)
+        else:
+            buffer[:] = self._bytes_string.get_first_nbytes(length)
+        return buffer
+
     def bytes_deserialization(self) -> bytes:
         bstring_len = self._int_deserialization()
-        bstr = self._bytes_string.get_first_nbytes(bstring_len)
+        bstr = bytes(self._bytes_string.get_first_nbytes(bstring_len))
         return bstr
 
     def string_deserialization(self) -> str:
@@ -585,7 +968,7 @@ class DeSerializer:
         str: the decoded string
         """
         string_len = self._int_deserialization()
-        str_obj = self._bytes_string.get_first_nbytes(string_len).decode()
+        str_obj = str(self._bytes_string.get_first_nbytes(string_len), 'utf-8')
         return str_obj
 
     def scalar_deserialization(self) -> numbers.Number:
@@ -637,7 +1020,12 @@ class DeSerializer:
             shape_elt = self._int_deserialization()
             shape.append(shape_elt)
 
-        ndarray = np.frombuffer(self._bytes_string.get_first_nbytes(ndarray_len), dtype=ndarray_type)
+        if ':' in ndarray_type:
+            codec, ndarray_type = ndarray_type.split(':')
+            buffer = self._decompressed_buffer(codec)
+        else:
+            buffer = self._nbytes_to_buffer(ndarray_len)
+        ndarray = np.frombuffer(buffer, dtype=ndarray_type)
         ndarray = ndarray.reshape(tuple(shape))
         ndarray = np.atleast_1d(ndarray)  # remove singleton dimensions
         return ndarray
@@ -767,11 +1155,69 @@ class DeSerializer:
         DataToExport: the decoded DataToExport
         """
         class_name = self.string_deserialization()
-        if class_name != DataToExport.__name__:
+        if class_name == 'DataToExportSchema':
+            schema_id = self._int_deserialization()
+            dte = self.dte_deserialization()
+            if self.schema_cache is not None:
+                self.schema_cache.register_received(schema_id, dte)
+            return dte
+        elif class_name == 'DataToExportRef':
+            return self._dte_schema_ref_deserialization()
+        elif class_name == 'DataToExportCompressedRef':
+            return self._dte_schema_ref_deserialization(compressed=True)
+        elif class_name != DataToExport.__name__:
             raise TypeError(f'Attempting to deserialize a DataToExport but got the bytes for a {class_name}')
         timestamp = self.scalar_deserialization()
         dte = DataToExport(self.string_deserialization(),
                            data=self.list_deserialization(),
                            )
         dte.timestamp = timestamp
+        return dte
+
+    def _decompressed_buffer(self, codec: str) -> bytearray:
+        """Read a compressed payload (its length then its bytes) and decompress it"""
+        payload = self._nbytes_to_buffer(self._int_deserialization())
+        if self.compressor is not None:
+            return self.compressor.decompress(codec, payload)
+        return decompress_payload(codec, payload)
+
+    def _raw_array_deserialization(self, dtype: np.dtype, shape: Tuple[int],
+                                   compressed=False) -> np.ndarray:
+        ndarray_len = int(np.prod(shape)) * dtype.itemsize
+        codec = self.string_deserialization() if compressed else ''
+        if codec != '':
+            buffer = self._decompressed_buffer(codec)
+        else:
+            buffer = self._nbytes_to_buffer(ndarray_len)
+        ndarray = np.frombuffer(buffer, dtype=dtype)
+        return ndarray.reshape(shape)
+
+    def _raw_timestamp_deserialization(self) -> float:
+        ndarray = np.frombuffer(self._nbytes_to_buffer(np.dtype(float).itemsize), dtype=float)
+        return float(ndarray[0])
+
+    def _dte_schema_ref_deserialization(self, compressed=False) -> DataToExport:
+        """Rebuild a DataToExport from its cached template, see Serializer._dte_schema_ref_segments"""
+        if self.schema_cache is None:
+            raise TypeError('Attempting to deserialize a DataToExport schema reference without a '
+                            'SchemaCache')
+        template = self.schema_cache.get_received(self._int_deserialization())
+        timestamp = self._raw_timestamp_deserialization()
+        dwas = []
+        for dwa_template in template:
+            dwa_timestamp = self._raw_timestamp_deserialization()
+            data = [self._raw_array_deserialization(array.dtype, array.shape, compressed)
+                    for array in dwa_template.data]
+            errors_template = dwa_template.errors if dwa_template.errors is not None else []
+            errors = [self._raw_array_deserialization(array.dtype, array.shape, compressed)
+                      for array in errors_template[:self._int_deserialization()]]
+            dwa = dwa_template.deepcopy_with_new_data(data, source=None, keep_dim=True)
+            if len(errors) != 0:
+                dwa.errors = errors
+            for attribute in dwa_template.extra_attributes:
+                setattr(dwa, attribute, self.type_and_object_deserialization())
+            dwa.timestamp = dwa_timestamp
+            dwas.append(dwa)
+        dte = DataToExport(template.name, data=dwas)
+        dte.timestamp = timestamp
         return dte
\ No newline at end of file
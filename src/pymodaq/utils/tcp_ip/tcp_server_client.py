@@ -6,9 +6,10 @@ Created on Fri Aug 30 12:21:56 2019
 """
 from collections import OrderedDict
 import select
+import selectors
 from typing import List
 import socket
-from threading import Timer
+from threading import Timer, Thread, Lock
 
 import numpy as np
 from qtpy.QtCore import QObject, Signal, Slot, QThread
@@ -23,7 +24,8 @@ from pymodaq.utils.config import Config
 from pymodaq.utils.parameter import Parameter
 from pymodaq.utils.data import DataToExport
 from pymodaq.utils.tcp_ip.mysocket import Socket
-from pymodaq.utils.tcp_ip.serializer import Serializer, DeSerializer
+from pymodaq.utils.tcp_ip.serializer import (Serializer, DeSerializer, SchemaCache,
+                                             PayloadCompressor, available_codecs)
 from pymodaq.utils.managers.parameter_manager import ParameterManager
 
 config = Config()
@@ -37,6 +39,99 @@ tcp_parameters = [
      'value': dict(), 'header': ['Type', 'adress']}, ]
 
 
+class SocketListener(QObject):
+    """Selector driven event loop watching Socket objects for readiness in a dedicated thread
+
+    The thread blocks until one of the watched sockets is ready to be read then emits the
+    ready_read signal with the corresponding Socket. Connected slots of objects living in another
+    thread are called through the Qt event loop of their own thread, without any polling.
+
+    Watching is one-shot: once signaled, a socket is no more watched so that the listener doesn't
+    fire again while the receiving thread is still reading the message. The receiver should call
+    :meth:`watch` again once the message has been processed.
+    """
+    ready_read = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_read, self._wakeup_write = socket.socketpair()
+        self._wakeup_read.setblocking(False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ, None)
+        self._lock = Lock()
+        self._requests = []
+        self._running = False
+        self._thread: Thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        self._running = True
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread, the listener cannot be started again"""
+        self._running = False
+        self._wakeup()
+        if self._thread is not None:
+            self._thread.join(1)
+            self._thread = None
+        self._selector.close()
+        self._wakeup_read.close()
+        self._wakeup_write.close()
+
+    def watch(self, sock: Socket):
+        """Watch the socket until it is ready to be read (thread safe)"""
+        self._request('watch', sock)
+
+    def unwatch(self, sock: Socket):
+        """Stop watching the socket (thread safe)"""
+        self._request('unwatch', sock)
+
+    def _request(self, action: str, sock: Socket):
+        with self._lock:
+            self._requests.append((action, sock))
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            self._wakeup_write.send(b'\x00')
+        except OSError:
+            pass
+
+    def _process_requests(self):
+        try:
+            while self._wakeup_read.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        with self._lock:
+            requests, self._requests = self._requests, []
+        for action, sock in requests:
+            try:
+                if action == 'watch':
+                    self._selector.register(sock.socket, selectors.EVENT_READ, sock)
+                else:
+                    self._selector.unregister(sock.socket)
+            except (KeyError, ValueError, OSError):
+                pass  # socket already (un)registered or closed
+
+    def _run(self):
+        while self._running:
+            for key, mask in self._selector.select():
+                if key.data is None:
+                    self._process_requests()
+                elif self._running:
+                    try:
+                        self._selector.unregister(key.fileobj)
+                    except (KeyError, ValueError, OSError):
+                        pass
+                    self.ready_read.emit(key.data)
+
+
 class TCPClientTemplate:
     def __init__(self, ipaddress="192.168.1.62", port=6341, client_type=""):
         """Create a socket client
@@ -73,7 +168,8 @@ class TCPClientTemplate:
 
     def _connect_socket(self):
         # create an INET, STREAMing socket
-        self.socket = Socket(socket.socket(socket.AF_INET, socket.SOCK_STREAM))
+        self.socket = Socket(socket.socket(socket.AF_INET, socket.SOCK_STREAM),
+                             chunk_size=config('network', 'tcp-server', 'recv_chunk_size'))
         # now connect to the web server on port 80 - the normal http port
         self.socket.connect((self.ipaddress, self.port))
 
@@ -174,6 +270,7 @@ class TCPClient(TCPClientTemplate, QObject):
         """
         QObject.__init__(self)
         TCPClientTemplate.__init__(self, ipaddress, port, client_type)
+        self._listener: SocketListener = None
 
         self.settings = Parameter.create(name='Settings', type='group', children=self.params)
         if params_state is not None:
@@ -215,6 +312,7 @@ class TCPClient(TCPClientTemplate, QObject):
 
         elif command.command == "quit":
             try:
+                self._stop_listener()
                 self.socket.close()
             except Exception as e:
                 pass
@@ -258,6 +356,35 @@ class TCPClient(TCPClientTemplate, QObject):
         else:
             raise IOError('Unknown TCP client command')
 
+    def poll_connection(self):
+        """Watch the socket for incoming messages
+
+        Depending on the network/tcp-server/event_loop configuration entry, either start a
+        SocketListener thread (selector) or poll the socket in a loop (timer)
+        """
+        if config('network', 'tcp-server', 'event_loop') == 'selector':
+            self._listener = SocketListener()
+            self._listener.ready_read.connect(self._socket_ready_to_read)
+            self._listener.start()
+            self._listener.watch(self.socket)
+        else:
+            super().poll_connection()
+
+    @Slot(object)
+    def _socket_ready_to_read(self, sock: Socket):
+        try:
+            self.ready_to_read()
+            if self._listener is not None:
+                self._listener.watch(sock)
+        except Exception as e:
+            self._stop_listener()
+            self.process_error_in_polling(e)
+
+    def _stop_listener(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
     def not_connected(self, e):
         self.connected = False
         self.cmd_signal.emit(ThreadCommand('disconnected'))
@@ -288,6 +415,12 @@ class TCPClient(TCPClientTemplate, QObject):
         self.socket.check_sended_with_serializer(self.client_type)
 
         self.send_infos_xml(ioxml.parameter_to_xml_string(self.settings))
+        if config('network', 'tcp-server', 'schema_cache'):
+            # servers not knowing this command just log it, DataToExport are then sent in full
+            self.socket.check_sended_with_serializer('Schema_cache')
+        if config('network', 'tcp-server', 'compression') in available_codecs():
+            # the server answers with the codecs it can decompress, see get_data
+            self.socket.check_sended_with_serializer('Compression')
         for command in extra_commands:
             if isinstance(command, ThreadCommand):
                 self.cmd_signal.emit(command)
@@ -304,6 +437,17 @@ class TCPClient(TCPClientTemplate, QObject):
 
         """
         if self.socket is not None:
+            if message == 'Schema_cache':  # the server accepted to use a schema cache
+                self.socket.schema_cache = SchemaCache()
+                return
+            elif message == 'Compression':  # the server sends the codecs it can decompress
+                codecs = DeSerializer(self.socket).list_deserialization()
+                codec = config('network', 'tcp-server', 'compression')
+                self.socket.compressor = PayloadCompressor(
+                    codec if codec in codecs else None,
+                    config('network', 'tcp-server', 'compression_threshold'))
+                return
+
             messg = ThreadCommand(message)
 
             if message == 'set_info':
@@ -333,6 +477,7 @@ class TCPServer(QObject):
         self.listening = True
         self.processing = False
         self.client_type = client_type
+        self._listener: SocketListener = None
 
     def close_server(self):
         """
@@ -345,6 +490,9 @@ class TCPServer(QObject):
         """
         server_socket = self.find_socket_within_connected_clients('server')
         self.remove_client(server_socket)
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
 
     def init_server(self):
         self.emit_status(ThreadCommand("Update_Status", [
@@ -352,7 +500,8 @@ class TCPServer(QObject):
                                                       self.settings['port_id']), 'log']))
         serversocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         serversocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.serversocket = Socket(serversocket)
+        self.serversocket = Socket(serversocket,
+                                   chunk_size=config('network', 'tcp-server', 'recv_chunk_size'))
         # bind the socket to a public host, and a well-known port
         try:
             self.serversocket.bind(
@@ -368,7 +517,13 @@ class TCPServer(QObject):
         self.connected_clients.append(dict(socket=self.serversocket, type='server'))
         self.settings.child('conn_clients').setValue(self.set_connected_clients_table())
 
-        self.timer = self.startTimer(100)  # Timer event fired every 100ms
+        if config('network', 'tcp-server', 'event_loop') == 'selector':
+            self._listener = SocketListener()
+            self._listener.ready_read.connect(self.socket_ready_to_read)
+            self._listener.start()
+            self._listener.watch(self.serversocket)
+        else:
+            self.timer = self.startTimer(100)  # Timer event fired every 100ms
         # self.listen_client()
 
     def timerEvent(self, event):
@@ -389,6 +544,18 @@ class TCPServer(QObject):
         if not self.processing:
             self.listen_client()
 
+    @Slot(object)
+    def socket_ready_to_read(self, sock: Socket):
+        """Process a socket signaled as ready to read by the SocketListener then watch it again"""
+        self.processing = True
+        try:
+            self.process_socket(sock)
+        except Exception as e:
+            self.emit_status(ThreadCommand("Update_Status", [str(e), 'log']))
+        if self._listener is not None and self.find_socket_type_within_connected_clients(sock) is not None:
+            self._listener.watch(sock)
+        self.processing = False
+
     def find_socket_within_connected_clients(self, client_type) -> Socket:
         """
             Find a socket from a connected client with socket type corresponding.
@@ -457,6 +624,8 @@ class TCPServer(QObject):
     def remove_client(self, sock):
         sock_type = self.find_socket_type_within_connected_clients(sock)
         if sock_type is not None:
+            if self._listener is not None:
+                self._listener.unwatch(sock)
             self.connected_clients.remove(dict(socket=sock, type=sock_type))
             self.settings.child('conn_clients').setValue(self.set_connected_clients_table())
             try:
@@ -488,9 +657,26 @@ class TCPServer(QObject):
                                                                    [sock.socket for sock in wlist],
                                                                    [sock.socket for sock in xlist],
                                                                    timeout)
+        # return the Socket objects given as input so that their receive buffer and statistics
+        # are kept from one call to the other
+        sockets = {sock.socket: sock for sock in rlist + wlist + xlist}
+        return ([sockets.get(sock, Socket(sock)) for sock in read_sockets],
+                [sockets.get(sock, Socket(sock)) for sock in write_sockets],
+                [sockets.get(sock, Socket(sock)) for sock in error_sockets])
 
-        return ([Socket(sock) for sock in read_sockets], [Socket(sock) for sock in write_sockets],
-                [Socket(sock) for sock in error_sockets])
+    def get_link_statistics(self) -> dict:
+        """Get the receiving statistics of each connected client socket
+
+        Returns
+        -------
+        dict: client types as keys and the output of :meth:`Socket.statistics` as values
+
+        See Also
+        --------
+        :meth:`~pymodaq.utils.tcp_ip.mysocket.Socket.statistics`
+        """
+        return {socket_dict['type']: socket_dict['socket'].statistics()
+                for socket_dict in self.connected_clients if socket_dict['type'] != 'server'}
 
     def listen_client(self):
         """
@@ -509,42 +695,64 @@ class TCPServer(QObject):
 
             for sock in read_sockets:
                 QThread.msleep(100)
-                if sock == self.serversocket:  # New connection
-                    # means a new socket (client) try to reach the server
-                    (client_socket, address) = self.serversocket.accept()
-                    DAQ_type = DeSerializer(client_socket).string_deserialization()
-                    if DAQ_type not in self.socket_types:
-                        self.emit_status(ThreadCommand("Update_Status", [DAQ_type + ' is not a valid type', 'log']))
-                        client_socket.close()
-                        break
-
-                    self.connected_clients.append(dict(socket=client_socket, type=DAQ_type))
-                    self.settings.child('conn_clients').setValue(self.set_connected_clients_table())
-                    self.emit_status(ThreadCommand("Update_Status",
-                                                   [DAQ_type + ' connected with ' + address[0] + ':' + str(address[1]),
-                                                    'log']))
-                    QtWidgets.QApplication.processEvents()
-
-                else:  # Some incoming message from a client
-                    # Data received from client, process it
-                    try:
-                        message = DeSerializer(sock).string_deserialization()
-                        if message in ['Done', 'Info', 'Infos', 'Info_xml', 'position_is', 'move_done']:
-                            self.process_cmds(message, command_sock=None)
-                        elif message == 'Quit':
-                            raise Exception("socket disconnect by user")
-                        else:
-                            self.process_cmds(message, command_sock=sock)
-
-                    # client disconnected, so remove from socket list
-                    except Exception as e:
-                        self.remove_client(sock)
+                if not self.process_socket(sock):
+                    break
 
             self.processing = False
 
         except Exception as e:
             self.emit_status(ThreadCommand("Update_Status", [str(e), 'log']))
 
+    def process_socket(self, sock: Socket) -> bool:
+        """Accept a new client if sock is the server socket or process the incoming message
+
+        Returns
+        -------
+        bool: False if a new client tried to connect with an invalid type
+        """
+        if sock == self.serversocket:  # New connection
+            # means a new socket (client) try to reach the server
+            (client_socket, address) = self.serversocket.accept()
+            DAQ_type = DeSerializer(client_socket).string_deserialization()
+            if DAQ_type not in self.socket_types:
+                self.emit_status(ThreadCommand("Update_Status", [DAQ_type + ' is not a valid type', 'log']))
+                client_socket.close()
+                return False
+
+            self.connected_clients.append(dict(socket=client_socket, type=DAQ_type))
+            self.settings.child('conn_clients').setValue(self.set_connected_clients_table())
+            self.emit_status(ThreadCommand("Update_Status",
+                                           [DAQ_type + ' connected with ' + address[0] + ':' + str(address[1]),
+                                            'log']))
+            if self._listener is not None:
+                self._listener.watch(client_socket)
+            QtWidgets.QApplication.processEvents()
+
+        else:  # Some incoming message from a client
+            # Data received from client, process it
+            try:
+                message = DeSerializer(sock).string_deserialization()
+                if message in ['Done', 'Info', 'Infos', 'Info_xml', 'position_is', 'move_done']:
+                    self.process_cmds(message, command_sock=None)
+                elif message == 'Quit':
+                    raise Exception("socket disconnect by user")
+                elif message == 'Schema_cache':
+                    # the client proposes to use a schema cache: accept it
+                    sock.schema_cache = SchemaCache()
+                    sock.check_sended_with_serializer('Schema_cache')
+                elif message == 'Compression':
+                    # the client proposes to compress its payloads: send the possible codecs
+                    sock.compressor = PayloadCompressor()
+                    sock.check_sended_with_serializer('Compression')
+                    sock.check_sended_with_serializer(available_codecs())
+                else:
+                    self.process_cmds(message, command_sock=sock)
+
+            # client disconnected, so remove from socket list
+            except Exception as e:
+                self.remove_client(sock)
+        return True
+
     def send_command(self, sock: Socket, command="move_at"):
         """
             Send one of the message contained in self.message_list toward a socket with identity socket_type.
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the write and read back throughputs of scan arrays for various chunk shapes and
+compression filters. Run it with:
+
+    python tests/benchmarks/h5_chunks_benchmark_test.py
+"""
+from pathlib import Path
+import tempfile
+import time
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from pymodaq.utils.enums import enum_checker
+from pymodaq.utils.h5modules.backends import ChunkAccess, Shuffle, compression_libraries
+from pymodaq.utils.h5modules.saving import H5SaverLowLevel
+from pymodaq.utils.logger import set_logger, get_module_name
+
+logger = set_logger(get_module_name(__file__))
+
+
+def benchmark_array(file_path: Path, nav_shape: Tuple[int] = (50, 50), data_shape: Tuple[int] = (512,),
+                    dtype=np.uint16, chunk_access: Union[ChunkAccess, str] = 'frame',
+                    compression: str = None, compression_opts: int = 5, shuffle: Union[Shuffle, str] = None,
+                    backend: str = 'tables', n_reads: int = 10) -> dict:
+    """Write a scan array frame by frame and read it back frame-wise and pixel-wise
+
+    Parameters
+    ----------
+    file_path: Path
+        the h5 file to be (over)written
+    nav_shape: tuple of int
+    data_shape: tuple of int
+    dtype: np.dtype
+    chunk_access: ChunkAccess or str
+        used to choose the chunk shape of the array
+    compression: str
+        the compression library, if None the data are not compressed
+    compression_opts: int
+        the compression level
+    shuffle: Shuffle or str
+    backend: str
+    n_reads: int
+        the number of frames and pixels read back
+
+    Returns
+    -------
+    dict: the chunk shape, the write throughput (MB/s), the mean read time of a frame and of a pixel (ms)
+        and the file size (MB)
+    """
+    rng = np.random.default_rng(0)
+    frames = rng.poisson(100, size=tuple(nav_shape) + tuple(data_shape)).astype(dtype)
+
+    h5saver = H5SaverLowLevel(backend=backend)
+    h5saver.init_file(Path(file_path), new_file=True)
+    h5saver.chunk_access = enum_checker(ChunkAccess, chunk_access)
+    if compression is not None:
+        h5saver.define_compression(compression, compression_opts, shuffle)
+    array = h5saver.add_array(h5saver.raw_group, 'Data', 'data', data_shape=data_shape, array_type=dtype,
+                              data_dimension=f'Data{len(data_shape)}D' if len(data_shape) <= 2 else 'DataND',
+                              scan_shape=nav_shape, add_scan_dim=True)
+    chunk_shape = array.chunk_shape
+
+    start = time.perf_counter()
+    for indexes in np.ndindex(*nav_shape):
+        array[indexes] = frames[indexes]
+    h5saver.flush()
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n_reads):
+        array[tuple(rng.integers(0, size) for size in nav_shape)]
+    frame_time = (time.perf_counter() - start) / n_reads
+
+    start = time.perf_counter()
+    for _ in range(n_reads):
+        array[(slice(None),) * len(nav_shape) + tuple(rng.integers(0, size) for size in data_shape)]
+    pixel_time = (time.perf_counter() - start) / n_reads
+
+    h5saver.close_file()
+    return dict(chunk_shape=chunk_shape, write_MBps=frames.nbytes / write_time / 1e6, frame_read_ms=frame_time * 1e3,
+                pixel_read_ms=pixel_time * 1e3, file_size_MB=Path(file_path).stat().st_size / 1e6)
+
+
+def benchmark(nav_shape: Tuple[int] = (50, 50), data_shape: Tuple[int] = (512,), dtype=np.uint16,
+              compressions: Iterable[str] = None, backend: str = 'tables', **kwargs) -> List[dict]:
+    """Run benchmark_array for each chunk access pattern and compression library
+
+    Parameters
+    ----------
+    compressions: Iterable[str]
+        the compression libraries to compare (None standing for no compression), default to all the
+        libraries available for the backend
+    kwargs: other named parameters of benchmark_array
+
+    Returns
+    -------
+    list of dict: the benchmark_array results together with the chunk_access and compression values
+    """
+    if compressions is None:
+        compressions = [None] + compression_libraries(backend)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for chunk_access in ChunkAccess.names():
+            for compression in compressions:
+                result = dict(chunk_access=chunk_access, compression=compression)
+                result.update(benchmark_array(Path(tmp_dir).joinpath('benchmark.h5'), nav_shape, data_shape,
+                                              dtype, chunk_access, compression, backend=backend, **kwargs))
+                results.append(result)
+    return results
+
+
+def test_benchmark():
+    results = benchmark(nav_shape=(3, 4), data_shape=(16,), compressions=[None, 'zlib'], n_reads=2)
+    assert len(results) == 4
+    for result in results:
+        assert result['chunk_access'] in ('frame', 'pixel')
+        assert len(result['chunk_shape']) == 3
+        assert result['write_MBps'] > 0
+        assert result['file_size_MB'] > 0
+
+
+def main():
+    results = benchmark()
+    logger.info(f'{"access":<8}{"compression":<16}{"chunks":<18}{"write (MB/s)":>14}{"frame (ms)":>12}'
+                f'{"pixel (ms)":>12}{"size (MB)":>11}')
+    for result in results:
+        logger.info(f'{result["chunk_access"]:<8}{str(result["compression"]):<16}{str(result["chunk_shape"]):<18}'
+                    f'{result["write_MBps"]:>14.1f}{result["frame_read_ms"]:>12.3f}{result["pixel_read_ms"]:>12.3f}'
+                    f'{result["file_size_MB"]:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
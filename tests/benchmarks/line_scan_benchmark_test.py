@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the duration of a 2D scan run step by step (a move then a grab at each point) with the same scan run line
+by line (the detectors buffering the data while the actuator runs each line), using the ModulesManager and mock
+modules. Run it with:
+
+    python tests/benchmarks/line_scan_benchmark_test.py
+"""
+import time
+
+import numpy as np
+from qtpy import QtWidgets
+
+from pymodaq.control_modules.mocks import MockLineDetector, MockLineActuator
+from pymodaq.utils.data import DataToExport, DataActuator
+from pymodaq.utils.managers.modules_manager import ModulesManager
+from pymodaq.utils.logger import set_logger, get_module_name
+
+logger = set_logger(get_module_name(__file__))
+
+
+def get_manager(grab_delay: float = 0.01, move_delay: float = 0.01, point_delay: float = 0.001) -> ModulesManager:
+    """Get a ModulesManager driving one line capable detector and two line capable actuators"""
+    detectors = [MockLineDetector('det', grab_delay, point_delay=point_delay)]
+    actuators = [MockLineActuator('slow', move_delay), MockLineActuator('fast', move_delay, point_delay=point_delay)]
+    manager = ModulesManager(detectors, actuators, detectors, actuators)
+    manager.connect_detectors()
+    manager.connect_actuators()
+    return manager
+
+
+def positions_at(slow: float, fast) -> DataToExport:
+    return DataToExport('positions', data=[DataActuator('slow', data=[np.atleast_1d(slow)]),
+                                           DataActuator('fast', data=[np.atleast_1d(fast)])])
+
+
+def run_steps(manager: ModulesManager, n_lines: int, n_points: int) -> int:
+    """Move to and grab each point of the scan, return the number of grabbed points"""
+    n_grabbed = 0
+    for ind_line in range(n_lines):
+        for ind_point in range(n_points):
+            manager.move_actuators(positions_at(float(ind_line), float(ind_point)))
+            if len(manager.grab_datas()) != 0:
+                n_grabbed += 1
+    return n_grabbed
+
+
+def run_lines(manager: ModulesManager, n_lines: int, n_points: int) -> int:
+    """Move to the start of each line then grab it as a whole, return the number of grabbed points"""
+    n_grabbed = 0
+    line = np.arange(n_points, dtype=float)
+    for ind_line in range(n_lines):
+        manager.move_actuators(positions_at(float(ind_line), line[0]))
+        dte = manager.grab_line(positions_at(np.full(line.shape, float(ind_line)), line), 'fast')
+        n_grabbed += dte.get_data_from_name('det').shape[0]
+    return n_grabbed
+
+
+def benchmark_line_scan(n_lines: int = 5, n_points: int = 20, **delays) -> dict:
+    """Run the same scan step by step then line by line
+
+    Parameters
+    ----------
+    n_lines: int
+    n_points: int
+        the number of points of each line
+    delays: optional named arguments of get_manager
+
+    Returns
+    -------
+    dict: the number of grabbed points and the duration (s) of both scans
+    """
+    manager = get_manager(**delays)
+    result = dict()
+    for mode, run in (('step', run_steps), ('line', run_lines)):
+        start = time.perf_counter()
+        result[f'{mode}_points'] = run(manager, n_lines, n_points)
+        result[f'{mode}_s'] = time.perf_counter() - start
+    manager.connect_detectors(False)
+    manager.connect_actuators(False)
+    return result
+
+
+def test_benchmark_line_scan(qtbot):
+    result = benchmark_line_scan(n_lines=3, n_points=10)
+    assert result['step_points'] == result['line_points'] == 30
+    logger.info(f'step: {result["step_s"]:.3f} s, line: {result["line_s"]:.3f} s')
+
+
+def main():
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    logger.info(f'{"points":>8}{"step (s)":>10}{"line (s)":>10}')
+    for n_points in (10, 100, 1000):
+        result = benchmark_line_scan(n_lines=5, n_points=n_points)
+        logger.info(f'{n_points:>8}{result["step_s"]:>10.3f}{result["line_s"]:>10.3f}')
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the serialization and deserialization durations of DataToExport holding more and more DataWithAxes,
+to check that they scale linearly with the number of DataWithAxes. Run it with:
+
+    python tests/benchmarks/serializer_benchmark_test.py
+"""
+import time
+from typing import Iterable, List
+
+import numpy as np
+
+from pymodaq.utils.data import Axis, DataRaw, DataToExport
+from pymodaq.utils.tcp_ip.serializer import Serializer, DeSerializer, SocketString
+from pymodaq.utils.logger import set_logger, get_module_name
+
+logger = set_logger(get_module_name(__file__))
+
+
+def get_dte(n_dwa: int, size: int = 500) -> DataToExport:
+    """Get a DataToExport of n_dwa 1D DataWithAxes, each with its own axis"""
+    return DataToExport('bench', data=[
+        DataRaw(f'dwa{ind}', units='V', labels=[f'label{ind}'], data=[np.linspace(0, 1, size)],
+                axes=[Axis('x', 'm', data=np.linspace(0, 1, size), index=0)])
+        for ind in range(n_dwa)])
+
+
+def benchmark_dte(n_dwa: int, n_repeats: int = 5) -> dict:
+    """Serialize then deserialize a DataToExport of n_dwa DataWithAxes n_repeats times
+
+    Returns
+    -------
+    dict: the number of DataWithAxes, the best serialization and deserialization durations in ms and the
+        DataToExport read back
+    """
+    dte = get_dte(n_dwa)
+    serialization = []
+    deserialization = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        bytes_string = Serializer(dte).to_bytes()
+        serialization.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        dte_back = DeSerializer(SocketString(bytes_string)).dte_deserialization()
+        deserialization.append(time.perf_counter() - start)
+    return dict(n_dwa=n_dwa, serialization_ms=1e3 * min(serialization),
+                deserialization_ms=1e3 * min(deserialization), dte=dte, dte_back=dte_back)
+
+
+def benchmark(n_dwas: Iterable[int] = (100, 200, 400), n_repeats: int = 5) -> List[dict]:
+    return [benchmark_dte(n_dwa, n_repeats) for n_dwa in n_dwas]
+
+
+def test_benchmark():
+    results = benchmark(n_repeats=1)
+    for result in results:
+        assert len(result['dte_back']) == result['n_dwa']
+        for dwa, dwa_back in zip(result['dte'], result['dte_back']):
+            assert dwa == dwa_back
+        logger.info(f'{result["n_dwa"]} dwa: {result["deserialization_ms"]:.1f} ms deserialization')
+
+
+def main():
+    results = benchmark()
+    logger.info(f'{"dwa":>6}{"serialization (ms)":>20}{"deserialization (ms)":>22}{"per dwa (us)":>14}')
+    for result in results:
+        logger.info(f'{result["n_dwa"]:>6}{result["serialization_ms"]:>20.2f}{result["deserialization_ms"]:>22.2f}'
+                    f'{1e3 * result["deserialization_ms"] / result["n_dwa"]:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
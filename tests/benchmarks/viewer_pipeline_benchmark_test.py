@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the memory allocated for each frame going through the plugin -> DAQ_Viewer -> saver pipeline, in number
+of frame copies, and the time spent in each stage. Run it with:
+
+    python tests/benchmarks/viewer_pipeline_benchmark_test.py
+"""
+import gc
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import numpy as np
+import pytest
+from qtpy import QtWidgets
+
+from pymodaq.utils.data import DataToExport, DataFromPlugins
+from pymodaq.utils.h5modules.saving import H5SaverLowLevel
+from pymodaq.utils.h5modules.data_saving import DataToExportEnlargeableSaver
+from pymodaq.utils.logger import set_logger, get_module_name
+
+logger = set_logger(get_module_name(__file__))
+
+
+def frame_copies(func: Callable, frame_nbytes: int) -> Tuple[float, float]:
+    """Call func and get the memory it allocated, as traced by tracemalloc, in number of frames
+
+    tracemalloc only gives the current and peak traced memory so the copies are counted as the frame
+    sized buffers alive at the same time (peak) or still referenced once func returned (retained)
+
+    Parameters
+    ----------
+    func: Callable
+        called without argument
+    frame_nbytes: int
+        the size of a frame in bytes
+
+    Returns
+    -------
+    tuple of float: the peak and retained allocated memory in number of frames
+    """
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    gc.collect()
+    tracemalloc.reset_peak()
+    start, _ = tracemalloc.get_traced_memory()
+    func()
+    current, peak = tracemalloc.get_traced_memory()
+    if not started:
+        tracemalloc.stop()
+    return (peak - start) / frame_nbytes, (current - start) / frame_nbytes
+
+
+def benchmark_pipeline(shape: Tuple[int] = (512, 512), dtype=np.uint16, n_frames: int = 10, show: bool = False,
+                       live: bool = False, staging_frames: int = 1) -> dict:
+    """Send frames to DAQ_Viewer.show_data, as emitted by a plugin, then save the data it emits with
+    grab_done_signal into an h5file, measuring the copies and the duration of both stages
+
+    Parameters
+    ----------
+    shape: tuple of int
+        the shape of the frames
+    dtype: np.dtype
+    n_frames: int
+    show: bool
+        if True the DAQ_Viewer has a user interface and displays the data (requires a QApplication)
+    live: bool
+        if True the frames are received as during a continuous grab, so that only some of them are
+        displayed
+    staging_frames: int
+        the number of frames written at once by the saver, see EArrayStagingBuffer
+
+    Returns
+    -------
+    dict: for the viewer (show_data) and saver (add_data) stages, the mean peak and retained copies per frame
+        and the mean duration per frame (ms, slowed down by tracemalloc)
+    """
+    from pymodaq.control_modules.daq_viewer import DAQ_Viewer
+    from pymodaq.utils.gui_utils import DockArea
+
+    dockarea = DockArea() if show else None
+    viewer = DAQ_Viewer(dockarea, title='benchmark')
+    viewer._grabing = live
+    emitted = []
+    viewer.grab_done_signal.connect(emitted.append)
+
+    rng = np.random.default_rng(0)
+    frames = [DataToExport('benchmark', data=[DataFromPlugins('frame', data=[
+        rng.integers(0, 1000, shape).astype(dtype)])]) for _ in range(n_frames)]
+    frame_nbytes = frames[0][0][0].nbytes
+    viewer.show_data(frames[0])  # so that the viewers are set up
+    QtWidgets.QApplication.processEvents()
+
+    results = {f'{stage}_{metric}': [] for stage in ('viewer', 'saver') for metric in ('peak', 'retained', 'ms')}
+
+    def measure(stage: str, func: Callable):
+        start = time.perf_counter()
+        peak, retained = frame_copies(func, frame_nbytes)
+        results[f'{stage}_ms'].append((time.perf_counter() - start) * 1e3)
+        results[f'{stage}_peak'].append(peak)
+        results[f'{stage}_retained'].append(retained)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        h5saver = H5SaverLowLevel()
+        h5saver.init_file(file_name=Path(tmp_dir).joinpath('benchmark.h5'))
+        saver = DataToExportEnlargeableSaver(h5saver, staging_frames=staging_frames)
+        det_group = h5saver.get_set_group(h5saver.raw_group, 'benchmark')
+
+        tracemalloc.start()
+        for dte in frames:
+            emitted.clear()
+            measure('viewer', lambda: viewer.show_data(dte))
+            QtWidgets.QApplication.processEvents()
+            for dte_saved in emitted:
+                measure('saver', lambda: saver.add_data(det_group, dte_saved, axis_value=0.))
+        tracemalloc.stop()
+        h5saver.close_file()
+
+    viewer.quit_fun()
+    if dockarea is not None:
+        dockarea.close()
+    return {key: float(np.mean(values)) for key, values in results.items()}
+
+
+def test_frame_copies():
+    array = np.ones((256, 256))
+    kept = []
+
+    def copy_twice():
+        array.copy()
+        kept.append(array.copy())
+
+    peak, retained = frame_copies(copy_twice, array.nbytes)
+    assert peak == pytest.approx(1, abs=0.1)
+    assert retained == pytest.approx(1, abs=0.1)
+
+
+@pytest.mark.parametrize('show', (False, True))
+def test_benchmark_pipeline(qtbot, show):
+    result = benchmark_pipeline(shape=(256, 256), n_frames=3, show=show)
+    assert result['viewer_retained'] < 0.5  # saved and displayed data are views of the emitted frames
+    if not show:
+        assert result['viewer_peak'] < 0.5
+    assert result['saver_retained'] < 0.5  # written right away without staging
+
+
+def main():
+    import sys
+    app = QtWidgets.QApplication(sys.argv)
+    logger.info(f'{"show":<6}{"live":<6}{"viewer peak":>12}{"retained":>10}{"ms":>8}'
+                f'{"saver peak":>12}{"retained":>10}{"ms":>8}')
+    for show in (False, True):
+        for live in (False, True):
+            result = benchmark_pipeline(show=show, live=live)
+            logger.info(f'{str(show):<6}{str(live):<6}'
+                        f'{result["viewer_peak"]:>12.2f}{result["viewer_retained"]:>10.2f}{result["viewer_ms"]:>8.2f}'
+                        f'{result["saver_peak"]:>12.2f}{result["saver_retained"]:>10.2f}{result["saver_ms"]:>8.2f}')
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import time
 from collections import OrderedDict
 import numpy as np
 
@@ -16,6 +17,8 @@ from pymodaq.utils.config import Config
 from pymodaq.utils.parameter import utils as putils
 from pymodaq.utils.parameter import Parameter
 from pymodaq.utils.h5modules.browsing import H5BrowserUtil
+from pymodaq.utils.data import DataToExport, DataFromPlugins
+from pymodaq.utils.daq_utils import ThreadCommand
 
 config = Config()
 config_viewer = daqvm.config
@@ -85,6 +88,81 @@ class TestWithoutUI:
         assert putils.iter_children(prog.settings.child('detector_settings'), []) == \
             putils.iter_children(det_params, [])
 
+    def test_data_latched(self, ini_daq_viewer_without_ui):
+        prog, qtbot = ini_daq_viewer_without_ui
+        with qtbot.waitSignal(prog.data_latched_signal) as blocker:
+            prog.thread_status(ThreadCommand('data_latched'))
+        assert blocker.args == [prog.title]
+
+    def test_show_data_without_copy(self, ini_daq_viewer_without_ui):
+        prog, qtbot = ini_daq_viewer_without_ui
+        array = np.random.rand(10, 20)
+        dwa = DataFromPlugins('mydata', data=[array])
+        dte = DataToExport('plugin', data=[dwa])
+        with qtbot.waitSignal(prog.grab_done_signal) as blocker:
+            prog.show_data(dte)
+        dwa_saved = blocker.args[0][0]
+        assert np.shares_memory(dwa_saved.data[0], array)
+        assert not dwa_saved.data[0].flags.writeable
+        assert array.flags.writeable
+        assert dwa_saved is not dwa
+        assert dwa_saved.origin == prog.title
+        assert dwa.origin != prog.title
+        assert prog.display_statistics()['received'] == 1
+
+    def test_live_averaging(self, ini_daq_viewer_without_ui):
+        prog, qtbot = ini_daq_viewer_without_ui
+        prog.settings.child('main_settings', 'live_averaging').setValue(True)
+        for value in (1., 2., 6.):
+            dte = DataToExport('plugin', data=[DataFromPlugins('mydata', data=[np.full((10, ), value)])])
+            with qtbot.waitSignal(prog.grab_done_signal) as blocker:
+                prog.show_data(dte)
+        assert prog.settings['main_settings', 'N_live_averaging'] == 3
+        assert np.allclose(blocker.args[0][0][0], 3.)
+        assert blocker.args[0][0].origin == prog.title
+
+    def test_line_ready(self, ini_daq_viewer_without_ui):
+        prog, qtbot = ini_daq_viewer_without_ui
+        array = np.random.rand(5, 3)
+        dte = DataToExport('plugin', data=[DataFromPlugins('CH0', data=[array], nav_indexes=(0,))])
+        with qtbot.waitSignal(prog.line_done_signal) as blocker:
+            prog.line_ready(dte)
+        dwa_line = blocker.args[0][0]
+        assert dwa_line.origin == prog.title != dte.name
+        assert dte[0].origin != prog.title
+        assert np.shares_memory(dwa_line[0], array)
+
+        with qtbot.waitSignal(prog.grab_done_signal) as blocker:
+            prog.show_data(DataToExport('plugin', data=[DataFromPlugins('CH0', data=[array[0]])]))
+        assert blocker.args[0][0].get_full_name() == dwa_line.get_full_name()  # same names as in step mode
+
+
+class TestDisplay:
+    def test_coalesce_frames(self, ini_daq_viewer_ui):
+        prog, qtbot, dockarea = ini_daq_viewer_ui
+        prog.settings.child('main_settings', 'refresh_time').setValue(200)
+        prog._grabing = True
+        prog._start_grab_time = time.perf_counter()
+        for ind in range(5):
+            dte = DataToExport('plugin', data=[DataFromPlugins('mydata', data=[np.random.rand(10, 20)])])
+            with qtbot.waitSignal(prog.grab_done_signal):  # emitted for each frame
+                prog.show_data(dte)
+        assert prog.display_statistics() == dict(received=5, displayed=0, coalesced=4)
+        qtbot.waitUntil(lambda: prog.display_statistics()['displayed'] == 1, timeout=2000)
+        prog._grabing = False
+
+    def test_viewers_get_views(self, ini_daq_viewer_ui):
+        prog, qtbot, dockarea = ini_daq_viewer_ui
+        array = np.random.rand(10, 20)
+        prog.show_data(DataToExport('plugin', data=[DataFromPlugins('mydata', data=[array])]))
+        qtbot.waitUntil(lambda: getattr(prog.viewers[0], '_raw_data', None) is not None, timeout=2000)
+        dwa_saved = prog.current_data.get_data_from_name('mydata')
+        dwa_shown = prog.viewers[0]._raw_data
+        assert dwa_shown is not dwa_saved  # viewer processing cannot modify the data to be saved
+        assert np.shares_memory(dwa_shown[0], array)
+        assert not dwa_shown[0].flags.writeable
+
+
 @pytest.mark.skip
 class TestWithUI:
 
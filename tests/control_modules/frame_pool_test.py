@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the FramePool buffers and of their use by the DAQ_Viewer
+"""
+import numpy as np
+from qtpy import QtWidgets
+
+from pymodaq.control_modules.daq_viewer import DAQ_Viewer
+from pymodaq.control_modules.frame_pool import FramePool
+from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base
+from pymodaq.utils.data import DataToExport, DataFromPlugins
+
+
+def test_frame_pool():
+    pool = FramePool(n_slots=2)
+    first = pool.get_buffer((10, 20), np.uint16)
+    assert first.shape == (10, 20)
+    assert first.dtype == np.uint16
+    second = pool.get_buffer((10, 20), np.uint16)
+    assert not np.shares_memory(first, second)
+
+    extra = pool.get_buffer((10, 20), np.uint16)  # both slots in use
+    assert not any(np.shares_memory(extra, slot.buffer) for slot in pool.slots)
+    assert pool.statistics()['exhausted'] == 1
+
+    view = first[2:, ::2]
+    del first
+    assert pool.get_buffer((10, 20), np.uint16) is not pool.slots[0].buffer  # still in use through the view
+    del view
+    assert pool.get_buffer((10, 20), np.uint16) is pool.slots[0].buffer
+
+    statistics = pool.statistics()
+    assert statistics['slots'] == 2
+    assert statistics['in_use'] == 1
+    assert statistics['served'] == 5
+    assert statistics['allocated'] == 2
+    assert statistics['exhausted'] == 2
+    assert statistics['lag'] == 3  # second, served second, is still in use
+
+    pool.get_buffer((5,), np.float64)
+    assert pool.statistics()['slots'] == 3
+    pool.clear()
+    assert pool.statistics()['slots'] == 0
+
+
+def test_viewer_frame_pool(qtbot):
+    prog = DAQ_Viewer()
+    pool = prog.frame_pool
+    for ind in range(20):
+        frame = pool.get_buffer((64, 32), np.uint16)
+        frame[:] = ind
+        prog.show_data(DataToExport('plugin', data=[DataFromPlugins('frame', data=[frame])]))
+        del frame
+        QtWidgets.QApplication.processEvents()
+    assert np.allclose(prog.current_data[0][0], 19)
+
+    statistics = pool.statistics()
+    assert statistics['served'] == 20
+    assert statistics['exhausted'] == 0
+    assert statistics['allocated'] < pool.n_slots  # only the latest frames are still held by the consumers
+    assert statistics['in_use'] >= 1
+    prog.quit_fun()
+    QtWidgets.QApplication.processEvents()
+
+
+def test_plugin_frame_buffer(qtbot):
+    plugin = DAQ_Viewer_base()
+    assert plugin.get_frame_buffer((4, 5), np.uint8).shape == (4, 5)  # no pool without a DAQ_Detector
+
+    prog = DAQ_Viewer()
+    plugin.parent = prog
+    frame = plugin.get_frame_buffer((4, 5), np.uint8)
+    assert frame is prog.frame_pool.slots[0].buffer
+    prog.quit_fun()
+    QtWidgets.QApplication.processEvents()
@@ -8,7 +8,7 @@ import numpy as np
 import pytest
 
 from pymodaq.utils import data as data_mod
-from pymodaq.post_treatment.process_to_scalar import DataProcessorFactory
+from pymodaq.post_treatment.process_to_scalar import DataProcessorFactory, SignalSummedArea
 
 Nn0 = 11  # navigation axis 0
 Nn1 = 7  # navigation axis 1
@@ -91,11 +91,49 @@ def test_process_multiple_axes_at_once(process, Nnav, Nsig, Ndata):
         assert data_processed.source == 'calculated'
 
 
+@pytest.mark.parametrize("Nsig", (1, 2))
+@pytest.mark.parametrize("Nnav", (1, 2))
+@pytest.mark.parametrize("process", ['mean', 'sum'])
+def test_signal_summed_area(process, Nnav, Nsig):
+    data = init_data_uniform(Nnav=Nnav, Nsig=Nsig, Ndata=2)
+    summed_area = SignalSummedArea.compute(data, chunk_nbytes=1)
+    if Nsig == 1:
+        limits = [(2, 7)]
+        sub_data = data.isig[2:7]
+    else:
+        limits = [(1, 4), (2, 5)]
+        sub_data = data.isig[1:4, 2:5]
+    data_processed = getattr(summed_area, process)(limits)
+    data_expected = processors.get(process).process(sub_data)
+    assert data_processed.shape == data_expected.shape
+    for ind in range(len(data)):
+        assert np.allclose(data_processed[ind], data_expected[ind])
+    assert SignalSummedArea.compute(data, lambda: True) is None
 
 
-
-
-
-
-
-
+@pytest.mark.parametrize("Nsig", (1, 2))
+@pytest.mark.parametrize("process", ['mean', 'sum'])
+def test_signal_summed_area_nonfinite(process, Nsig):
+    data = init_data_uniform(Nnav=1, Nsig=Nsig, Ndata=1)
+    data[0][3, ...] = 0.
+    data[0][3, (1,) * Nsig] = np.nan
+    data[0][5, (2,) * Nsig] = np.inf
+    summed_area = SignalSummedArea.compute(data, chunk_nbytes=1)
+    for limits in ([(0, 2)] * Nsig, [(2, 4)] * Nsig, [(0, None)] * Nsig):
+        sub_data = data.isig[tuple(slice(*limit) for limit in limits)]
+        data_processed = getattr(summed_area, process)(limits)
+        data_expected = processors.get(process).process(sub_data)
+        assert np.allclose(data_processed[0], data_expected[0], equal_nan=True)
+    assert np.isnan(summed_area.sum([(0, None)] * Nsig)[0][3])
+    assert summed_area.sum([(2, 4)] * Nsig)[0][3] == 0.  # the NaN does not propagate downstream
+
+
+@pytest.mark.parametrize("dtype, table_dtype", ((np.float32, np.float32), (np.uint16, np.float64),
+                                                (np.complex64, np.complex64), (np.float64, np.float64)))
+def test_signal_summed_area_dtype(dtype, table_dtype):
+    data = init_data_uniform(Nnav=1, Nsig=2, Ndata=1)
+    data.data = [(100 * data[0]).astype(dtype)]
+    summed_area = SignalSummedArea.compute(data)
+    assert summed_area._tables[0].dtype == table_dtype
+    assert SignalSummedArea.nbytes(data) == summed_area._tables[0].nbytes
+    assert np.allclose(summed_area.sum([(1, 4), (2, 5)])[0], np.sum(data[0][:, 1:4, 2:5], axis=(1, 2)), rtol=1e-5)
@@ -320,6 +320,50 @@ class TestDataBase:
         data = data_mod.DataBase('myData', source='calculated',  data=[DATA2D])
         assert data.source == data_mod.DataSource['calculated']
 
+    def test_view(self):
+        array = np.random.rand(5, 10)
+        data = data_mod.DataBase('myData', source='raw', data=[array, 2 * array], labels=['a', 'b'], units='m')
+        data_view = data.view()
+        assert data_view is not data
+        assert data_view == data
+        assert data_view.labels == data.labels
+        assert data_view.read_only and not data.read_only
+        assert np.shares_memory(data_view[0], array)
+        with pytest.raises(ValueError):
+            data_view[0][0, 0] = 1.
+
+        data_view.make_writable()  # copy on write
+        assert not data_view.read_only
+        assert not np.shares_memory(data_view[0], array)
+        data_view[0][0, 0] = 1.
+        assert array[0, 0] != 1.
+
+    def test_inplace_operations(self):
+        array = np.random.rand(5, 10)
+        data = data_mod.DataBase('myData', source='raw', data=[array.copy()], units='m')
+        data_view = data.view()
+        data_id = id(data_view)
+        data_view *= 2
+        assert id(data_view) == data_id
+        assert not data_view.read_only
+        assert np.allclose(data_view[0], 2 * array)
+        assert np.allclose(data[0], array)  # copy on write
+
+        data -= data_mod.DataBase('other', source='raw', data=[np.ones((5, 10))], units='mm')
+        assert np.allclose(data[0], array - 1e-3)
+
+        data_int = data_mod.DataBase('myData', source='raw', data=[np.ones((5, 10), dtype=np.uint16)])
+        data_int_id = id(data_int)
+        data_int -= data_int  # unsigned integers are not subtracted in place
+        assert id(data_int) != data_int_id
+        assert data_int[0].dtype != np.uint16
+
+    def test_operations_do_not_share_arrays(self):
+        data = data_mod.DataBase('myData', source='raw', data=[DATA2D, DATA2D], labels=['a', 'b'], units='m')
+        for new_data in (data + data, data * 2, data - data, data.pop(1), data.units_as('mm', inplace=False)):
+            assert new_data.labels[0] == 'b' if new_data.length == 1 else new_data.labels == ['a', 'b']
+            assert not any(np.shares_memory(new_array, array) for new_array in new_data for array in data)
+
     @mark.parametrize("data_array, datadim", [(DATA0D, 'Data0D'), (DATA0D, data_mod.DataDim['Data0D']),
                                               (DATA0D, 'Data2D')])
     def test_get_dim(self, data_array, datadim):
@@ -1138,6 +1182,32 @@ class TestDataToExport:
         data.append(dat3)
         assert len(data) == 3
         assert data.data == [dat1, dat2, dat3]
+        assert data[2] is not dat3
+
+        data.append(dat3, copy=False)
+        assert data[2] is dat3
+        data.append(data_mod.DataToExport('other', data=[dat1]), copy=False)
+        assert data[2] is dat1  # replaced
+
+    def test_view(self, ini_data_to_export):
+        dat1, dat2, data = ini_data_to_export
+        data_view = data.view()
+        assert data_view.name == data.name
+        assert len(data_view) == len(data)
+        for dwa_view, dwa in zip(data_view, data):
+            assert dwa_view is not dwa
+            assert dwa_view.read_only
+            assert np.shares_memory(dwa_view[0], dwa[0])
+
+    def test_inplace_operations(self, ini_data_to_export):
+        dat1, dat2, data = ini_data_to_export
+        data_view = data.view()
+        data_view -= data
+        for dwa_view, dwa in zip(data_view, data):
+            assert not dwa_view.read_only
+            assert not np.shares_memory(dwa_view[0], dwa[0])
+            assert np.allclose(dwa_view[0], 0.)
+            assert not np.allclose(dwa[0], 0.)
 
     def test_getitem(self):
         dat0D = init_data(DATA0D, 2, name='my0DData', source='raw')
@@ -1383,6 +1453,135 @@ class TestDataToExport:
         assert dwa.labels == dat1.labels + dat2.labels + dat3.labels
 
 
+class TestDataAverager:
+    @pytest.mark.parametrize('with_errors', (False, True))
+    def test_average(self, with_errors):
+        frames = [np.random.randint(0, 1000, (5, 6)).astype(np.uint16) for _ in range(10)]
+        averager = data_mod.DataAverager(with_errors=with_errors)
+        assert averager.average() is None
+        for frame in frames:
+            averager.add(data_mod.DataToExport('mydte', data=[
+                data_mod.DataRaw('raw', data=[frame, 2 * frame], units='m'),
+                data_mod.DataRaw('raw0D', data=[np.array([frame[0, 0]])])]))
+        assert averager.count == len(frames)
+
+        dte = averager.average()
+        assert dte.name == 'mydte'
+        assert dte[0].units == 'm'
+        assert np.allclose(dte[0][0], np.mean(frames, axis=0))
+        assert np.allclose(dte[0][1], 2 * np.mean(frames, axis=0))
+        assert dte[1][0] == pytest.approx(np.mean([frame[0, 0] for frame in frames]))
+        if with_errors:
+            assert np.allclose(dte[0].errors[0], np.std(frames, axis=0, ddof=1))
+            assert np.allclose(dte[0].errors[1], 2 * np.std(frames, axis=0, ddof=1))
+        else:
+            assert dte[0].errors is None
+
+    @pytest.mark.parametrize('with_errors', (False, True))
+    def test_average_complex(self, with_errors):
+        frames = [np.random.rand(5, 6) + 1j * np.random.rand(5, 6) for _ in range(4)]
+        averager = data_mod.DataAverager(with_errors=with_errors)
+        for frame in frames:
+            averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[frame])]))
+        dte = averager.average()
+        assert np.allclose(dte[0][0], np.mean(frames, axis=0))
+        if with_errors:
+            assert np.allclose(dte[0].errors[0], np.std(frames, axis=0, ddof=1))
+
+        averager.reset()
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[np.abs(frames[0])])]))
+        assert averager._sums[0][0].dtype == np.float64  # reallocated for real data
+        assert np.allclose(averager.average()[0][0], np.abs(frames[0]))
+
+    def test_restart(self):
+        averager = data_mod.DataAverager()
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[np.ones((5,))])]))
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[np.zeros((5,))])]))
+        assert averager.count == 2
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[np.ones((3,))])]))
+        assert averager.count == 1  # new structure
+        assert np.allclose(averager.average()[0][0], 1.)
+        averager.reset()
+        assert averager.count == 0
+
+    def test_reuse_buffers(self):
+        averager = data_mod.DataAverager(with_errors=True)
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[np.ones((5,))])]))
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[np.zeros((5,))])]))
+        sums = averager._sums[0][0]
+        averager.reset()
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[3 * np.ones((5,))])]))
+        averager.add(data_mod.DataToExport('mydte', data=[data_mod.DataRaw('raw', data=[np.ones((5,))])]))
+        assert averager._sums[0][0] is sums  # zeroed, not reallocated
+        dte = averager.average()
+        assert np.allclose(dte[0][0], 2.)
+        assert np.allclose(dte[0].errors[0], np.std([3., 1.], ddof=1))
+
+
+class MemoryLazyArray(data_mod.LazyArray):
+    """LazyArray over a numpy array, counting the reads"""
+    chunk_nbytes = 1  # so that reductions are streamed frame by frame
+
+    def __init__(self, array: np.ndarray):
+        self._array = array
+        self.reads = 0
+
+    @property
+    def shape(self):
+        return self._array.shape
+
+    @property
+    def dtype(self):
+        return self._array.dtype
+
+    def _read(self, item):
+        self.reads += 1
+        return self._array[item]
+
+
+class TestLazyArray:
+    def test_indexing(self):
+        array = np.arange(4 * 5 * 6).reshape((4, 5, 6))
+        lazy = MemoryLazyArray(array)
+        assert lazy.shape == array.shape and lazy.ndim == 3 and lazy.size == array.size
+        for item in (1, -1, (slice(None), 2), (Ellipsis, 3), (1, Ellipsis, slice(1, 4)),
+                     (slice(None, None, -2), slice(3, 0, -1)), (slice(4, 2),), ([0, 2], 1)):
+            assert np.all(lazy[item] == array[item])
+        with pytest.raises(IndexError):
+            lazy[4]
+        assert np.all(np.asarray(lazy) == array)
+        assert np.all(lazy + 1 == array + 1)
+        assert np.all(np.diff(lazy, axis=1) == np.diff(array, axis=1))
+
+    @pytest.mark.parametrize('func', (np.mean, np.sum, np.min, np.max))
+    @pytest.mark.parametrize('axis', (None, 0, 1, (0, 2), -1))
+    def test_reductions(self, func, axis):
+        array = np.random.randint(0, 1000, (7, 3, 4)).astype(np.uint16)
+        lazy = MemoryLazyArray(array)
+        result = func(lazy, axis=axis)
+        assert lazy.reads == array.shape[0]
+        assert np.asarray(result).dtype == np.asarray(func(array, axis=axis)).dtype
+        assert np.allclose(result, func(array, axis=axis))
+
+    def test_data_with_axes(self):
+        array = np.random.random_sample((7, 3, 4))
+        data = data_mod.DataRaw('lazy', data=[MemoryLazyArray(array)], nav_indexes=(0,),
+                                axes=[data_mod.Axis(f'axis{ind}', data=np.arange(size, dtype=float), index=ind)
+                                      for ind, size in enumerate(array.shape)])
+        assert data.is_lazy
+        assert data.read_only
+        assert data.deepcopy()[0] is data[0]
+        assert not data.inav[2].is_lazy
+        assert np.allclose(data.inav[2][0], array[2])
+        assert np.allclose(data.isig[1, 1:3][0], array[:, 1, 1:3])
+        assert np.allclose(data.mean(axis=0)[0], np.mean(array, axis=0))
+        data_memory = data.to_memory()
+        assert not data_memory.is_lazy
+        assert np.allclose(data_memory[0], array)
+        assert data.make_writable() is data
+        assert not data.is_lazy and not data.read_only
+
+
 class TestUnits:
 
     def test_unit_in_registry(self):
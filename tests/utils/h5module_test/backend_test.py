@@ -65,6 +65,17 @@ def test_check_mandatory_attrs():
     assert result == f'test'
 
 
+@pytest.mark.parametrize('access, expected', [('frame', (4, 256, 256)), ('pixel', (1000, 16, 16))])
+def test_compute_chunk_shape(access, expected):
+    chunk_shape = backends.compute_chunk_shape((None,), (256, 256), np.uint16, access,
+                                               target_size=512 * 1024, expected_rows=1000)
+    assert chunk_shape == expected
+    assert backends.compute_chunk_shape((10, 20), (), np.float64, access, target_size=1024) == (10, 10)
+    assert backends.compute_chunk_shape((), (5,), np.float64, access, target_size=1024) == (5,)
+    # a chunk cannot be smaller than a single element
+    assert backends.compute_chunk_shape((3,), (4,), np.float64, access, target_size=1) == (1, 1)
+
+
 class TestNode:
     @pytest.mark.parametrize('backend', tested_backend)
     def test_init(self, backend):
@@ -267,6 +278,53 @@ class TestH5Backend:
         array1 = bck.create_carray(g1, 'carray1', obj=array_data)
         assert np.all(array1.read() == pytest.approx(array_data))
 
+    @pytest.mark.parametrize('compression', ['zlib', 'blosc:lz4', 'blosc2:zstd'])
+    @pytest.mark.parametrize('shuffle', backends.Shuffle.names())
+    def test_chunked_carray(self, get_backend, compression, shuffle):
+        bck = get_backend
+        if compression not in backends.compression_libraries(bck.backend):
+            pytest.skip(f'{compression} is not available with the {bck.backend} backend')
+        if shuffle == 'bit' and not compression.startswith('blosc'):
+            with pytest.raises(ValueError):
+                bck.define_compression(compression, 5, shuffle)
+            return
+        g1 = bck.get_set_group(bck.root(), 'g1')
+        array_data = generate_random_data((20, 30, 8), np.uint16)
+        bck.define_compression(compression, 5, shuffle)
+        array = bck.create_carray(g1, 'carray', obj=array_data, chunk_shape=(20, 30, 1))
+        assert array.chunk_shape == (20, 30, 1)
+        assert np.all(array.read() == array_data)
+
+        earray = bck.create_earray(g1, 'earray', dtype=np.uint16, data_shape=(30, 8),
+                                   chunk_shape=(10, 30, 8))
+        assert earray.chunk_shape == (10, 30, 8)
+        earray.append(array_data)
+        assert np.all(earray.read() == array_data)
+
+    @pytest.mark.parametrize('compression, shuffle', [(None, None), ('zlib', 'none'), ('zlib', 'byte'),
+                                                      ('blosc:lz4', 'byte')])
+    def test_write_direct_chunk(self, get_backend, compression, shuffle):
+        bck = get_backend
+        if compression is not None:
+            if compression not in backends.compression_libraries(bck.backend):
+                pytest.skip(f'{compression} is not available with the {bck.backend} backend')
+            bck.define_compression(compression, 5, shuffle)
+        g1 = bck.get_set_group(bck.root(), 'g1')
+        frame = generate_random_data((16, 32), np.uint16)
+        array = bck.create_carray(g1, 'carray', chunk_shape=(1, 1, 16, 32), shape=(3, 4, 16, 32),
+                                  dtype=np.uint16)
+        assert np.all(array[1, 2] == 0)
+
+        direct = bck.write_direct_chunk(array, (1, 2), frame)
+        expected = (compression in (None, 'zlib') and
+                    (bck.backend == 'h5py' or hasattr(array.array, 'write_chunk')))
+        assert direct == expected
+        if not direct:
+            array[1, 2] = frame
+        assert np.all(array[1, 2] == frame)
+        assert not bck.write_direct_chunk(array, (1, 2), frame.astype(np.float32))  # wrong dtype
+        assert not bck.write_direct_chunk(array, (1, 2), frame[:8])  # not filling a chunk
+
     def test_earray(self, get_backend):
         bck = get_backend
         g1 = bck.get_set_group(bck.root(), 'g1')
@@ -293,6 +351,33 @@ class TestH5Backend:
         utils.check_vals_in_iterable(array1.attrs['shape'], expected_shape)
         bck.close_file()
 
+    def test_earray_staging(self, get_backend):
+        bck = get_backend
+        g1 = bck.get_set_group(bck.root(), 'g1')
+        array_shape = (10, 3)
+        array = bck.create_earray(g1, 'array', dtype=np.uint32, data_shape=array_shape)
+        staging_buffer = bck.get_staging_buffer(array, max_frames=5, max_delay_ms=1e6)
+        assert bck.get_staging_buffer(array) is staging_buffer
+
+        frames = [generate_random_data(array_shape, np.uint32) for _ in range(7)]
+        for frame in frames[:4]:
+            staging_buffer.append(frame)
+        assert len(staging_buffer) == 4
+        assert array.attrs['shape'][0] == 0
+        staging_buffer.append(frames[4])  # reaching max_frames triggers a single write
+        assert len(staging_buffer) == 0
+        assert array.attrs['shape'] == (5, 10, 3)
+
+        for frame in frames[5:]:
+            staging_buffer.append(frame)
+        bck.flush()
+        assert array.attrs['shape'] == (7, 10, 3)
+        assert np.all(array.read() == np.stack(frames))
+
+        staging_buffer.max_delay_ms = 0.  # any staged frame is too old
+        staging_buffer.append(frames[0])
+        assert array.attrs['shape'][0] == 8
+
     @pytest.mark.parametrize('compression', ['gzip', 'zlib'])
     @pytest.mark.parametrize('comp_level', list(range(0, 10, 3)))
     def test_earray_comp(self, get_backend, compression, comp_level):
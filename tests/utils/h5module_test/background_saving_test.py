@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the BackgroundSaver writing thread, its overflow policies and its use of the h5file lock
+"""
+from contextlib import contextmanager
+import threading
+
+import numpy as np
+import pytest
+
+from pymodaq.utils.h5modules import saving
+from pymodaq.utils.h5modules.background_saving import BackgroundSaver, BackpressurePolicy, SpillFile
+from pymodaq.utils.h5modules.data_saving import DataToExportTimedSaver, DataLoader
+from pymodaq.utils.data import DataToExport, DataRaw
+
+
+@pytest.fixture()
+def get_h5saver(tmp_path):
+    h5saver = saving.H5SaverLowLevel()
+    addhoc_file_path = tmp_path.joinpath('h5file.h5')
+    h5saver.init_file(file_name=addhoc_file_path)
+
+    yield h5saver
+    h5saver.close_file()
+
+
+def get_dte(value: float) -> DataToExport:
+    return DataToExport('mydte', data=[DataRaw('mydata', data=[np.array([value])])])
+
+
+def load_values(h5saver) -> np.ndarray:
+    return DataLoader(h5saver).load_data('/RawData/MyDet/Data0D/CH00/EnlData00')[0]
+
+
+def test_spill_file():
+    spill = SpillFile()
+    for ind in range(3):
+        spill.push(('add_data', ind))
+    assert len(spill) == 3
+    assert spill.pop() == ('add_data', 0)
+    spill.push(('add_data', 3))
+    assert [spill.pop()[1] for _ in range(3)] == [1, 2, 3]
+    assert len(spill) == 0
+    spill.close()
+
+
+@contextmanager
+def locked_by_another_thread(h5saver):
+    """Hold the lock of the h5saver from another thread, as a busy writer would"""
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with h5saver.lock:
+            locked.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    locked.wait(10)
+    try:
+        yield
+    finally:
+        release.set()
+        thread.join()
+
+
+class FlushingSaver(DataToExportTimedSaver):
+    """Flush the file after each added data, so from the writer thread when in the background"""
+
+    def add_data(self, where, data, **kwargs):
+        super().add_data(where, data, **kwargs)
+        self.h5saver.flush()
+
+
+@pytest.mark.parametrize('policy', BackpressurePolicy.names())
+def test_background_saver(get_h5saver, policy):
+    h5saver = get_h5saver
+    det_group = h5saver.get_set_group(h5saver.raw_group, 'MyDet')
+    saver = BackgroundSaver(DataToExportTimedSaver(h5saver), max_queue_size=3, policy=policy)
+    assert saver.running
+
+    with locked_by_another_thread(h5saver):  # the writer thread cannot write while the lock is held
+        saver.add_data('/RawData/MyDet', get_dte(0.))
+        assert saver.join(timeout=0.1) is False
+        if policy != 'block':  # would block until the lock is released
+            for ind in range(1, 6):
+                saver.add_data(det_group, get_dte(float(ind)))
+
+    h5saver.flush()  # waits for the writer
+    statistics = saver.statistics()
+    assert statistics['queue_depth'] == 0
+    assert statistics['errors'] == 0
+    values = load_values(h5saver)
+    if policy == 'block':
+        assert np.allclose(values, [0.])
+    elif policy == 'drop_oldest':
+        assert statistics['dropped'] == 3
+        assert np.allclose(values, [3., 4., 5.])
+    else:
+        assert statistics['spilled'] == 3
+        assert statistics['max_queue_depth'] == 6
+        assert np.allclose(values, [0., 1., 2., 3., 4., 5.])
+
+    saver.close_file()
+    assert not saver.running
+    assert not h5saver.isopen()
+    with pytest.raises(IOError):
+        saver.add_data('/RawData/MyDet', get_dte(0.))
+
+
+def test_drop_oldest_keeps_structure(get_h5saver):
+    h5saver = get_h5saver
+    saver = BackgroundSaver(DataToExportTimedSaver(h5saver), max_queue_size=3, policy='drop_oldest')
+    with locked_by_another_thread(h5saver):
+        saver.add_data('/RawData/MyDet', get_dte(0.))
+        saver.add_bkg('/RawData/MyDet', get_dte(0.))
+        saver.add_error('/RawData/MyDet', get_dte(0.))
+        for ind in range(1, 4):
+            saver.add_data('/RawData/MyDet', get_dte(float(ind)))
+        assert [job[0] for job in saver._jobs] == ['add_bkg', 'add_error', 'add_data']
+        saver.add_bkg('/RawData/MyDet', get_dte(0.))  # never dropped, even if no data can be
+        assert [job[0] for job in saver._jobs] == ['add_bkg', 'add_error', 'add_bkg']
+    assert saver.statistics()['dropped'] == 4
+    saver.close_file()
+
+
+def test_block_while_holding_lock(get_h5saver):
+    h5saver = get_h5saver
+    h5saver.get_set_group(h5saver.raw_group, 'MyDet')
+    saver = BackgroundSaver(DataToExportTimedSaver(h5saver), max_queue_size=2, policy='block')
+    with h5saver.lock:  # the writer thread cannot make room: the queued data are written from this thread
+        for ind in range(5):
+            saver.add_data('/RawData/MyDet', get_dte(float(ind)))
+        h5saver.flush()
+        assert saver.queue_depth == 0
+    assert np.allclose(load_values(h5saver), [0., 1., 2., 3., 4.])
+    saver.close_file()
+
+
+def test_flush_from_writer(get_h5saver):
+    h5saver = get_h5saver
+    h5saver.get_set_group(h5saver.raw_group, 'MyDet')
+    saver = BackgroundSaver(FlushingSaver(h5saver), max_queue_size=2, policy='block')
+    for ind in range(3):
+        saver.add_data('/RawData/MyDet', get_dte(float(ind)))
+    assert saver.join(timeout=5)
+    assert saver.statistics()['errors'] == 0
+    assert np.allclose(load_values(h5saver), [0., 1., 2.])
+    saver.close_file()
+
+
+def test_load_queued_data(get_h5saver):
+    h5saver = get_h5saver
+    h5saver.get_set_group(h5saver.raw_group, 'MyDet')
+    saver = BackgroundSaver(DataToExportTimedSaver(h5saver), max_queue_size=10)
+    saver.add_data('/RawData/MyDet', get_dte(0.))
+    assert saver.join(timeout=5)
+
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with h5saver.lock:
+            locked.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    locked.wait(10)
+    for ind in range(1, 3):
+        saver.add_data('/RawData/MyDet', get_dte(float(ind)))
+    threading.Timer(0.1, release.set).start()
+    assert np.allclose(load_values(h5saver), [0., 1., 2.])  # waits for the queued data to be written
+    thread.join()
+    saver.close_file()
@@ -8,13 +8,13 @@ import numpy as np
 import pytest
 from pathlib import Path
 
-from pymodaq.utils.h5modules import saving
+from pymodaq.utils.h5modules import saving, data_saving
 from pymodaq.utils.h5modules.data_saving import (DataLoader, AxisSaverLoader,
                                                  DataSaverLoader, DataToExportSaver,
                                                  DataEnlargeableSaver, DataToExportTimedSaver,
                                                  SPECIAL_GROUP_NAMES, DataToExportExtendedSaver,
                                                  DataToExportEnlargeableSaver, DataExtendedSaver,
-                                                 DataLoader, BkgSaver, squeeze, DataDim)
+                                                 DataLoader, BkgSaver, squeeze, DataDim, H5LazyArray)
 from pymodaq.utils.data import Axis, DataWithAxes, DataSource, DataToExport, DataRaw
 
 
@@ -371,6 +371,7 @@ class TestDataEnlargeableSaver:
         data.create_missing_axes()
 
         data_saver.add_data(h5saver.raw_group, data, axis_values=axis_values)
+        data_saver.flush()  # the appended frames are staged in memory, see EArrayStagingBuffer
 
         data_node = h5saver.get_node('/RawData/EnlData00')
 
@@ -378,6 +379,7 @@ class TestDataEnlargeableSaver:
         ESHAPE += list(data_array.shape)
         assert data_node.attrs['shape'] == tuple(ESHAPE)
         data_saver.add_data(h5saver.raw_group, data, axis_values=axis_values)
+        data_saver.flush()
         ESHAPE = [2]
         ESHAPE += list(data_array.shape)
         assert data_node.attrs['shape'] == tuple(ESHAPE)
@@ -428,6 +430,76 @@ class TestDataExtendedSaver:
             assert data_node.attrs['shape'] == tuple(data_ext_shape)
             assert np.all(data_node[tuple(INDEXES)] == pytest.approx(data[ind]))
 
+    @pytest.mark.parametrize('backend', ['tables', 'h5py'])
+    def test_add_block(self, tmp_path, backend):
+        h5saver = saving.H5SaverLowLevel(backend=backend)
+        h5saver.init_file(file_name=tmp_path.joinpath('h5file.h5'))
+
+        EXT_SHAPE = (3, 4)
+        data_saver = DataExtendedSaver(h5saver, EXT_SHAPE, direct_chunk_write=True)
+        lines = np.random.rand(*EXT_SHAPE, len(DATA1D))
+        for ind_line in range(EXT_SHAPE[0]):
+            line = DataWithAxes(name='mydata', data=[lines[ind_line]], source='raw', dim='DataND',
+                                nav_indexes=(0,),
+                                axes=[Axis(data=create_axis_array(len(DATA1D)), label='myaxis', index=1)])
+            if ind_line % 2:  # back and forth line
+                line = line.deepcopy_with_new_data([lines[ind_line, ::-1]], source='raw', keep_dim=True)
+                indexes = [ind_line, slice(EXT_SHAPE[1] - 1, None, -1)]
+            else:
+                indexes = [ind_line, slice(0, EXT_SHAPE[1])]
+            data_saver.add_data(h5saver.raw_group, line, indexes=indexes)
+
+        data_node = h5saver.get_node('/RawData/Data00')
+        assert data_node.attrs['shape'] == EXT_SHAPE + (len(DATA1D),)
+        assert np.all(data_node.read() == pytest.approx(lines))
+        assert len(data_saver.get_axes(h5saver.raw_group)) == 1  # only the signal axis
+        with pytest.raises(IndexError):
+            data_saver.add_data(h5saver.raw_group, line, indexes=[0, slice(0, 4, 2)])
+        h5saver.close_file()
+
+    @pytest.mark.parametrize('backend', ['tables', 'h5py'])
+    def test_direct_chunk_write(self, tmp_path, backend):
+        h5saver = saving.H5SaverLowLevel(backend=backend)
+        h5saver.init_file(file_name=tmp_path.joinpath('h5file.h5'))
+        h5saver.define_compression('zlib', 5, 'byte')
+
+        EXT_SHAPE = (3, 4)
+        data_saver = DataExtendedSaver(h5saver, EXT_SHAPE, direct_chunk_write=True)
+        frames = [np.random.randint(0, 1000, (256, 128)).astype(np.uint16) for _ in range(2)]
+        data = DataWithAxes(name='mydata', data=frames, source='raw', dim='Data2D')
+        small_data = DataWithAxes(name='mysmalldata', data=[DATA1D], source='raw', dim='Data1D')
+        data_group = h5saver.get_set_group(h5saver.raw_group, 'Big')
+        small_group = h5saver.get_set_group(h5saver.raw_group, 'Small')
+        for indexes in np.ndindex(*EXT_SHAPE):
+            data_saver.add_data(data_group, data, indexes=list(indexes))
+            data_saver.add_data(small_group, small_data, indexes=list(indexes))
+
+        for ind in range(len(data)):
+            data_node = h5saver.get_node(f'/RawData/Big/Data0{ind}')
+            assert data_node.chunk_shape == (1, 1, 256, 128)
+            assert np.all(data_node.read() == frames[ind])
+        small_node = h5saver.get_node('/RawData/Small/Data00')
+        assert small_node.chunk_shape != (1, 1, len(DATA1D))  # too small to get a chunk per scan step
+        assert np.all(small_node.read() == DATA1D)
+        h5saver.close_file()
+
+    def test_direct_chunk_write_pixel_access(self, tmp_path):
+        h5saver = saving.H5SaverLowLevel()
+        h5saver.init_file(file_name=tmp_path.joinpath('h5file.h5'))
+        h5saver.chunk_access = saving.ChunkAccess['pixel']
+
+        EXT_SHAPE = (3, 4)
+        data_saver = DataExtendedSaver(h5saver, EXT_SHAPE, direct_chunk_write=True)
+        frame = np.random.randint(0, 1000, (256, 128)).astype(np.uint16)
+        data = DataWithAxes(name='mydata', data=[frame], source='raw', dim='Data2D')
+        for indexes in np.ndindex(*EXT_SHAPE):
+            data_saver.add_data(h5saver.raw_group, data, indexes=list(indexes))
+
+        data_node = h5saver.get_node('/RawData/Data00')
+        assert data_node.chunk_shape[:2] == EXT_SHAPE  # the pixel layout is kept
+        assert np.all(data_node.read() == frame)
+        h5saver.close_file()
+
 
 class TestDataToExportSaver:
     def test_save(self, get_h5saver, init_data_to_export):
@@ -452,12 +524,14 @@ class TestDataToExportEnlargeableSaver:
         Nadd_data = 2
         for ind in range(Nadd_data):
             data_saver.add_data(det_group, data_to_export, axis_value=27.)
+        data_saver.flush()  # the appended frames are staged in memory, see EArrayStagingBuffer
 
         for node in h5saver.walk_nodes('/'):
             if 'shape' in node.attrs and node.name != 'Logger' and 'data' in node.attrs['data_type']:
                 assert node.attrs['shape'][0] == Nadd_data
 
         data_saver.add_data(det_group, data_to_export, axis_value=72.)
+        data_saver.flush()
         for node in h5saver.walk_nodes('/'):
             if 'shape' in node.attrs and node.name != 'Logger' and 'data' in node.attrs['data_type']:
                 assert node.attrs['shape'][0] == Nadd_data + 1
@@ -497,12 +571,14 @@ class TestDataToExportTimedSaver:
         Nadd_data = 2
         for ind in range(Nadd_data):
             data_saver.add_data(det_group, data_to_export)
+        data_saver.flush()  # the appended frames are staged in memory, see EArrayStagingBuffer
 
         for node in h5saver.walk_nodes('/'):
             if 'shape' in node.attrs and node.name != 'Logger' and 'data' in node.attrs['data_type']:
                 assert node.attrs['shape'][0] == Nadd_data
 
         data_saver.add_data(det_group, data_to_export)
+        data_saver.flush()
         for node in h5saver.walk_nodes('/'):
             if 'shape' in node.attrs and node.name != 'Logger' and 'data' in node.attrs['data_type']:
                 assert node.attrs['shape'][0] == Nadd_data + 1
@@ -583,6 +659,7 @@ class TestDataLoader:
         Nadd_data = 3
         for ind in range(Nadd_data):
             data_saver.add_data(det_group, data_to_export)
+        data_saver.flush()  # the appended frames are staged in memory, see EArrayStagingBuffer
 
         assert data_loader.get_nav_group('/RawData/MyDet/Data2D/CH00/EnlData00') == \
                h5saver.get_node(f'/RawData/MyDet/{SPECIAL_GROUP_NAMES["nav_axes"]}')
@@ -595,6 +672,42 @@ class TestDataLoader:
             assert np.all(data_loaded[ind][0] == pytest.approx(DATA2D))
             assert np.all(data_loaded[ind][1] == pytest.approx(DATA2D))
 
+    def test_load_lazy_data(self, get_h5saver, init_data_to_export, monkeypatch):
+        h5saver = get_h5saver
+        data_loader = DataLoader(h5saver)
+
+        data_saver = DataToExportTimedSaver(h5saver)
+        det_group = h5saver.get_set_group(h5saver.raw_group, 'MyDet')
+        for ind in range(4):
+            data_saver.add_data(det_group, init_data_to_export * (ind + 1))
+        data_saver.flush()
+
+        data = data_loader.load_data('/RawData/MyDet/Data2D/CH00/EnlData00', lazy=False)
+        data_lazy = data_loader.load_data('/RawData/MyDet/Data2D/CH00/EnlData00', lazy=True)
+        assert not data.is_lazy
+        assert data_lazy.is_lazy
+        assert isinstance(data_lazy[0], H5LazyArray)
+        assert data_lazy.shape == data.shape
+        assert data_lazy.nav_indexes == data.nav_indexes
+
+        assert not data_lazy.inav[1].is_lazy
+        assert np.allclose(data_lazy.inav[1][0], data.inav[1][0])
+        assert np.allclose(data_lazy.isig[1:3, 2:5][0], data.isig[1:3, 2:5][0])
+        assert np.allclose(data_lazy[0][::-2, -1], data[0][::-2, -1])
+        for axis in (0, 1, (1, 2), None):
+            assert np.allclose(np.mean(data_lazy[0], axis=axis), np.mean(data[0], axis=axis))
+            assert np.allclose(np.sum(data_lazy[0], axis=axis), np.sum(data[0], axis=axis))
+        assert np.allclose(data_lazy.mean(axis=0)[0], data.mean(axis=0)[0])
+        assert data_lazy.to_memory() == data
+
+        data_loaded = data_loader.load_data('/RawData/MyDet/Data2D/CH00/EnlData00', lazy=None)
+        assert not data_loaded.is_lazy  # smaller than the lazy_loading_mb config value
+
+        node = h5saver.get_node('/RawData/MyDet/Data2D/CH00/EnlData00')
+        monkeypatch.setattr(data_saving, 'config', lambda *args: 0)  # as if all the nodes were large
+        assert DataSaverLoader._is_lazy(node, None)
+        assert not DataSaverLoader._is_lazy(node)  # lazy loading is opt-in
+
     def test_load_all(self, get_h5saver, init_data_to_export):
         h5saver = get_h5saver
         data_to_export = init_data_to_export
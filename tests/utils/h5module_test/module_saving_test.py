@@ -5,16 +5,23 @@ Created the 23/11/2022
 @author: Sebastien Weber
 """
 
+from unittest import mock
+
 import numpy as np
 import pytest
 
+from pymodaq.utils.config import Config
 from pymodaq.utils.h5modules import saving
+from pymodaq.utils.h5modules.background_saving import BackgroundSaver
 from pymodaq.utils.h5modules.module_saving import DetectorSaver, ActuatorSaver, ScanSaver
 from pymodaq.utils.h5modules.data_saving import DataManagement, AxisSaverLoader, DataSaverLoader, DataToExportSaver
 from pymodaq.utils.data import Axis, DataWithAxes, DataSource, DataToExport
 from pymodaq.utils.parameter import Parameter
 from pymodaq.control_modules.mocks import MockScan, MockDAQMove, MockDAQViewer
 
+config = Config()
+
+
 @pytest.fixture()
 def get_h5saver_module(tmp_path):
     h5saver = saving.H5SaverLowLevel()
@@ -46,6 +53,31 @@ class TestDetectorSaver:
         node1 = det_saver.get_set_node()
         assert node1 == node0
 
+    def test_background_writer(self, get_h5saver_module):
+        def config_background(*path):
+            if path == ('data_saving', 'background_writer', 'enabled'):
+                return True
+            return config(*path)
+
+        h5saver = get_h5saver_module
+        mock_det = MockDAQViewer(h5saver)
+        det_saver = DetectorSaver(module=mock_det)
+        with mock.patch('pymodaq.utils.h5modules.module_saving.config', config_background):
+            det_saver.h5saver = h5saver
+        background_saver = det_saver._datatoexport_saver
+        assert isinstance(background_saver, BackgroundSaver)
+        assert background_saver.running
+
+        node = det_saver.get_set_node()
+        det_saver.add_data(node, DataToExport('mydte', data=[
+            DataWithAxes('mydata', source=DataSource['raw'], data=[np.array([0., 1.])])]))
+        det_saver.flush()
+        assert background_saver.statistics()['written'] == 1
+        assert 'Data1D' in node.children_name()
+
+        h5saver.close_file()
+        assert not background_saver.running
+
 
 class TestScanSaver:
     def test_get_set_node(self, get_h5saver_module):
@@ -4,6 +4,8 @@ Created the 21/11/2022
 
 @author: Sebastien Weber
 """
+import threading
+
 import numpy as np
 import pytest
 from datetime import datetime
@@ -95,6 +97,19 @@ class TestH5SaverLowLevel:
         #"todo
         pass
 
+    @pytest.mark.parametrize('chunk_access', backends.ChunkAccess.names())
+    def test_add_array_chunks(self, get_h5saver_lowlevel, chunk_access):
+        h5saver = get_h5saver_lowlevel
+        array = h5saver.add_array(h5saver.raw_group, 'data', 'data', data_shape=(128, 256), array_type=np.float64,
+                                  data_dimension='Data2D', scan_shape=(20, 30), add_scan_dim=True,
+                                  chunk_access=chunk_access)
+        assert array.chunk_shape == backends.compute_chunk_shape((20, 30), (128, 256), np.float64, chunk_access)
+
+        h5saver.chunk_access = backends.ChunkAccess[chunk_access]
+        earray = h5saver.add_array(h5saver.raw_group, 'enl_data', 'data', data_shape=(256,), array_type=np.float64,
+                                   data_dimension='Data1D', enlargeable=True)
+        assert earray.chunk_shape == backends.compute_chunk_shape((None,), (256,), np.float64, chunk_access)
+
     def test_incremental_group(self, get_h5saver_lowlevel):
         # "todo
         h5saver = get_h5saver_lowlevel
@@ -124,6 +139,32 @@ class TestH5Saver:
         assert h5saver.get_attr(h5saver.raw_group, 'attr1') == 'attr1'
         utils.check_vals_in_iterable(h5saver.get_attr(h5saver.raw_group, 'attr2'), (10, 2))
 
+    def test_staging_timer(self, get_h5saver, tmp_path, qtbot):
+        h5saver = get_h5saver
+        h5saver.init_file(update_h5=True, addhoc_file_path=tmp_path.joinpath('h5file.h5'))
+        array = h5saver.create_earray(h5saver.raw_group, 'array', dtype=np.float64, data_shape=(3,))
+        staging_buffer = h5saver.get_staging_buffer(array, max_frames=100, max_delay_ms=50)
+        staging_buffer.append(np.zeros((3,)))
+        assert array.attrs['shape'][0] == 0
+
+        # the staged frame is written even if nothing else is appended
+        qtbot.waitUntil(lambda: array.attrs['shape'][0] == 1, timeout=5000)
+        assert len(staging_buffer) == 0
+
+        locked, release = threading.Event(), threading.Event()
+
+        def writer():
+            with h5saver.lock:
+                locked.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        locked.wait(5)
+        assert not h5saver.flush_due_staging_buffers()  # the lock is held by a writer thread
+        release.set()
+        thread.join()
+
     def test_init_file(self, get_h5saver_scan, tmp_path):
         h5saver = get_h5saver_scan
         datetime_now = datetime.now()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the ModulesManager synchronisation of the detectors and actuators, driven by mocks replying from other
+threads
+"""
+import threading
+import time
+
+import numpy as np
+
+from pymodaq.control_modules.mocks import MockLineDetector, MockLineActuator
+from pymodaq.utils.data import DataToExport, DataActuator
+from pymodaq.utils.managers.modules_manager import ModulesManager
+
+
+def test_grab_datas(qtbot):
+    detectors = [MockLineDetector('det0', 0.05), MockLineDetector('det1', 0.1)]
+    manager = ModulesManager(detectors, [], detectors, [])
+    manager.connect_detectors()
+
+    dte = manager.grab_datas()
+    assert manager.det_done_flag
+    assert len(dte) == 2
+    assert 0.1 <= manager.grab_latency < 0.5  # returns when the slowest detector replied
+
+
+def test_grab_datas_timeout(qtbot):
+    detectors = [MockLineDetector('det0', 0.3)]
+    manager = ModulesManager(detectors, [], detectors, [])
+    manager.detector_timeout = 100
+    manager.connect_detectors()
+
+    with qtbot.waitSignal(manager.timeout_signal, timeout=1000):
+        manager.grab_datas()
+    assert not manager.det_done_flag
+    assert manager.grab_latency < 0.3
+    with qtbot.waitSignal(detectors[0].grab_done_signal, timeout=1000):  # the late reply
+        pass
+    manager.connect_detectors(False)
+
+
+def test_wait_latched(qtbot):
+    detectors = [MockLineDetector('det0', 0.3, latch_delay=0.05), MockLineDetector('det1', 0.1)]
+    manager = ModulesManager(detectors, [], detectors, [])
+    manager.connect_detectors()
+
+    tzero = time.perf_counter()
+    manager.start_grab()
+    assert manager.wait_latched()
+    assert 0.1 <= time.perf_counter() - tzero < 0.3  # det1 does not latch, det0 still reads out its data
+    assert not manager.det_done_flag
+
+    dte = manager.wait_grab()
+    assert manager.det_done_flag
+    assert len(dte) == 2
+    assert manager.grab_latency >= 0.3
+    manager.connect_detectors(False)
+
+
+def test_move_actuators(qtbot):
+    actuators = [MockLineActuator('act0', 0.02), MockLineActuator('act1', 0.05)]
+    manager = ModulesManager([], actuators, [], actuators)
+    manager.connect_actuators()
+
+    positions = manager.move_actuators(DataToExport('positions', data=[DataActuator('act0', data=1.),
+                                                                      DataActuator('act1', data=2.)]))
+    assert manager.move_done_flag
+    assert manager.order_positions(positions).get_data_from_name('act1').value() == 2.
+    assert 0.05 <= manager.move_latency < 0.5
+
+    assert manager.start_move(DataToExport('positions', data=[DataActuator('act0', data=3.),
+                                                              DataActuator('act1', data=4.)]))
+    assert not manager.move_done_flag
+    assert manager.wait_move().get_data_from_name('act0').value() == 3.
+    assert not manager.start_move(DataToExport('positions', data=[DataActuator('act0', data=3.)]))
+
+
+def test_grab_line(qtbot):
+    detectors = [MockLineDetector('det0', 0.1)]
+    actuators = [MockLineActuator('act0', 0.05)]
+    manager = ModulesManager(detectors, actuators, detectors, actuators)
+    manager.connect_detectors()
+    manager.connect_actuators()
+
+    line = DataToExport('line', data=[DataActuator('act0', data=[np.linspace(0, 1, 5)])])
+    dte = manager.grab_line(line, 'act0')
+    assert manager.det_done_flag
+    assert manager.move_done_flag
+    assert dte.get_data_from_name('det0').shape == (5, 3)
+    assert manager.move_latency >= 0.05
+    manager.connect_detectors(False)
+    manager.connect_actuators(False)
+
+
+def test_mixed_step_and_line(qtbot):
+    detectors = [MockLineDetector('det0', 0.05)]
+    actuators = [MockLineActuator('act0', 0.02), MockLineActuator('act1', 0.2)]
+    manager = ModulesManager(detectors, actuators, detectors, actuators)
+    manager.connect_detectors()
+    manager.connect_actuators()
+
+    manager.move_done(DataActuator('act0', data=0.))  # not moved by the manager
+    assert not manager.move_done_flag
+
+    positions = DataToExport('positions', data=[DataActuator('act0', data=1.), DataActuator('act1', data=0.)])
+    assert set(manager.move_actuators(positions).get_names()) == {'act0', 'act1'}
+    assert manager.move_done_flag
+
+    line = DataToExport('line', data=[DataActuator('act0', data=[np.ones((5,))]),
+                                      DataActuator('act1', data=[np.linspace(0, 1, 5)])])
+    threading.Timer(0.05, actuators[0].move_done_signal.emit, (DataActuator('act0', data=1.),)).start()
+    dte = manager.grab_line(line, 'act1')  # act0 reporting during the line does not end it
+    assert manager.move_done_positions.get_names() == ['act1']
+    assert manager.move_done_positions.get_data_from_name('act1').value() == 1.
+    assert dte.get_data_from_name('det0').shape == (5, 3)
+
+    positions = manager.move_actuators(DataToExport('positions', data=[DataActuator('act0', data=2.),
+                                                                      DataActuator('act1', data=3.)]))
+    assert manager.move_done_flag
+    assert set(positions.get_names()) == {'act0', 'act1'}  # both expected again in step mode
+    assert manager.order_positions(positions).get_data_from_name('act1').value() == 3.
+
+    manager.connect_detectors(False)
+    manager.connect_actuators(False)
+
+
+def test_wait_for(qtbot):
+    manager = ModulesManager()
+    tzero = time.perf_counter()
+    assert ModulesManager._wait_for(lambda: True, manager._detectors_done, 1000)
+    assert not ModulesManager._wait_for(lambda: False, manager._detectors_done, 50)
+    assert 0.04 <= time.perf_counter() - tzero < 0.5  # coarse timer
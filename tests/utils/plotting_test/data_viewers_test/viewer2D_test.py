@@ -153,6 +153,33 @@ class TestData0DWithHistory:
         assert data_histo.datas == dict([])
         assert data_histo._data_length == 0
 
+    def test_history_ring_buffer(self, init_qt):
+        Nsamplesinhisto = 5
+        data_histo = plot_utils.Data0DWithHistory(Nsamplesinhisto)
+        values = np.random.rand(12)
+        for ind, value in enumerate(values):
+            data_histo.add_datas(dict(CH0=value, CH1=-value))
+            start = max(0, ind + 1 - Nsamplesinhisto)
+            assert data_histo.datas['CH0'] == approx(values[start:ind + 1])
+            assert data_histo.datas['CH1'] == approx(-values[start:ind + 1])
+            assert data_histo.xaxis == approx(np.arange(start, ind + 1))
+            assert data_histo.mins['CH0'] == approx(np.min(values[:ind + 1]))
+            assert data_histo.maxs['CH0'] == approx(np.max(values[:ind + 1]))
+            assert data_histo.maxs['CH1'] == approx(-np.min(values[:ind + 1]))
+        assert np.shares_memory(data_histo.datas['CH0'], data_histo._buffers['CH0'])  # views, not copies
+
+        data_histo.length = 3
+        assert data_histo.datas['CH0'] == approx(values[-3:])
+        assert data_histo.xaxis == approx(np.arange(9, 12))
+        data_histo.add_datas(dict(CH0=2., CH1=0.))
+        assert data_histo.datas['CH0'] == approx(np.concatenate((values[-2:], [2.])))
+        assert data_histo.maxs['CH0'] == approx(2.)
+
+        data_histo.length = 10
+        data_histo.add_datas(dict(CH0=3., CH1=0.))
+        assert data_histo.datas['CH0'] == approx(np.concatenate((values[-2:], [2., 3.])))
+        assert data_histo.xaxis == approx(np.arange(10, 14))
+
 
 class TestViewer2D:
     def test_init(self, init_viewer2D):
@@ -614,6 +641,24 @@ class TestImageDisplayer:
         QtWidgets.QApplication.processEvents()
 
 
+    def test_pyramid_rendering(self, init_viewer2D):
+        prog, qtbot = init_viewer2D
+        array = np.random.randint(0, 4096, (1024, 2048)).astype(np.uint16)
+        prog.show_data(data_mod.DataRaw('raw', data=[array]))
+        QtWidgets.QApplication.processEvents()
+        image_item = prog.view.data_displayer.get_image('red')
+        image_item.render()
+        assert image_item.image.shape == array.shape  # full resolution data kept for the crosshair and ROIs
+        assert image_item._rendered_level > 0  # the full image is larger than the screen
+        assert image_item.qimage.width() < array.shape[1]
+        assert image_item.get_val_at((10, 20)) == array[20, 10]
+
+        image_item.getViewBox().setRange(xRange=(0, 50), yRange=(0, 50), padding=0)
+        QtWidgets.QApplication.processEvents()
+        image_item.render()
+        assert image_item._rendered_level == 0
+
+
 class TestModifyImages:
     def test_FlipUD_action(self, init_viewer2D):
         prog, qtbot = init_viewer2D
@@ -2,7 +2,7 @@ import numpy as np
 import pytest
 
 from qtpy import QtWidgets
-from pymodaq.utils.plotting.data_viewers.viewerND import ViewerND
+from pymodaq.utils.plotting.data_viewers.viewerND import ViewerND, UniformDataDisplayer
 from pymodaq.utils.conftests import qtbotskip
 from pymodaq.utils import data as data_mod
 from scipy.spatial import Delaunay as Triangulation
@@ -37,3 +37,50 @@ class TestSpread:
         viewer.show_data(data_spread)
 
         pass
+
+
+class TestUniform:
+
+    def test_cached_projections(self, init_viewernd, qtbot):
+        viewer = init_viewernd
+        array = np.random.random_sample((7, 10, 5))
+        data = data_mod.DataRaw('uniform', data=[array], nav_indexes=(0,),
+                                axes=[data_mod.Axis('nav', data=np.linspace(0, 6, 7), index=0),
+                                      data_mod.Axis('sig0', data=np.linspace(0, 9, 10), index=1),
+                                      data_mod.Axis('sig1', data=np.linspace(0, 4, 5), index=2)])
+        viewer.show_data(data)
+        displayer = viewer.data_displayer
+        displayer.get_summed_area()
+        qtbot.waitUntil(lambda: 'summed_area' in displayer._projections, timeout=5000)
+
+        displayer._filter_type = 'sum'
+        navigator_data = displayer._process_signal(data, [(1, 4), (2, 5)], lambda: None)
+        assert np.allclose(navigator_data[0], np.sum(array[:, 1:4, 2:5], axis=(1, 2)))
+
+        displayer.get_nav_mean(0)
+        qtbot.waitUntil(lambda: 'nav_mean0' in displayer._projections, timeout=5000)
+        assert np.allclose(displayer.get_nav_mean(0)[0], np.mean(array, axis=0))
+
+        viewer.show_data(data.deepcopy())
+        assert displayer._projections == dict([])
+
+    def test_compute_mean(self):
+        array = np.random.random_sample((7, 4, 10))
+        data = data_mod.DataRaw('uniform', data=[array], nav_indexes=(0, 1),
+                                axes=[data_mod.Axis(f'axis{ind}', data=np.linspace(0, size - 1, size), index=ind)
+                                      for ind, size in enumerate(array.shape)])
+        for axis in (0, 1, (0, 1)):
+            data_mean = UniformDataDisplayer.compute_mean(data, axis, chunk_nbytes=1)
+            data_expected = data.mean(axis=axis)
+            assert data_mean.shape == data_expected.shape
+            assert data_mean.nav_indexes == data_expected.nav_indexes
+            assert np.allclose(data_mean[0], data_expected[0])
+        cancelled = []
+
+        def is_cancelled():
+            cancelled.append(True)
+            return len(cancelled) > 2
+
+        assert UniformDataDisplayer.compute_mean(data, 0, is_cancelled, chunk_nbytes=1) is None
+        assert len(cancelled) == 3  # checked between chunks
+
@@ -10,7 +10,7 @@ import numpy as np
 from pyqtgraph.functions import mkColor
 from pymodaq.utils import data as data_mod
 from pymodaq.utils.plotting.utils.plot_utils import Point, Vector, get_sub_segmented_positions, RoiInfo, RectROI, \
-    LinearROI
+    LinearROI, TriangulationCache, makeAlphaTriangles, ImagePyramid, points_in_polygon, SpreadPointsIndex
 from pymodaq.utils.math_utils import linspace_step
 
 
@@ -126,3 +126,107 @@ class TestInfoFromROI:
         # roi_info refers to the index of the numpy data (line, column, ...)
         assert roi_info.roi_class == RectROI
 
+
+
+class TestTriangulation:
+    def test_make_alpha_triangles(self):
+        rng = np.random.default_rng(0)
+        data = rng.random((100, 3))
+        tri, tri_data, rgba_values, alpha = makeAlphaTriangles(data, lut=np.zeros((256, 3)), levels=(0, 1))
+        assert np.allclose(tri_data, [np.mean(data[simplex, 2]) for simplex in tri.simplices])
+        assert len(rgba_values) == len(tri.simplices)
+
+        tri_bis, tri_data_bis, _, _ = makeAlphaTriangles(data, lut=np.zeros((256, 3)), levels=(0, 1),
+                                                         triangulation=tri)
+        assert tri_bis is tri
+        assert np.allclose(tri_data_bis, tri_data)
+
+    def test_cache(self):
+        rng = np.random.default_rng(0)
+        points = rng.random((200, 2))
+        cache = TriangulationCache()
+        tri = cache.update(points[:100])
+        assert cache.version == 1
+        assert cache.update(points[:100].copy()) is tri
+        assert cache.version == 1
+
+        tri_appended = cache.update(points)  # incremental update
+        assert tri_appended is tri
+        assert cache.version == 2
+        assert tri.npoints == 200
+
+        tri_new = cache.update(points[::-1])  # rebuilt
+        assert tri_new is not tri
+        assert cache.version == 3
+
+    def test_find_simplex(self):
+        rng = np.random.default_rng(0)
+        cache = TriangulationCache()
+        tri = cache.update(rng.random((200, 2)))
+        positions = np.cumsum(rng.normal(0, 0.01, (100, 2)), axis=0) + 0.5  # moving crosshair
+        for xy in list(positions) + [np.array([2., 2.]), np.array([0.5, 0.5])]:
+            assert cache.find_simplex(xy) == tri.find_simplex(xy)
+
+
+class TestImagePyramid:
+    @pytest.mark.parametrize('dtype', (np.uint16, np.float64))
+    def test_levels(self, dtype):
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 1000, (130, 67)).astype(dtype)
+        pyramid = ImagePyramid(min_size=16)
+        pyramid.update(image)
+        assert pyramid.n_levels == 3  # 130x67, 65x33, 32x16
+        assert pyramid.get_level(0) is image
+
+        level1 = pyramid.get_level(1)
+        assert level1.shape == (65, 33)
+        assert level1.dtype == dtype
+        expected = image[:130, :66].reshape((65, 2, 33, 2)).mean(axis=(1, 3))
+        if dtype == np.uint16:
+            expected = np.floor(expected)
+        assert np.allclose(level1, expected)
+        assert pyramid.get_level(10).shape == (32, 16)
+
+        buffer = pyramid.get_level(2)
+        pyramid.update(image[::-1].copy())  # buffers are reused
+        assert pyramid.get_level(2) is buffer
+        assert np.allclose(pyramid.get_level(1), expected[::-1, :] if dtype == np.float64 else
+                           np.floor(image[::-1][:130, :66].reshape((65, 2, 33, 2)).mean(axis=(1, 3))))
+
+    def test_level_choice(self):
+        pyramid = ImagePyramid()
+        pyramid.update(np.zeros((1024, 512)))
+        assert pyramid.level_for_size(1024 * 512) == 0
+        assert pyramid.level_for_size(200 ** 2) == 2
+        assert ImagePyramid.level_for_downsampling(1) == 0
+        assert ImagePyramid.level_for_downsampling(3.5) == 1
+        assert ImagePyramid.level_for_downsampling(8) == 3
+
+        pyramid.update(np.zeros((10, 10, 3)))  # RGB images are not decimated
+        assert pyramid.n_levels == 0
+        assert pyramid.get_level(1) is None
+
+
+class TestSpreadPointsIndex:
+    def test_points_in_polygon(self):
+        polygon = np.array([[0., 0.], [2., 0.], [2., 1.], [1., 2.], [0., 1.]])
+        points = np.array([[0.5, 0.5], [1.5, 1.4], [1., 1.9], [1.9, 1.8], [-0.1, 0.5], [3., 0.5]])
+        assert np.all(points_in_polygon(points, polygon) == [True, True, True, False, False, False])
+        assert not np.any(points_in_polygon(points, polygon[:2]))
+
+    def test_in_path(self):
+        from qtpy import QtGui, QtCore
+        rng = np.random.default_rng(0)
+        x, y = rng.random(5000) * 10, rng.random(5000) * 10
+        index = SpreadPointsIndex()
+        index.update(x, y)
+        assert index.version == 1
+        index.update(x.copy(), y.copy())
+        assert index.version == 1
+
+        assert np.all(index.in_box(2, 4, 5, 8) == np.flatnonzero((x >= 2) & (x <= 4) & (y >= 5) & (y <= 8)))
+
+        path = QtGui.QPainterPath()
+        path.addEllipse(QtCore.QRectF(2, 3, 4, 5))
+        expected = [ind for ind in range(len(x)) if path.contains(QtCore.QPointF(x[ind], y[ind]))]
+        assert np.all(index.in_path(path) == expected)
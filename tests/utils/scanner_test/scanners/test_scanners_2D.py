@@ -4,7 +4,161 @@ Created the 04/11/2023
 
 @author: Sebastien Weber
 """
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from pymodaq.utils import math_utils as mutils
+from pymodaq.utils.scanner import scan_factory
+from pymodaq.utils.scanner.scan_factory import ScannerFactory, LazyScanArray
+
+scanner_factory = ScannerFactory()
+
+
+class MoveMock:
+    def __init__(self, ind: int = 0):
+        self.title = f'act_{ind}'
+        self.units = f'units_{ind}'
+
+
+def get_scanner(scan_sub_type: str, **settings):
+    scanner = scanner_factory.get('Scan2D', scan_sub_type, actuators=[MoveMock(ind) for ind in range(2)])
+    for ind, ax in enumerate(scanner.axes):
+        for name, values in settings.items():
+            scanner.settings.child(ax, f'{name}_{ax}').setValue(values[ind])
+    return scanner
+
+
+def loop_positions(axis_1_unique, axis_2_unique, back_and_forth=False):
+    positions = []
+    for ind_x, pos1 in enumerate(axis_1_unique):
+        for ind_y, pos2 in enumerate(axis_2_unique):
+            if back_and_forth and mutils.odd_even(ind_x):
+                positions.append([pos1, axis_2_unique[len(axis_2_unique) - ind_y - 1]])
+            else:
+                positions.append([pos1, pos2])
+    return np.array(positions)
+
+
+def loop_spiral_indexes(npts_by_axis):
+    Nlin = npts_by_axis / 2
+    axis_1_indexes = [0]
+    axis_2_indexes = [0]
+    ind = 0
+    flag = True
+    while flag:
+        step = 1 if mutils.odd_even(ind) else -1
+        for axis_indexes, other_indexes in ((axis_1_indexes, axis_2_indexes), (axis_2_indexes, axis_1_indexes)):
+            for ind_step in range(ind):
+                axis_indexes.append(axis_indexes[-1] + step)
+                other_indexes.append(other_indexes[-1])
+                if len(axis_1_indexes) >= (2 * Nlin + 1) ** 2:
+                    flag = False
+                    break
+            if not flag:
+                break
+        ind += 1
+    return np.array([axis_1_indexes, axis_2_indexes]).T
+
+
+@pytest.fixture
+def lazy_steps():
+    """Set the number of steps above which positions are computed on demand"""
+    default = scan_factory.config('scan', 'lazy_positions_steps')
+
+    def set_lazy_steps(n_steps: int):
+        scan_factory.config['scan', 'lazy_positions_steps'] = n_steps
+    yield set_lazy_steps
+    set_lazy_steps(default)
 
 
 class TestScanner2D:
-    pass
\ No newline at end of file
+    @pytest.mark.parametrize('scan_sub_type', ('Linear', 'LinearBackForce'))
+    def test_linear(self, qtbot, scan_sub_type):
+        scanner = get_scanner(scan_sub_type, start=(-1., 2.), stop=(1., 5.), step=(0.5, 0.3))
+        scanner.set_scan()
+        axis_1 = mutils.linspace_step(-1., 1., 0.5)
+        axis_2 = mutils.linspace_step(2., 5., 0.3)
+        positions = loop_positions(axis_1, axis_2, back_and_forth=scan_sub_type == 'LinearBackForce')
+        assert np.array_equal(scanner.positions, positions)
+        assert scanner.get_scan_shape() == (len(axis_1), len(axis_2))
+        assert np.array_equal(scanner.axes_unique[0], axis_1)
+        assert np.array_equal(scanner.axes_unique[1], axis_2)
+        for ind in range(scanner.n_steps):
+            assert scanner.axes_unique[0][scanner.axes_indexes[ind, 0]] == positions[ind, 0]
+            assert scanner.axes_unique[1][scanner.axes_indexes[ind, 1]] == positions[ind, 1]
+
+    @pytest.mark.parametrize('npts_by_axis', (1, 4, 7, 10))
+    def test_spiral(self, qtbot, npts_by_axis):
+        scanner = get_scanner('Spiral', center=(1., -2.), rmax=(2., 4.))
+        scanner.settings.child('npts_by_axis').setValue(npts_by_axis)
+        scanner.set_scan()
+        centers, rmaxs, rsteps = scanner.get_pos()
+        indexes = loop_spiral_indexes(npts_by_axis)
+        assert np.array_equal(scanner.positions, indexes * rsteps + centers)
+        assert scanner.n_steps == (npts_by_axis + 1) ** 2
+
+    def test_million_steps(self, qtbot, lazy_steps):
+        lazy_steps(10 ** 6)  # positions computed right away
+        scanner = get_scanner('Linear', start=(0., 0.), stop=(999., 999.), step=(1., 1.))
+        scanner.set_scan()
+        assert scanner.n_steps == 1000 ** 2
+        assert scanner.get_scan_shape() == (1000, 1000)
+        assert np.array_equal(scanner.axes_indexes, scanner.positions.astype(int))
+        for axis_unique in scanner.axes_unique:
+            assert np.array_equal(axis_unique, np.arange(1000))
+
+        permutation = np.random.default_rng(0).permutation(scanner.n_steps)
+        positions = scanner.positions[permutation]
+        scanner.get_info_from_positions(positions)
+        assert np.array_equal(scanner.positions, positions)
+        assert np.array_equal(scanner.axes_indexes, scanner.positions.astype(int))
+        assert scanner.get_scan_shape() == (1000, 1000)
+
+    @pytest.mark.parametrize('scan_sub_type, settings', (
+            ('Linear', dict(start=(-1., 2.), stop=(1., 5.), step=(0.5, 0.3))),
+            ('LinearBackForce', dict(start=(1., 2.), stop=(-1., 5.), step=(-0.5, 0.3))),
+            ('Spiral', dict(center=(1., -2.), rmax=(2., -4.)))))
+    def test_lazy_positions(self, qtbot, lazy_steps, scan_sub_type, settings):
+        scanner = get_scanner(scan_sub_type, **settings)
+        lazy_steps(10 ** 6)
+        scanner.set_scan()
+        positions, axes_indexes, axes_unique = scanner.positions, scanner.axes_indexes, scanner.axes_unique
+        assert isinstance(positions, np.ndarray)
+        scan_shape = scanner.get_scan_shape()
+
+        lazy_steps(0)
+        scanner.set_scan()
+        assert isinstance(scanner.positions, LazyScanArray)
+        assert isinstance(scanner.axes_indexes, LazyScanArray)
+        assert len(scanner.positions) == scanner.n_steps == len(positions)
+        assert np.array_equal(np.asarray(scanner.positions), positions)
+        assert np.array_equal(np.asarray(scanner.axes_indexes), axes_indexes)
+        for lazy_axis, axis in zip(scanner.axes_unique, axes_unique):
+            assert np.array_equal(lazy_axis, axis)
+        assert scanner.get_scan_shape() == scan_shape
+        for ind in (0, 7, scanner.n_steps - 1):
+            assert np.array_equal(scanner.positions[ind], positions[ind])
+            assert scanner.get_indexes_from_scan_index(ind) == tuple(axes_indexes[ind])
+
+    def test_lazy_random(self, qtbot, lazy_steps):
+        lazy_steps(0)
+        scanner = get_scanner('Random', start=(-1., 2.), stop=(1., 5.), step=(0.5, 0.3))
+        scanner.set_scan()
+        assert isinstance(scanner.positions, np.ndarray)  # shuffled positions cannot be computed on demand
+
+    def test_lazy_hundred_million_steps(self, qtbot, lazy_steps):
+        lazy_steps(10 ** 6)
+        scanner = get_scanner('Linear', start=(0., 0.), stop=(9999., 9999.), step=(1., 1.))
+        tracemalloc.start()
+        scanner.set_scan()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert isinstance(scanner.positions, LazyScanArray)
+        assert isinstance(scanner.axes_indexes, LazyScanArray)
+        assert peak < 10 ** 8  # the positions would take 1.6 GB
+        assert scanner.n_steps == 10 ** 8
+        assert scanner.get_scan_shape() == (10000, 10000)
+        assert np.array_equal(scanner.positions[123456], [12., 3456.])
+        assert scanner.get_indexes_from_scan_index(10 ** 8 - 1) == (9999, 9999)
@@ -4,7 +4,56 @@ Created the 04/11/2023
 
 @author: Sebastien Weber
 """
+import numpy as np
+import pytest
+
+from pymodaq.utils.scanner.scan_factory import ScannerFactory
+
+scanner_factory = ScannerFactory()
+
+
+class MoveMock:
+    def __init__(self, ind: int = 0):
+        self.title = f'act_{ind}'
+        self.units = f'units_{ind}'
+
+
+def loop_positions(starts, stops, steps):
+    """Positions as computed by accumulating the steps on the last axis first"""
+    all_positions = [starts.copy()]
+    positions = starts.copy()
+    state = SequentialScanner.pos_above_stops(positions, steps, stops)
+    while not state[0]:
+        if not np.any(np.array(state)):
+            positions[-1] += steps[-1]
+        else:
+            ind = np.where(np.array(state))[-1][0]
+            positions[ind] = starts[ind]
+            positions[ind - 1] += steps[ind - 1]
+        state = SequentialScanner.pos_above_stops(positions, steps, stops)
+        if not np.any(np.array(state)):
+            all_positions.append(positions.copy())
+    return np.array(all_positions)
+
+
+SequentialScanner = scanner_factory.builders['ScannerFactory']['Sequential']['Linear']
 
 
 class TestScannerSequential:
-    pass
\ No newline at end of file
+    @pytest.mark.parametrize('start, stop, step', ((0., 1., 0.1), (1., -0.35, -0.15), (0.3, 0.3, 0.1),
+                                                   (-2., 7., 0.7)))
+    def test_axis_positions(self, start, stop, step):
+        positions = SequentialScanner.axis_positions(start, stop, step)
+        assert np.array_equal(positions, loop_positions(np.array([0., start]), np.array([0., stop]),
+                                                        np.array([1., step]))[:, 1])
+
+    def test_set_scan(self, qtbot):
+        scanner = scanner_factory.get('Sequential', 'Linear', actuators=[MoveMock(ind) for ind in range(3)])
+        scanner.update_model([['act_0', 0., 1., 0.25], ['act_1', 2., -1., -0.3], ['act_2', -0.1, 0.25, 0.05]])
+        scanner.set_scan()
+        starts, stops, steps = scanner.get_pos()
+        positions = loop_positions(starts, stops, steps)
+        assert np.array_equal(scanner.positions, positions)
+        assert scanner.get_scan_shape() == tuple(len(np.unique(ax)) for ax in positions.T)
+        for ind in range(scanner.n_axes):
+            assert np.array_equal(scanner.axes_unique[ind][scanner.axes_indexes[:, ind]], positions[:, ind])
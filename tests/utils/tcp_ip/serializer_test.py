@@ -4,6 +4,7 @@ Created the 22/10/2023
 
 @author: Sebastien Weber
 """
+import copy
 import numbers
 
 import numpy as np
@@ -11,7 +12,8 @@ import pytest
 
 from pymodaq.utils import data as data_mod
 from pymodaq.utils.data import Axis, DataToExport, DataWithAxes, DwaType
-from pymodaq.utils.tcp_ip.serializer import Serializer, DeSerializer
+from pymodaq.utils.tcp_ip.serializer import (Serializer, DeSerializer, SocketString, SchemaCache,
+                                             PayloadCompressor)
 from pymodaq.utils.parameter import Parameter, utils as putils, ioxml
 
 
@@ -142,6 +144,76 @@ def test_ndarray_serialization_deserialization():
         assert np.allclose(DeSerializer(ser.to_bytes()).ndarray_deserialization(), ndarray)
 
 
+def test_ndarray_segments():
+    ndarray = np.random.rand(256, 512)
+    ser = Serializer(ndarray)
+    segments = ser.to_segments()
+    assert len(segments) == 2
+    assert isinstance(segments[1], memoryview)
+    assert np.shares_memory(np.frombuffer(segments[1], dtype=ndarray.dtype), ndarray)
+    assert b''.join(segments) == ser.to_bytes()
+
+    ndarray_back = DeSerializer(ser.to_bytes()).ndarray_deserialization()
+    assert np.allclose(ndarray_back, ndarray)
+    assert ndarray_back.flags.writeable
+
+    ndarray = np.asfortranarray(np.random.rand(256, 512))
+    ser = Serializer(ndarray)
+    assert b''.join(ser.to_segments()) == ser.to_bytes()
+    assert np.allclose(DeSerializer(ser.to_bytes()).ndarray_deserialization(), ndarray)
+
+
+def test_merge_segments():
+    segments = [b'ab', memoryview(b'cd'), 10 * b'e', b'f']
+    assert Serializer.merge_segments(segments, min_size=5) == [b'abcd', 10 * b'e', b'f']
+    assert Serializer.merge_segments(segments, min_size=20) == [b'abcd' + 10 * b'e' + b'f']
+
+
+def test_dte_segments(get_data):
+    dte = get_data
+    dte.append(data_mod.DataRaw('large', data=[np.random.rand(256, 512)]))
+    ser = Serializer(dte)
+    segments = ser.to_segments()
+    assert any(isinstance(segment, memoryview) for segment in segments)
+    assert b''.join(segments) == ser.to_bytes()
+    dte_back = DeSerializer(b''.join(segments)).dte_deserialization()
+    for dwa, dwa_back in zip(dte, dte_back):
+        assert dwa == dwa_back
+
+
+def test_socket_string():
+    socket_string = SocketString(b'hello world')
+    assert socket_string.get_first_nbytes(5) == b'hello'
+    assert isinstance(socket_string.get_first_nbytes(0), memoryview)
+    assert socket_string.cursor == 5
+    assert socket_string.remaining() == 6
+    buffer = bytearray(6)
+    assert socket_string.get_first_nbytes_into(buffer) == 6
+    assert buffer == b' world'
+    assert socket_string.get_first_nbytes(4) == b''
+
+    assert DeSerializer(bytearray(Serializer('hello').to_bytes())).string_deserialization() == \
+           'hello'
+
+
+def test_dte_deserialization_no_copy():
+    dte = DataToExport('bench', data=[
+        data_mod.DataRaw(f'dwa{ind}', units='V', labels=[f'label{ind}'],
+                         data=[np.linspace(0, 1, 500)],
+                         axes=[Axis('x', 'm', data=np.linspace(0, 1, 500), index=0)])
+        for ind in range(100)])
+    bytes_string = Serializer(dte).to_bytes()
+    socket_string = SocketString(bytes_string)
+    dte_back = DeSerializer(socket_string).dte_deserialization()
+    for dwa, dwa_back in zip(dte, dte_back):
+        assert dwa == dwa_back
+
+    # the bytes string is read through a cursor and never sliced into new tails
+    assert socket_string._bytes_string.obj is bytes_string
+    assert socket_string.cursor == len(bytes_string)
+    assert socket_string.remaining() == 0
+
+
 def test_object_type_serialization(get_data):
     dte = get_data
     ser = Serializer()
@@ -228,6 +300,98 @@ def test_dte_serialization(get_data):
         assert dwa == dte.get_data_from_full_name(dwa.get_full_name())
 
 
+def test_dte_schema_cache(get_data):
+    sender_cache = SchemaCache()
+    receiver_cache = SchemaCache()
+
+    dte = get_data
+    full_bytes = Serializer(dte, schema_cache=sender_cache).to_bytes()
+    assert len(full_bytes) > len(Serializer(dte).to_bytes())  # schema registration
+    dte_back = DeSerializer(full_bytes, schema_cache=receiver_cache).dte_deserialization()
+    for dwa in dte_back:
+        assert dwa == dte.get_data_from_full_name(dwa.get_full_name())
+
+    for ind in range(3):
+        dte_new = copy.deepcopy(dte)
+        for dwa in dte_new:
+            dwa.data = [array + ind + 1 for array in dwa.data]
+            dwa.timestamp += ind
+        ref_bytes = Serializer(dte_new, schema_cache=sender_cache).to_bytes()
+        assert len(ref_bytes) < len(full_bytes) / 2
+        dte_back = DeSerializer(ref_bytes, schema_cache=receiver_cache).dte_deserialization()
+        assert dte_back.name == dte_new.name
+        assert dte_back.timestamp == dte_new.timestamp
+        for dwa, dwa_back in zip(dte_new, dte_back):
+            assert dwa == dwa_back
+            assert dwa.timestamp == dwa_back.timestamp
+            assert dwa.__class__ == dwa_back.__class__
+            assert dwa.extra_attributes == dwa_back.extra_attributes
+            if dwa.errors is not None:
+                for error_array, error_array_back in zip(dwa.errors, dwa_back.errors):
+                    assert np.allclose(error_array, error_array_back)
+
+    # a different structure is registered with a new schema id
+    dte_new = copy.deepcopy(dte)
+    dte_new[0].name = 'another_name'
+    bytes_string = Serializer(dte_new, schema_cache=sender_cache).to_bytes()
+    assert bytes_string[4:22].decode() == 'DataToExportSchema'
+    assert DeSerializer(bytes_string, schema_cache=receiver_cache).dte_deserialization()[0].name == \
+           'another_name'
+
+    with pytest.raises(TypeError):
+        DeSerializer(ref_bytes).dte_deserialization()
+    with pytest.raises(KeyError):
+        DeSerializer(ref_bytes, schema_cache=SchemaCache()).dte_deserialization()
+
+
+def test_schema_cache_full(get_data):
+    sender_cache = SchemaCache(max_schemas=0)
+    dte = get_data
+    assert Serializer(dte, schema_cache=sender_cache).to_bytes() == Serializer(dte).to_bytes()
+
+
+def test_ndarray_compression():
+    sender = PayloadCompressor('zlib', threshold=1024)
+    receiver = PayloadCompressor()
+    array = np.zeros((100, 100), dtype=np.uint16)
+    array[10:20, 30:50] = 1000
+
+    bytes_string = Serializer(array, compressor=sender).to_bytes()
+    assert len(bytes_string) < array.nbytes / 10
+    assert bytes_string[4:12].decode() == 'zlib:<u2'
+    array_back = DeSerializer(bytes_string, compressor=receiver).ndarray_deserialization()
+    assert np.all(array_back == array)
+    assert array_back.flags.writeable
+    assert DeSerializer(bytes_string).ndarray_deserialization().shape == array.shape
+
+    statistics = sender.statistics()
+    assert statistics['raw_bytes'] == array.nbytes
+    assert statistics['compressed_bytes'] < array.nbytes
+    assert sender.compression_ratio > 10
+    assert receiver.statistics()['decompressed_bytes'] == array.nbytes
+
+    small_array = np.zeros((10,))  # below the threshold
+    assert Serializer(small_array, compressor=sender).to_bytes() == Serializer(small_array).to_bytes()
+    noise = np.random.randint(0, 256, 2048, dtype=np.uint8)  # not compressible
+    assert Serializer(noise, compressor=sender).to_bytes() == Serializer(noise).to_bytes()
+
+    with pytest.raises(ValueError):
+        PayloadCompressor('not_a_codec')
+
+
+def test_dte_compression_with_schema_cache(get_data):
+    sender_cache = SchemaCache()
+    receiver_cache = SchemaCache()
+    compressor = PayloadCompressor('zlib', threshold=0)
+    dte = get_data
+    for ind in range(2):
+        bytes_string = Serializer(dte, schema_cache=sender_cache, compressor=compressor).to_bytes()
+        dte_back = DeSerializer(bytes_string, schema_cache=receiver_cache).dte_deserialization()
+        for dwa, dwa_back in zip(dte, dte_back):
+            assert dwa == dwa_back
+    assert bytes_string[4:29].decode() == 'DataToExportCompressedRef'
+
+
 def test_base_64_de_serialization(get_data: DataToExport):
     dte = get_data
     ser = Serializer(dte)
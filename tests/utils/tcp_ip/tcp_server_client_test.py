@@ -1,10 +1,11 @@
 import pytest
 import numpy as np
 import socket
+import threading
 
 from unittest import mock
 from pymodaq.utils.daq_utils import ThreadCommand
-from pymodaq.utils.tcp_ip.tcp_server_client import MockServer, TCPClient, TCPServer
+from pymodaq.utils.tcp_ip.tcp_server_client import MockServer, TCPClient, TCPServer, SocketListener
 from pymodaq.utils.tcp_ip.mysocket import Socket
 from pymodaq.utils.tcp_ip.serializer import Serializer, DeSerializer
 from pyqtgraph.parametertree import Parameter
@@ -12,6 +13,9 @@ from pyqtgraph import SRTTransform
 from collections import OrderedDict
 from pymodaq.utils.exceptions import ExpectedError, Expected_1, Expected_2, Expected_3
 from pymodaq.utils.data import DataActuator, DataToExport
+from pymodaq.utils.config import Config
+
+config = Config()
 
 
 class MockPythonSocket:  # pragma: no cover
@@ -61,6 +65,14 @@ class MockPythonSocket:  # pragma: no cover
         self._send = self._send[length:]
         return bytes_string
 
+    def recv_into(self, buffer, nbytes=0, **kwargs):
+        view = memoryview(buffer).cast('B')
+        if nbytes == 0:
+            nbytes = len(view)
+        bytes_string = self.recv(nbytes)
+        view[:len(bytes_string)] = bytes_string
+        return len(bytes_string)
+
     def close(self):
         self._closed = True
 
@@ -127,6 +139,95 @@ class TestSocket:
         assert not test_Socket.socket._send
 
 
+    def test_receive_statistics(self):
+        test_Socket = Socket(MockPythonSocket(), chunk_size=1000)
+        for i in range(1025):
+            test_Socket.send(b'test')
+        test_Socket.check_received_length(4100)
+        assert test_Socket.received_bytes == 4100
+        assert test_Socket.recv_calls == 5
+        assert test_Socket.received_fields == 1
+        assert test_Socket.syscalls_per_field == pytest.approx(5)
+        assert test_Socket.bytes_per_second > 0
+        recv_buffer = test_Socket._recv_buffer
+
+        test_Socket.send(b'test')
+        received = test_Socket.check_received_length(4)
+        assert isinstance(received, memoryview)  # no copy of the receive buffer
+        assert received == b'test'
+        assert test_Socket._recv_buffer is recv_buffer  # buffer is reused
+        assert test_Socket.statistics()['received_fields'] == 2
+
+        test_Socket.send(Serializer(b'bytes').to_bytes() + Serializer('hello').to_bytes())
+        deserializer = DeSerializer(test_Socket)
+        bytes_back = deserializer.bytes_deserialization()
+        assert deserializer.string_deserialization() == 'hello'
+        assert bytes_back == b'bytes'  # not overwritten by the next read
+        assert test_Socket.received_fields == 6  # a length and a content per deserialized object
+
+        test_Socket.reset_statistics()
+        assert test_Socket.received_bytes == 0
+        assert test_Socket.syscalls_per_field == 0.
+        assert test_Socket.bytes_per_second == 0.
+
+    def test_check_sended_segments(self):
+        test_Socket = Socket(MockPythonSocket())
+        test_Socket.check_sended_segments([b'te', memoryview(b'st'), b''])
+        assert test_Socket.socket._send == b'test'
+
+    def test_check_received_into(self):
+        test_Socket = Socket(MockPythonSocket())
+        for i in range(1025):
+            test_Socket.send(b'test')
+        buffer = bytearray(4100)
+        assert test_Socket.check_received_into(buffer) == 4100
+        assert bytes(buffer) == 1025 * b'test'
+        assert not test_Socket.socket._send
+
+        with pytest.raises(ConnectionAbortedError):
+            test_Socket.check_received_into(bytearray(4))
+
+    def test_segments_through_socket_pair(self):
+        data = np.random.rand(512, 1024)
+        sock_send, sock_recv = socket.socketpair()
+        sender = Socket(sock_send)
+        receiver = Socket(sock_recv)
+        thread = threading.Thread(target=sender.check_sended_with_serializer, args=(data,))
+        thread.start()
+        data_back = DeSerializer(receiver).ndarray_deserialization()
+        thread.join()
+        sender.close()
+        receiver.close()
+        assert np.all(data_back == data)
+        assert data_back.flags.writeable
+
+
+class TestSocketListener:
+    def test_ready_read(self, qtbot):
+        listener = SocketListener()
+        sock_send, sock_recv = socket.socketpair()
+        receiver = Socket(sock_recv)
+        listener.start()
+        listener.watch(receiver)
+
+        with qtbot.waitSignal(listener.ready_read, timeout=1000) as blocker:
+            sock_send.sendall(Serializer('hello').to_bytes())
+        assert blocker.args[0] is receiver
+        assert DeSerializer(receiver).string_deserialization() == 'hello'
+
+        # one-shot: not signaled again until watched again
+        with qtbot.assertNotEmitted(listener.ready_read, wait=100):
+            sock_send.sendall(Serializer('world').to_bytes())
+        with qtbot.waitSignal(listener.ready_read, timeout=1000):
+            listener.watch(receiver)
+
+        listener.unwatch(receiver)
+        listener.stop()
+        assert not listener.running
+        sock_send.close()
+        sock_recv.close()
+
+
 class TestTCPClient:
     def test_init(self):
         params_state = {'Name': 'test_params', 'value': None}
@@ -216,6 +317,32 @@ class TestTCPClient:
         with pytest.raises(Expected_2):
             test_TCP_Client.init_connection()
 
+    def test_selector_event_loop(self, qtbot):
+        def config_selector(*path):
+            if path == ('network', 'tcp-server', 'event_loop'):
+                return 'selector'
+            return config(*path)
+
+        server_socket = socket.create_server(('localhost', 0))
+        test_TCP_Client = TCPClient('localhost', server_socket.getsockname()[1])
+        with mock.patch('pymodaq.utils.tcp_ip.tcp_server_client.config', config_selector):
+            test_TCP_Client.init_connection()
+        assert test_TCP_Client._listener.running
+        client_socket, _ = server_socket.accept()
+        assert DeSerializer(client_socket.recv(4 + len('GRABBER'))).string_deserialization() == \
+               'GRABBER'
+
+        with qtbot.waitSignal(test_TCP_Client.cmd_signal, timeout=2000,
+                              check_params_cb=lambda cmd: cmd.command == 'move_abs') as blocker:
+            client_socket.sendall(Serializer('move_abs').to_bytes() +
+                                  Serializer(DataActuator(data=12.)).to_bytes())
+        assert blocker.args[0].attribute[0].value() == pytest.approx(12.)
+
+        test_TCP_Client.queue_command(ThreadCommand('quit'))
+        assert test_TCP_Client._listener is None
+        client_socket.close()
+        server_socket.close()
+
     def test_get_data(self):
         test_TCP_Client = TCPClient()
         test_TCP_Client.socket = Socket(MockPythonSocket())
@@ -263,10 +390,97 @@ class TestTCPServer:
         for socket in test_TCP_Server.settings.child(('conn_clients')).value():
             assert not 'server' in socket
 
+    def test_schema_cache_negotiation(self):
+        test_TCP_Server = TCPServer()
+        test_TCP_Server.serversocket = Socket(MockPythonSocket())
+        client_socket = Socket(MockPythonSocket())
+        client_socket.check_sended_with_serializer('Schema_cache')
+        test_TCP_Server.process_socket(client_socket)
+        assert client_socket.schema_cache is not None
+        assert DeSerializer(client_socket).string_deserialization() == 'Schema_cache'
+
+        test_TCP_Client = TCPClient()
+        test_TCP_Client.socket = Socket(MockPythonSocket())
+        assert test_TCP_Client.socket.schema_cache is None
+        test_TCP_Client.get_data('Schema_cache')
+        assert test_TCP_Client.socket.schema_cache is not None
+
+    def test_compression_negotiation(self):
+        test_TCP_Server = TCPServer()
+        test_TCP_Server.serversocket = Socket(MockPythonSocket())
+        client_socket = Socket(MockPythonSocket())
+        client_socket.check_sended_with_serializer('Compression')
+        test_TCP_Server.process_socket(client_socket)
+        assert client_socket.compressor is not None
+        assert client_socket.compressor.codec is None  # the server doesn't compress
+        assert DeSerializer(client_socket).string_deserialization() == 'Compression'
+
+        def config_compression(*path):
+            if path == ('network', 'tcp-server', 'compression'):
+                return 'zlib'
+            return config(*path)
+
+        test_TCP_Client = TCPClient()
+        test_TCP_Client.socket = Socket(MockPythonSocket())
+        test_TCP_Client.socket.check_sended_with_serializer(['zlib'])
+        with mock.patch('pymodaq.utils.tcp_ip.tcp_server_client.config', config_compression):
+            test_TCP_Client.get_data('Compression')
+        assert test_TCP_Client.socket.compressor.codec == 'zlib'
+
+        test_TCP_Client.socket = Socket(MockPythonSocket())
+        test_TCP_Client.socket.check_sended_with_serializer(['lz4'])
+        with mock.patch('pymodaq.utils.tcp_ip.tcp_server_client.config', config_compression):
+            test_TCP_Client.get_data('Compression')
+        assert test_TCP_Client.socket.compressor.codec is None
+        assert 'compression' in test_TCP_Client.socket.statistics()
+
+    def test_select_and_statistics(self):
+        test_TCP_Server = TCPServer()
+        sock_send, sock_recv = socket.socketpair()
+        client_socket = Socket(sock_recv)
+        test_TCP_Server.connected_clients = [{'socket': client_socket, 'type': 'GRABBER'}]
+        sock_send.sendall(Serializer('Done').to_bytes())
 
+        read_sockets, _, _ = test_TCP_Server.select([client_socket], [], [client_socket], 1)
+        assert read_sockets[0] is client_socket
+        assert DeSerializer(read_sockets[0]).string_deserialization() == 'Done'
+        statistics = test_TCP_Server.get_link_statistics()
+        assert statistics['GRABBER']['received_fields'] == 2  # the string length then its content
+        assert statistics['GRABBER']['received_bytes'] == 8
+        sock_send.close()
+        sock_recv.close()
 
 
 class TestMockServer:
     def test_init(self):
         test_MockServer = MockServer()
         assert isinstance(test_MockServer, MockServer)
+
+    def test_selector_event_loop(self, qtbot):
+        def config_selector(*path):
+            if path == ('network', 'tcp-server', 'event_loop'):
+                return 'selector'
+            return config(*path)
+
+        server = MockServer()
+        server.socket_types = ['GRABBER']
+        server.message_list = ['Info']
+        server.settings['socket_ip'] = 'localhost'
+        server.settings['port_id'] = 0
+        with mock.patch('pymodaq.utils.tcp_ip.tcp_server_client.config', config_selector):
+            server.init_server()
+        assert server._listener.running
+
+        client = socket.create_connection(server.serversocket.getsockname())
+        client.sendall(Serializer('GRABBER').to_bytes())
+        qtbot.waitUntil(lambda: len(server.connected_clients) == 2, timeout=2000)
+
+        client.sendall(Serializer('Info').to_bytes() + Serializer('an_info').to_bytes() +
+                       Serializer('a_value').to_bytes())
+        qtbot.waitUntil(lambda: 'an_info' in server.settings.child('infos').names, timeout=2000)
+        assert server.settings['infos', 'an_info'] == 'a_value'
+
+        client.close()
+        qtbot.waitUntil(lambda: len(server.connected_clients) == 1, timeout=2000)
+        server.close_server()
+        assert server._listener is None